@@ -0,0 +1,317 @@
+"""
+Сквозной бенчмарк загрузок на локальных заменителях платформ.
+
+Каждый сценарий — (сеть, размер файла, число одновременных загрузок):
+загрузки идут через настоящий UploaderManager (этапы, повторы, журнал,
+деление канала), а платформы заменены MockPlatforms
+(bench/mock_platforms.py): HTML-фикстуры студии Rutube и группы VK для
+Selenium, resumable-endpoint для YouTube, приёмник частей для Telegram.
+
+Замеряются:
+    - wall — время сценария целиком;
+    - throughput — переданные байты / wall;
+    - latency — медиана длительности одной загрузки;
+    - stages — медианы длительностей этапов (core.timing).
+
+Регрессия относительно сохранённого baseline (bench/e2e_baseline.json):
+wall или этап медленнее на --tolerance (и больше чем на --min-delta-ms),
+либо пропускная способность ниже во столько же раз.
+
+Использование:
+    python bench/e2e.py
+    python bench/e2e.py -n youtube -n telegram --sizes 1 16 64 --concurrency 1 4
+    python bench/e2e.py --uplink-mbit 100 --processing-ms-per-mb 20
+    python bench/e2e.py --save-baseline
+
+Selenium-сценарии (rutube, vk) запускают Chrome без окна (FLOWVID_HEADLESS=1).
+Сеть пропускается ([SKIP]), если её SDK не установлен.
+Рабочая папка (профили, журнал, статистика этапов) — временная, настоящие
+./stats и ./data не затрагиваются.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "e2e_baseline.json"
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+DEFAULT_NETWORKS = ["youtube", "telegram", "rutube", "vk"]
+
+# Без этих пакетов сеть не запустить даже на заменителе
+REQUIREMENTS = {
+    "youtube": ("googleapiclient", "google.auth", "google_auth_httplib2"),
+    "telegram": ("telethon",),
+    "rutube": ("selenium",),
+    "vk": ("selenium",),
+}
+
+
+def missing_requirements(network: str) -> list[str]:
+    import importlib.util
+
+    missing = []
+    for name in REQUIREMENTS.get(network, ()):
+        try:
+            found = importlib.util.find_spec(name) is not None
+        except ModuleNotFoundError:     # нет родительского пакета (google.auth без google)
+            found = False
+        if not found:
+            missing.append(name)
+    return missing
+
+
+# ================================================================
+# Настройка окружения
+# ================================================================
+def bench_settings(network: str, settings: dict | None, mock, workdir: Path) -> dict:
+    """Настройки сети для заменителя: без лимитов, квот и повторов."""
+    settings = dict(settings or {})
+    for name in ("rate_limit", "network_rate_limit", "daily_quota", "quota_costs"):
+        settings.pop(name, None)
+    settings["retry"] = {"attempts": 1}
+    settings["adaptive_timeouts"] = False
+
+    if network == "rutube":
+        settings.update(upload_url=f"{mock.url}/rutube/uploader/", post_ready_delay=0, post_publish_delay=0,
+                        wait_timeout=600)
+    elif network == "vk":
+        settings.update(group_url=f"{mock.url}/vk/bench", default_wait=600, publish_poll_interval=0.2)
+    elif network == "youtube":
+        secret = workdir / "client_secret.json"
+        secret.write_text("{}", encoding="utf-8")
+        settings.update(client_secret_path=secret, token_path=workdir / "token_youtube.pickle")
+    return settings
+
+
+def install_mocks(mock, workdir: Path):
+    """Подменяет конфигурацию сетей и загрузчики YouTube/Telegram."""
+    from config import networks
+    from config.networks import AccountConfig
+    from core.uploader_manager import UploaderManager
+    import mock_platforms
+
+    for i, cfg in enumerate(networks.NETWORKS):
+        if cfg.key not in REQUIREMENTS:
+            continue
+        accounts = (AccountConfig(profile_name=f"bench-{cfg.key}", env_prefix="BENCH_TG_"),)
+        networks.NETWORKS[i] = replace(
+            cfg, enabled=True, accounts=accounts,
+            platform_settings=bench_settings(cfg.key, cfg.platform_settings, mock, workdir),
+        )
+    os.environ.update(BENCH_TG_API_ID="1", BENCH_TG_API_HASH="bench", BENCH_TG_CHANNEL="bench")
+
+    overrides = {
+        "youtube": lambda: mock_platforms.youtube_uploader(mock),
+        "telegram": lambda: mock_platforms.telegram_uploader(mock),
+    }
+    original = UploaderManager._import_uploader
+
+    def import_uploader(module_path: str):
+        key = module_path.rsplit(".", 1)[-1]
+        if key in overrides:
+            return SimpleNamespace(Uploader=overrides[key]())
+        return original(module_path)
+
+    UploaderManager._import_uploader = staticmethod(import_uploader)
+
+
+def make_video(workdir: Path, size_mb: float) -> Path:
+    """Файл нужного размера; содержимое заменителям не важно."""
+    path = workdir / f"bench_{size_mb:g}mb.mp4"
+    if not path.exists():
+        block = os.urandom(1024 * 1024)
+        left = int(size_mb * 1024 * 1024)
+        with open(path, "wb") as f:
+            while left > 0:
+                f.write(block[:min(left, len(block))])
+                left -= len(block)
+    return path
+
+
+# ================================================================
+# Сценарии
+# ================================================================
+def run_scenario(network: str, video: Path, concurrency: int) -> dict:
+    from core.uploader_manager import UploaderManager
+
+    outcomes: list[tuple[float, dict]] = []
+    lock = threading.Lock()
+
+    def one(i: int):
+        t0 = time.perf_counter()
+        try:
+            result = UploaderManager.upload(str(video), [network], f"bench {i}", "FlowVid e2e bench", ["bench"])
+        except Exception as e:
+            result = {"errors": [f"{network}: {e}"]}
+        with lock:
+            outcomes.append((time.perf_counter() - t0, result))
+
+    threads = [threading.Thread(target=one, args=(i,), name=f"bench-{network}-{i}") for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    stages: dict[str, list[float]] = {}
+    errors = []
+    for _, result in outcomes:
+        errors.extend(result.get("errors") or [])
+        for name, seconds in result.get("timings", {}).get(network, {}).get("stages", {}).items():
+            stages.setdefault(name, []).append(seconds)
+    ok = concurrency - len(errors)
+    return {
+        "wall": wall,
+        "throughput": video.stat().st_size * ok / wall if wall else 0.0,
+        "latency": statistics.median(d for d, _ in outcomes),
+        "stages": {name: statistics.median(values) for name, values in stages.items()},
+        "errors": errors,
+    }
+
+
+def merge_runs(runs: list[dict]) -> dict:
+    """Медиана по повторам сценария."""
+    stage_names = {name for run in runs for name in run["stages"]}
+    return {
+        "wall": statistics.median(r["wall"] for r in runs),
+        "throughput": statistics.median(r["throughput"] for r in runs),
+        "latency": statistics.median(r["latency"] for r in runs),
+        "stages": {
+            name: statistics.median(r["stages"][name] for r in runs if name in r["stages"])
+            for name in sorted(stage_names)
+        },
+        "errors": [e for r in runs for e in r["errors"]],
+    }
+
+
+# ================================================================
+# Отчёт и сравнение с baseline
+# ================================================================
+def regressions(key: str, result: dict, base: dict | None, tolerance: float, min_delta: float) -> list[str]:
+    if not base:
+        return []
+    found = []
+
+    def slower(name: str, now: float, was: float):
+        if was and now > was * (1 + tolerance) and now - was > min_delta:
+            found.append(f"{key}: {name} {was * 1000:.0f} → {now * 1000:.0f} ms")
+
+    slower("wall", result["wall"], base.get("wall", 0.0))
+    for name, seconds in result["stages"].items():
+        slower(f"stage {name}", seconds, base.get("stages", {}).get(name, 0.0))
+    was = base.get("throughput", 0.0)
+    if was and result["throughput"] < was / (1 + tolerance):
+        found.append(f"{key}: throughput {was / 1e6:.1f} → {result['throughput'] / 1e6:.1f} MB/s")
+    return found
+
+
+def print_result(key: str, result: dict):
+    print(f"[{key}] wall {result['wall'] * 1000:.0f} ms, latency {result['latency'] * 1000:.0f} ms, "
+          f"throughput {result['throughput'] / 1e6:.1f} MB/s")
+    for name, seconds in sorted(result["stages"].items(), key=lambda kv: kv[1], reverse=True):
+        print(f"    {seconds * 1000:8.0f} ms  {name}")
+    for error in result["errors"][:3]:
+        print(f"    ошибка: {error}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="FlowVid end-to-end upload benchmark")
+    parser.add_argument("-n", "--network", action="append", choices=DEFAULT_NETWORKS,
+                        help="сеть (можно несколько раз; по умолчанию все)")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 16], help="размеры файлов, МБ")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2],
+                        help="одновременных загрузок")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов каждого сценария (берётся медиана)")
+    parser.add_argument("--uplink-mbit", type=float, default=0.0,
+                        help="эмулируемый исходящий канал заменителей (0 — без ограничения)")
+    parser.add_argument("--processing-ms-per-mb", type=float, default=0.0,
+                        help="«обработка» файла платформой")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="допустимое ухудшение относительно baseline (доля)")
+    parser.add_argument("--min-delta-ms", type=float, default=50.0,
+                        help="разница меньше этой не считается регрессией (шум)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+    workdir = Path(tempfile.mkdtemp(prefix="flowvid-bench-"))
+    os.environ.setdefault("FLOWVID_HEADLESS", "1")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    from mock_platforms import MockPlatforms
+
+    mock = MockPlatforms(args.uplink_mbit, args.processing_ms_per_mb).start()
+    failed = False
+    results = {}
+    try:
+        install_mocks(mock, workdir)
+        for network in args.network or DEFAULT_NETWORKS:
+            missing = missing_requirements(network)
+            if missing:
+                print(f"[SKIP] {network}: не установлено {', '.join(missing)}")
+                continue
+            for size_mb in args.sizes:
+                video = make_video(workdir, size_mb)
+                for concurrency in args.concurrency:
+                    key = f"{network}/{size_mb:g}MB/x{concurrency}"
+                    runs = []
+                    for _ in range(max(1, args.repeat)):
+                        mock.reset()
+                        runs.append(run_scenario(network, video, concurrency))
+                    result = merge_runs(runs)
+                    print_result(key, result)
+                    if result["errors"]:
+                        failed = True
+                        print(f"[FAIL] {key}: ошибок загрузки {len(result['errors'])}")
+                        continue
+                    results[key] = {k: result[k] for k in ("wall", "throughput", "latency", "stages")}
+                    for problem in regressions(key, result, baseline.get(key), args.tolerance,
+                                               args.min_delta_ms / 1000):
+                        failed = True
+                        print(f"[FAIL] регрессия {problem}")
+    finally:
+        mock.stop()
+        from core.journal import Journal
+        Journal.instance().close()
+        if any(n in ("rutube", "vk") for n in args.network or DEFAULT_NETWORKS):
+            from core.selenium_manager import SeleniumManager
+            SeleniumManager.instance().stop_all()
+        # Файл лога лежит в рабочей папке: закрываем его до удаления папки
+        from utils.logger import shutdown_logging
+        shutdown_logging()
+        os.chdir(cwd)
+        if args.keep_workdir:
+            print(f"Рабочая папка: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps({**baseline, **results}, indent=2), encoding="utf-8")
+        print(f"Baseline сохранён: {BASELINE_PATH}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
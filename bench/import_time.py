@@ -0,0 +1,145 @@
+"""
+Бенчмарк времени импорта (аналог `python -X importtime`).
+
+Запускает чистый интерпретатор с `-X importtime` для каждого модуля
+точки входа, разбирает отчёт и проверяет:
+    - суммарное время импорта не превышает бюджет;
+    - тяжёлые SDK платформ (Selenium, Telethon, Google API, pyautogui)
+      и QtMultimedia не подтягиваются при старте;
+    - нет регрессии относительно сохранённого baseline.
+
+Использование:
+    python bench/import_time.py
+    python bench/import_time.py --budget-ms 800 gui core.uploader_manager
+    python bench/import_time.py --save-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "import_time_baseline.json"
+
+# Модули, которые открывают окно/CLI
+DEFAULT_MODULES = ["core.uploader_manager", "config.networks", "utils.logger", "gui"]
+
+# Эти пакеты должны грузиться только при реальном использовании сети
+FORBIDDEN_AT_STARTUP = (
+    "selenium",
+    "telethon",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "pyautogui",
+    "PyQt6.QtMultimedia",
+)
+
+
+def measure(module: str) -> dict:
+    """
+    Импортирует модуль в отдельном процессе и возвращает:
+        {"module", "total_us", "imports": {name: cumulative_us}, "error"}
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+    imports: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue  # строка заголовка
+        imports[parts[2].strip()] = cumulative
+
+    error = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"
+
+    return {
+        "module": module,
+        "total_us": imports.get(module, 0),
+        "imports": imports,
+        "error": error,
+    }
+
+
+def forbidden_loaded(imports: dict[str, int]) -> list[str]:
+    """Возвращает тяжёлые пакеты, попавшие в граф импорта."""
+    return sorted({
+        name for name in imports
+        if any(name == pkg or name.startswith(pkg + ".") for pkg in FORBIDDEN_AT_STARTUP)
+    })
+
+
+def top_imports(imports: dict[str, int], limit: int = 10) -> list[tuple[str, int]]:
+    return sorted(imports.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="FlowVid import-time benchmark")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=500.0,
+                        help="максимальное время импорта одного модуля")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="допустимый рост относительно baseline (доля)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+    failed = False
+    results = {}
+
+    for module in args.modules:
+        res = measure(module)
+        total_ms = res["total_us"] / 1000
+
+        if res["error"]:
+            # Например, PyQt6 не установлен — это не регрессия старта
+            print(f"[SKIP] {module}: {res['error']}")
+            continue
+
+        results[module] = total_ms
+        print(f"[{module}] {total_ms:.1f} ms")
+        for name, us in top_imports(res["imports"], args.top):
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+        heavy = forbidden_loaded(res["imports"])
+        if heavy:
+            failed = True
+            print(f"[FAIL] {module}: тяжёлые SDK при старте: {', '.join(heavy)}")
+
+        if total_ms > args.budget_ms:
+            failed = True
+            print(f"[FAIL] {module}: {total_ms:.1f} ms > бюджет {args.budget_ms:.0f} ms")
+
+        base_ms = baseline.get(module)
+        if base_ms and total_ms > base_ms * (1 + args.tolerance):
+            failed = True
+            print(f"[FAIL] {module}: регрессия {base_ms:.1f} → {total_ms:.1f} ms")
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline сохранён: {BASELINE_PATH}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
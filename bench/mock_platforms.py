@@ -0,0 +1,340 @@
+"""
+Локальные заменители платформ для bench/e2e.py.
+
+MockPlatforms поднимает на 127.0.0.1:
+
+    HTTP-сервер
+        /rutube/...                  — bench/fixtures/rutube_uploader.html
+        /vk/...                      — bench/fixtures/vk_group.html
+        POST /sink                   — приёмник файлов, которые страницы
+                                       отправляют из браузера
+        /upload/youtube/v3/videos    — resumable-загрузка YouTube Data API
+                                       (POST открывает сессию, PUT — чанки
+                                       с Content-Range, ответ 308 / 200)
+        /upload/youtube/v3/thumbnails/set
+    TCP-приёмник частей файла для Telegram — как saveBigFilePart в MTProto:
+        заголовок <file_id:int64><part:int32><size:uint32>, затем size байт,
+        в ответ один байт подтверждения; part = -1 — публикация.
+
+Все приёмники делят эмулируемый исходящий канал (uplink_mbit) и
+добавляют «обработку» на сервере (processing_ms_per_mb).
+
+Загрузчики YouTube и Telegram — подклассы настоящих upload.youtube /
+upload.telegram: меняется только транспорт (googleapiclient смотрит на
+локальный api_endpoint, TelegramClient заменён TelegramClientStub),
+весь остальной код загрузки — рабочий.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import re
+import socketserver
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from core.rate_limit import TokenBucket
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+READ_CHUNK = 64 * 1024
+PART_HEADER = struct.Struct("<qiI")
+
+
+class Uplink:
+    """Общий для всех приёмников канал: bytes_per_second (0 — без ограничения)."""
+
+    def __init__(self, bytes_per_second: float):
+        self.bucket = TokenBucket(bytes_per_second, bytes_per_second * 0.1) if bytes_per_second else None
+        self._lock = threading.Lock()
+
+    def take(self, nbytes: int):
+        if self.bucket is None:
+            return
+        with self._lock:
+            wait = self.bucket.delay(nbytes)
+            self.bucket.take(nbytes)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class MockPlatforms:
+    """HTTP- и TCP-заменители платформ (см. описание модуля)."""
+
+    def __init__(self, uplink_mbit: float = 0.0, processing_ms_per_mb: float = 0.0):
+        self.uplink = Uplink(uplink_mbit * 1_000_000 / 8)
+        self.processing_ms_per_mb = processing_ms_per_mb
+        self.received: dict[str, int] = {}          # сеть -> принято байт
+        self.published: dict[str, int] = {}         # сеть -> публикаций
+        self.sessions: dict[str, dict] = {}         # resumable-сессии YouTube
+        self._lock = threading.Lock()
+        self._http: ThreadingHTTPServer | None = None
+        self._tcp: socketserver.ThreadingTCPServer | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._http.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def telegram_address(self) -> tuple[str, int]:
+        return self._tcp.server_address[:2]
+
+    def start(self) -> "MockPlatforms":
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._http.daemon_threads = True
+        self._tcp = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _part_handler(self))
+        self._tcp.daemon_threads = True
+        for server in (self._http, self._tcp):
+            threading.Thread(target=server.serve_forever, name="bench-mock", daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in (self._http, self._tcp):
+            if server:
+                server.shutdown()
+                server.server_close()
+
+    # ================================================================
+    # Учёт
+    # ================================================================
+    def receive(self, network: str, stream, length: int) -> int:
+        """Читает length байт из stream через эмулируемый канал."""
+        left = length
+        while left > 0:
+            chunk = stream.read(min(READ_CHUNK, left))
+            if not chunk:
+                break
+            self.uplink.take(len(chunk))
+            left -= len(chunk)
+        got = length - left
+        with self._lock:
+            self.received[network] = self.received.get(network, 0) + got
+        return got
+
+    def process(self, nbytes: int):
+        """«Обработка» файла на стороне платформы."""
+        if self.processing_ms_per_mb:
+            time.sleep(self.processing_ms_per_mb * nbytes / 1_000_000 / 1000)
+
+    def publish(self, network: str):
+        with self._lock:
+            self.published[network] = self.published.get(network, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.received.clear()
+            self.published.clear()
+            self.sessions.clear()
+
+
+# ================================================================
+# HTTP
+# ================================================================
+def _handler(mock: MockPlatforms):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code: int, body: bytes = b"", content_type: str = "application/json", headers=None):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, code: int, data: dict, headers=None):
+            self._send(code, json.dumps(data).encode(), headers=headers)
+
+        def _length(self) -> int:
+            return int(self.headers.get("Content-Length") or 0)
+
+        # ------------------------------------------------------------
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path.startswith("/rutube/"):
+                return self._fixture("rutube_uploader.html")
+            if path.startswith("/vk/"):
+                return self._fixture("vk_group.html")
+            self._json(404, {"error": "not found"})
+
+        def _fixture(self, name: str):
+            self._send(200, (FIXTURES / name).read_bytes(), "text/html; charset=utf-8")
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/sink":
+                network = query.get("net", ["browser"])[0]
+                got = mock.receive(network, self.rfile, self._length())
+                mock.process(got)
+                return self._json(200, {"id": uuid.uuid4().hex[:10], "bytes": got})
+            if url.path == "/event":
+                self.rfile.read(self._length())
+                mock.publish(query.get("net", ["-"])[0])
+                return self._json(200, {})
+            if url.path == "/upload/youtube/v3/videos":
+                # Открытие resumable-сессии: метаданные в теле, размер — в заголовке
+                self.rfile.read(self._length())
+                session = uuid.uuid4().hex
+                mock.sessions[session] = {
+                    "total": int(self.headers.get("X-Upload-Content-Length") or 0),
+                    "received": 0,
+                }
+                location = f"{mock.url}/upload/youtube/v3/videos?uploadType=resumable&upload_id={session}"
+                return self._send(200, headers={"Location": location})
+            if url.path == "/upload/youtube/v3/thumbnails/set":
+                mock.receive("youtube", self.rfile, self._length())
+                return self._json(200, {"kind": "youtube#thumbnailSetResponse", "items": []})
+            self._json(404, {"error": "not found"})
+
+        def do_PUT(self):
+            url = urlparse(self.path)
+            session_id = parse_qs(url.query).get("upload_id", [""])[0]
+            session = mock.sessions.get(session_id)
+            if url.path != "/upload/youtube/v3/videos" or session is None:
+                return self._json(404, {"error": "unknown upload session"})
+
+            content_range = self.headers.get("Content-Range", "")
+            match = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+            got = mock.receive("youtube", self.rfile, self._length())
+            if match:
+                session["received"] = int(match.group(2)) + 1
+                if match.group(3) != "*":
+                    session["total"] = int(match.group(3))
+            elif got:
+                session["received"] += got
+            # "bytes */N" без тела — запрос статуса при продолжении загрузки
+
+            if session["total"] and session["received"] >= session["total"]:
+                if not session.get("done"):
+                    session["done"] = True
+                    mock.process(session["total"])
+                    mock.publish("youtube")
+                return self._json(200, {"kind": "youtube#video", "id": session_id[:11]})
+            headers = {"Range": f"bytes=0-{session['received'] - 1}"} if session["received"] else {}
+            self._send(308, headers=headers)
+
+    return Handler
+
+
+# ================================================================
+# TCP-приёмник частей (Telegram)
+# ================================================================
+def _part_handler(mock: MockPlatforms):
+
+    class PartHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            while True:
+                header = self.rfile.read(PART_HEADER.size)
+                if len(header) < PART_HEADER.size:
+                    return
+                file_id, part, size = PART_HEADER.unpack(header)
+                if part < 0:
+                    mock.publish("telegram")
+                else:
+                    mock.receive("telegram", self.rfile, size)
+                self.wfile.write(b"\x01")
+                self.wfile.flush()
+
+    return PartHandler
+
+
+class TelegramClientStub:
+    """
+    Заменяет TelegramClient в upload/telegram.py: upload_file режет файл
+    на части и отправляет их в TCP-приёмник MockPlatforms, вызывая
+    progress_callback как Telethon; send_file — «публикация».
+    Соединение открывается в каждом вызове: загрузчик создаёт новый
+    цикл событий на каждую загрузку (asyncio.run).
+    """
+
+    PART_SIZE = 512 * 1024
+
+    def __init__(self, address: tuple[str, int]):
+        self.address = address
+
+    async def start(self):
+        return self
+
+    async def _roundtrip(self, writer, reader, file_id: int, part: int, payload: bytes = b""):
+        writer.write(PART_HEADER.pack(file_id, part, len(payload)) + payload)
+        await writer.drain()
+        await reader.readexactly(1)
+
+    async def upload_file(self, file, progress_callback=None):
+        path = Path(file)
+        total = path.stat().st_size
+        file_id = int.from_bytes(os.urandom(8), "little", signed=True)
+        reader, writer = await asyncio.open_connection(*self.address)
+        sent = part = 0
+        try:
+            with open(path, "rb") as f:
+                while chunk := f.read(self.PART_SIZE):
+                    await self._roundtrip(writer, reader, file_id, part, chunk)
+                    sent += len(chunk)
+                    part += 1
+                    if progress_callback:
+                        # Как Telethon: асинхронный колбэк дожидаемся
+                        r = progress_callback(sent, total)
+                        if inspect.isawaitable(r):
+                            await r
+        finally:
+            writer.close()
+        return SimpleNamespace(id=file_id, parts=part, name=path.name)
+
+    async def send_file(self, entity, file, caption=None, attributes=None, **kwargs):
+        reader, writer = await asyncio.open_connection(*self.address)
+        try:
+            await self._roundtrip(writer, reader, file.id, -1)
+        finally:
+            writer.close()
+        return SimpleNamespace(id=abs(file.id) % 1_000_000, message=caption)
+
+
+# ================================================================
+# Загрузчики на заменителях
+# ================================================================
+def youtube_uploader(mock: MockPlatforms):
+    """upload.youtube.Uploader, который ходит в MockPlatforms вместо Google."""
+    from upload import youtube
+
+    class Uploader(youtube.Uploader):
+        def _get_authenticated_service(self):
+            from google.auth.credentials import AnonymousCredentials
+            from googleapiclient.discovery import build
+
+            return build(
+                "youtube", "v3",
+                credentials=AnonymousCredentials(),
+                client_options={"api_endpoint": mock.url + "/"},
+                static_discovery=True,
+            )
+
+    return Uploader
+
+
+def telegram_uploader(mock: MockPlatforms):
+    """upload.telegram.Uploader с TelegramClientStub вместо Telethon-клиента."""
+    from upload import telegram
+
+    class Uploader(telegram.Uploader):
+        def __init__(self, config):
+            super().__init__(config)
+            self.client = TelegramClientStub(mock.telegram_address)
+
+    return Uploader
@@ -0,0 +1,70 @@
+"""
+Отчёт о «горячих» командах WebDriver.
+
+Сводку пишет core/driver_profiler.py, когда загрузки идут с
+FLOWVID_PROFILE_WEBDRIVER=1 (в том числе под bench/e2e.py с
+--keep-workdir). Строки — (метод загрузчика, команда, локатор),
+отсортированы по суммарному времени.
+
+Использование:
+    python bench/webdriver_profile.py
+    python bench/webdriver_profile.py --by caller --top 15
+    python bench/webdriver_profile.py --path /tmp/flowvid-bench-xxx/stats/webdriver_profile.json
+    python bench/webdriver_profile.py --reset
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.driver_profiler import CommandStats, load_report  # noqa: E402
+
+
+def group(report: dict, by: str) -> dict[str, CommandStats]:
+    """Сводка по caller, command или полной тройке."""
+    grouped: dict[str, CommandStats] = {}
+    for (caller, command, locator), stats in report.items():
+        name = {"caller": caller, "command": command}.get(by) or f"{caller}  {command}  {locator}"
+        grouped.setdefault(name, CommandStats()).merge(stats.as_dict())
+    return grouped
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="FlowVid WebDriver hot-command report")
+    parser.add_argument("--path", default=str(ROOT / "stats" / "webdriver_profile.json"))
+    parser.add_argument("--by", choices=("line", "caller", "command"), default="line")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--reset", action="store_true", help="удалить накопленную сводку")
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        if os.path.exists(args.path):
+            os.remove(args.path)
+        print(f"Сводка удалена: {args.path}")
+        return 0
+
+    report = load_report(args.path)
+    if not report:
+        print(f"Нет данных: {args.path} (запустите загрузки с FLOWVID_PROFILE_WEBDRIVER=1)")
+        return 1
+
+    grouped = group(report, args.by)
+    total = sum(s.total for s in grouped.values())
+    count = sum(s.count for s in grouped.values())
+    print(f"Команд: {count}, время: {total:.2f} с")
+    print(f"{'всего, с':>9} {'доля':>6} {'раз':>6} {'сред., мс':>10} {'макс., мс':>10} {'ошибок':>7}  строка")
+    for name, s in sorted(grouped.items(), key=lambda kv: kv[1].total, reverse=True)[:args.top]:
+        share = s.total / total * 100 if total else 0.0
+        mean = s.total / s.count * 1000 if s.count else 0.0
+        print(f"{s.total:9.2f} {share:5.1f}% {s.count:6d} {mean:10.1f} {s.max * 1000:10.1f} {s.errors:7d}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,42 @@
 Конфигурация поддерживаемых платформ для загрузки видео.
 
 Содержит:
+- AccountConfig: учётная запись внутри сети
 - NetworkConfig: описание одной сети
 - NETWORKS: список всех сетей с настройками
+- CHROME_SETTINGS: где брать Chrome и chromedriver для Selenium-сетей
 - Константы для YouTube API
 """
 
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+
+
+@dataclass(frozen=True)
+class AccountConfig:
+    """
+    Учётная запись (канал, группа, токен) внутри одной сети.
+
+    Атрибуты:
+        key (str): имя аккаунта, уникальное в пределах сети ("default", "backup").
+        profile_name (str): профиль Chrome для Selenium-сетей (./profiles/chrome/<имя>).
+        settings (dict): переопределения platform_settings сети
+            (group_name, token_path, ...).
+        env_prefix (str): префикс переменных окружения с секретами,
+            например "TG_2_" → TG_2_API_ID / TG_2_API_HASH / TG_2_CHANNEL.
+        weight (float): доля нагрузки при распределении заданий.
+        enabled (bool): участвует ли аккаунт в распределении.
+    """
+    key: str = "default"
+    profile_name: str = "default"
+    settings: dict | None = None
+    env_prefix: str | None = None
+    weight: float = 1.0
+    enabled: bool = True
+
+
+DEFAULT_ACCOUNTS = (AccountConfig(),)
+
 
 @dataclass(frozen=True)
 class NetworkConfig:
@@ -20,12 +49,31 @@ class NetworkConfig:
         title (str): отображаемое имя сети в GUI.
         uses_selenium (bool): нужен ли Selenium для загрузки.
         enabled (bool): можно ли включать/отключать сеть без правки кода.
+        supports_scheduling (bool): платформа сама публикует видео в заданное
+            время — планировщик загружает его заранее (core/scheduler.py).
+        accounts (tuple[AccountConfig]): учётные записи сети; задания
+            распределяются между ними (core/accounts.py).
+        account (AccountConfig | None): аккаунт, к которому привязан этот
+            экземпляр конфигурации (см. for_account); None — аккаунт по умолчанию.
     """
     key: str
     title: str
     uses_selenium: bool
     enabled: bool = True
     platform_settings: dict | None = None
+    supports_scheduling: bool = False
+    accounts: tuple[AccountConfig, ...] = DEFAULT_ACCOUNTS
+    account: AccountConfig | None = None
+
+    @property
+    def profile_name(self) -> str:
+        """Профиль Chrome текущего аккаунта."""
+        return self.account.profile_name if self.account else "default"
+
+    def for_account(self, account: AccountConfig) -> "NetworkConfig":
+        """Конфигурация сети с настройками конкретного аккаунта поверх общих."""
+        settings = {**(self.platform_settings or {}), **(account.settings or {})}
+        return replace(self, platform_settings=settings or None, account=account)
 
 
 # -----------------------------
@@ -46,6 +94,26 @@ YOUTUBE_SETTINGS = {
 
     # Upload
     "chunk_size": 256 * 1024, 
+
+    # Лимиты (core/rate_limit.py): квота YouTube Data API — 10 000 единиц
+    # в сутки на проект, videos.insert стоит 1600, thumbnails.set — 50
+    "rate_limit": {"per_hour": 6, "burst": 2},
+    "daily_quota": 10000,
+    "quota_costs": {"upload": 1600, "thumbnail": 50},
+
+    # Повторы (core/retry.py): 5xx и обрывы продолжают resumable-загрузку
+    "retry": {"attempts": 5, "base_delay": 5, "max_delay": 120},
+
+    # Доля общего канала (core/bandwidth.py): чанкам resumable-загрузки
+    # нужен стабильный канал, иначе запросы падают по таймауту
+    "bandwidth_weight": 2,
+}
+
+TELEGRAM_SETTINGS = {
+    # Лимит на аккаунт; FloodWaitError дополнительно блокирует аккаунт
+    # на запрошенное Telegram время
+    "rate_limit": {"per_hour": 30, "burst": 5},
+    "retry": {"attempts": 4, "base_delay": 5, "max_retry_after": 600},
 }
 
 RUTUBE_SETTINGS = {
@@ -59,15 +127,50 @@ RUTUBE_SETTINGS = {
     "post_publish_delay": 1.0,
     "dialog_open_delay": 1.0,
 
+    # Адаптивные таймауты (история этапов в ./stats, см. core/stage_stats.py)
+    "adaptive_timeouts": True,
+    "processing_timeout_per_mb": 0.5,   # пока нет истории: +0.5 с на каждый МБ
+    "max_stage_timeout": 3600,
+
+    # Лимит загрузок на аккаунт (core/rate_limit.py)
+    "rate_limit": {"per_hour": 12, "burst": 3},
+
+    # Повторы (core/retry.py): «кнопка не найдена» в студии обычно значит,
+    # что страница не успела прогрузиться
+    "retry": {"attempts": 3, "base_delay": 15, "transient": ["RuntimeError"]},
+
     # Категория по умолчанию
     "default_category": "Дизайн",
 
     # Поведение
-    "scroll_into_view": True
+    "scroll_into_view": True,
+
+    # Ввод текста (core/dom_actions.py): по порядку, пока форма не примет
+    # значение; ("keys",) — печатать посимвольно, как раньше.
+    # Первым — cdp: Input.insertText даёт настоящее (isTrusted) событие
+    # ввода, его принимает форма Rutube; native — запасной
+    "text_input": ("cdp", "native", "keys"),
 }
 
 VK_SETTINGS = {
     "group_name": "free_eg",
+    # "group_url": полный адрес группы, если не https://vk.com/<group_name>
+
+    # Таймауты — стартовые значения; при накоплении истории этапов
+    # заменяются перцентилями (см. core/stage_stats.py)
+    "default_wait": 20,
+    "max_auth_time": 180,
+    "publish_timeout": 300,
+    "publish_timeout_per_mb": 0.5,
+    "publish_poll_interval": 2,
+    "adaptive_timeouts": True,
+    "max_stage_timeout": 3600,
+
+    # Антиспам VK: не больше N публикаций в час на аккаунт (core/rate_limit.py)
+    "rate_limit": {"per_hour": 10, "burst": 2},
+
+    # Повторы (core/retry.py): ошибки кнопок VK — временные
+    "retry": {"attempts": 3, "base_delay": 15, "transient": ["RuntimeError"]},
 
     # предпочтительный — CSS
     "btn_add_css": "a[data-role='add-content']",
@@ -75,6 +178,11 @@ VK_SETTINGS = {
     # запасной xpath (на всякий случай)
     "btn_add_xpath": "//a[@data-role='add-content' or .//span[contains(normalize-space(.),'Добавить')]]",
 
+    # Ввод названия и описания (core/dom_actions.py). Поля VKUI —
+    # контролируемые поля React: значение из нативного сеттера может не
+    # попасть в состояние формы, поэтому первым — cdp (настоящий ввод)
+    "text_input": ("cdp", "native", "keys"),
+
     # Поле выбора файла
     "file_input_xpath": "//input[@type='file' and contains(@class,'vkuiVisuallyHidden')]",
 
@@ -88,13 +196,50 @@ VK_SETTINGS = {
 
 
 
+# -----------------------------
+# Chrome для Selenium-сетей (core/chrome_binaries.py)
+# -----------------------------
+# Без закреплённых путей chromedriver ищется один раз (PATH, затем
+# Selenium Manager) и кэшируется в ./cache/chrome.json. На машинах без
+# интернета пропишите пути и запретите загрузку. Переменные окружения
+# FLOWVID_CHROME_BINARY / FLOWVID_CHROMEDRIVER / FLOWVID_CHROME_DOWNLOAD
+# важнее этих значений.
+CHROME_SETTINGS = {
+    "binary": None,             # например "/usr/bin/google-chrome"
+    "driver": None,             # например "/opt/chromedriver/chromedriver"
+    "allow_download": True,
+}
+
+
+# -----------------------------
+# Аккаунты
+# -----------------------------
+# Аккаунт по умолчанию использует прежние секреты и профиль "default".
+# Дополнительные аккаунты добавляются в кортеж, например:
+#
+#   VK_ACCOUNTS = (
+#       AccountConfig(),
+#       AccountConfig(key="second", profile_name="vk_second", settings={"group_name": "other_group"}),
+#   )
+#   TELEGRAM_ACCOUNTS = (AccountConfig(), AccountConfig(key="news", env_prefix="TG_NEWS_"))
+#   YOUTUBE_ACCOUNTS = (AccountConfig(), AccountConfig(key="shorts", settings={"token_path": Path("token_youtube_shorts.pickle")}))
+RUTUBE_ACCOUNTS = DEFAULT_ACCOUNTS
+VK_ACCOUNTS = DEFAULT_ACCOUNTS
+TELEGRAM_ACCOUNTS = DEFAULT_ACCOUNTS
+YOUTUBE_ACCOUNTS = DEFAULT_ACCOUNTS
+
+
 # Список всех сетей, поддерживаемых FlowVid
 NETWORKS = [
-    NetworkConfig(key="rutube",    title="Rutube Reels",    uses_selenium=True,  platform_settings=RUTUBE_SETTINGS),
+    NetworkConfig(key="rutube",    title="Rutube Reels",    uses_selenium=True,  platform_settings=RUTUBE_SETTINGS,
+                  accounts=RUTUBE_ACCOUNTS),
     NetworkConfig(key="pinterest", title="Pinterest Reels", uses_selenium=False),
     NetworkConfig(key="tiktok",    title="TikTok Reels",    uses_selenium=False),
     NetworkConfig(key="instagram", title="Instagram Reels", uses_selenium=False),
-    NetworkConfig(key="vk",        title="VK",              uses_selenium=True,  platform_settings=VK_SETTINGS),
-    NetworkConfig(key="telegram",  title="Telegram",        uses_selenium=True),
-    NetworkConfig(key="youtube",   title="YouTube",         uses_selenium=True,  platform_settings=YOUTUBE_SETTINGS),
+    NetworkConfig(key="vk",        title="VK",              uses_selenium=True,  platform_settings=VK_SETTINGS,
+                  accounts=VK_ACCOUNTS),
+    NetworkConfig(key="telegram",  title="Telegram",        uses_selenium=False, platform_settings=TELEGRAM_SETTINGS,
+                  accounts=TELEGRAM_ACCOUNTS),
+    NetworkConfig(key="youtube",   title="YouTube",         uses_selenium=False, platform_settings=YOUTUBE_SETTINGS,
+                  supports_scheduling=True, accounts=YOUTUBE_ACCOUNTS),
 ]
\ No newline at end of file
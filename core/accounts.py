@@ -0,0 +1,157 @@
+"""
+Распределение заданий между аккаунтами одной сети.
+
+UploaderManager берёт аккаунт через AccountDispatcher.lease(cfg) на время
+загрузки. Выбирается здоровый аккаунт, который раньше других сможет
+начать (лимиты частоты и квоты, core/rate_limit.py), затем — с наименьшей
+нагрузкой (активные загрузки / weight) и дольше всех простаивавший.
+Подряд идущие ошибки отправляют аккаунт «остыть» с экспоненциально
+растущей паузой; первая успешная загрузка сбрасывает счётчик.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from config.networks import AccountConfig, NetworkConfig
+from core import metrics
+from core.rate_limit import RateLimiter
+from utils.logger import log
+
+
+# Пауза после N подряд ошибок: COOLDOWN_BASE * 2^(N-1), не больше COOLDOWN_MAX
+COOLDOWN_BASE = 60.0
+COOLDOWN_MAX = 3600.0
+
+
+@dataclass
+class AccountState:
+    network: str
+    account: str
+    active: int = 0
+    failures: int = 0              # подряд идущие ошибки
+    cooldown_until: float = 0.0
+    last_used: float = 0.0
+    last_error: str | None = None
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+
+class AccountDispatcher:
+    """Singleton. Нагрузка и здоровье аккаунтов всех сетей."""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._states: dict[tuple[str, str], AccountState] = {}
+        self._states_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _state(self, network: str, account: str) -> AccountState:
+        key = (network, account)
+        if key not in self._states:
+            self._states[key] = AccountState(network, account)
+        return self._states[key]
+
+    def states(self, network: str | None = None) -> list[AccountState]:
+        with self._states_lock:
+            return [s for s in self._states.values() if network is None or s.network == network]
+
+    # ================================================================
+    # Выбор аккаунта
+    # ================================================================
+    def choose(self, cfg: NetworkConfig, exclude: set[str] = frozenset(), units: int = 0) -> AccountConfig:
+        """
+        Выбирает аккаунт и отмечает его занятым (парный вызов — release).
+        Если все аккаунты «остывают», берётся тот, чья пауза кончается раньше.
+        units — стоимость загрузки в единицах квоты API.
+        """
+        accounts = [a for a in cfg.accounts if a.enabled and a.key not in exclude]
+        if not accounts:
+            accounts = [a for a in cfg.accounts if a.enabled] or list(cfg.accounts)
+
+        limiter = RateLimiter.instance()
+        delays = {a.key: limiter.delay(cfg.for_account(a), units) for a in accounts} if len(accounts) > 1 else {}
+
+        now = time.time()
+        with self._states_lock:
+            states = {a.key: self._state(cfg.key, a.key) for a in accounts}
+            healthy = [a for a in accounts if states[a.key].healthy(now)]
+            if healthy:
+                account = min(
+                    healthy,
+                    key=lambda a: (
+                        delays.get(a.key, 0.0),
+                        states[a.key].active / max(a.weight, 1e-6),
+                        states[a.key].last_used,
+                    ),
+                )
+            else:
+                account = min(accounts, key=lambda a: states[a.key].cooldown_until)
+                log(f"[{cfg.key}] Все аккаунты на паузе после ошибок, берём {account.key}", level="warning")
+
+            state = states[account.key]
+            state.active += 1
+            state.last_used = now
+            metrics.ACCOUNT_ACTIVE.set(state.active, network=cfg.key, account=account.key)
+            metrics.ACCOUNT_HEALTHY.set(1 if state.healthy(now) else 0, network=cfg.key, account=account.key)
+        return account
+
+    def release(self, network: str, account: str, ok: bool | None, error: str | None = None):
+        """
+        ok=True — успех, ok=False — ошибка (учитывается в здоровье),
+        ok=None — загрузка не состоялась по нашей причине (отмена).
+        """
+        with self._states_lock:
+            state = self._state(network, account)
+            state.active = max(0, state.active - 1)
+            metrics.ACCOUNT_ACTIVE.set(state.active, network=network, account=account)
+            if ok:
+                state.failures = 0
+                state.cooldown_until = 0.0
+                state.last_error = None
+            elif ok is False:
+                state.failures += 1
+                state.last_error = error
+                pause = min(COOLDOWN_BASE * 2 ** (state.failures - 1), COOLDOWN_MAX)
+                state.cooldown_until = time.time() + pause
+                log(
+                    f"[{network}] Аккаунт {account}: ошибок подряд {state.failures}, "
+                    f"пауза {pause:.0f} с",
+                    level="warning",
+                )
+            metrics.ACCOUNT_HEALTHY.set(1 if state.healthy(time.time()) else 0, network=network, account=account)
+
+    @contextmanager
+    def lease(self, cfg: NetworkConfig, units: int = 0):
+        """
+        Выдаёт NetworkConfig, привязанный к выбранному аккаунту.
+        Исход фиксируется через lease.ok / lease.error внутри блока.
+        """
+        account = self.choose(cfg, units=units)
+        lease = AccountLease(cfg.for_account(account))
+        try:
+            yield lease
+        finally:
+            self.release(cfg.key, account.key, lease.ok, lease.error)
+
+
+class AccountLease:
+    """Аккаунт, выданный на одну загрузку, и её исход."""
+
+    def __init__(self, cfg: NetworkConfig):
+        self.cfg = cfg
+        self.ok: bool | None = None
+        self.error: str | None = None
+
+    @property
+    def account(self) -> AccountConfig:
+        return self.cfg.account
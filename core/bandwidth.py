@@ -0,0 +1,226 @@
+"""
+Общая полоса исходящего канала для параллельных загрузок.
+
+Без координации параллельные загрузки делят канал как придётся: передача
+в Telegram может забрать его целиком, и чанки resumable-загрузки YouTube
+начинают падать по таймауту. BandwidthManager делит общий лимит
+(FLOWVID_BANDWIDTH_MBIT, мегабит/с; не задан или 0 — без ограничения)
+между активными передачами:
+
+    1. загрузкам со сроком (deadline — время публикации из планировщика)
+       сначала выделяется скорость, нужная, чтобы успеть: остаток байт /
+       оставшееся время, в порядке ближайшего срока, но не больше
+       DEADLINE_SHARE лимита;
+    2. остаток делится пропорционально весам: platform_settings
+       "bandwidth_weight" сети × вес задания (UploaderManager.upload).
+
+UploaderManager открывает поток (flow) на время загрузки сети и делает
+его текущим для потока выполнения, как ProgressReporter. Загрузчики,
+которые сами передают байты (чанки YouTube, части Telegram, любые
+HTTP-загрузчики), вызывают throttle(n) — и ждут столько, чтобы средняя
+скорость не превышала их долю. Браузерные загрузки (Selenium) притормозить
+нельзя, но на время этапа file_transfer они тоже считаются активными:
+их доля не раздаётся остальным.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from config.networks import NetworkConfig
+from core import metrics
+from core.cancellation import CancelToken
+from core.timing import Span, StageRecord, add_listener, add_start_listener
+
+
+# Какую часть лимита можно отдать загрузкам со сроком — остальным не ноль
+DEADLINE_SHARE = 0.8
+# Поток без этапа file_transfer активен, пока передаёт байты чаще этого
+ACTIVE_WINDOW = 2.0
+# Срок ближе этого считается «сейчас» — нужная скорость не уходит в бесконечность
+MIN_HORIZON = 30.0
+
+
+def cap_from_env() -> float:
+    """Лимит из FLOWVID_BANDWIDTH_MBIT в байтах/с (0 — без ограничения)."""
+    try:
+        mbit = float(os.getenv("FLOWVID_BANDWIDTH_MBIT", "0") or 0)
+    except ValueError:
+        return 0.0
+    return max(mbit, 0.0) * 1_000_000 / 8
+
+
+@dataclass(eq=False)
+class Flow:
+    """Передача одной сети в одном задании."""
+    network: str
+    weight: float = 1.0
+    total: int | None = None            # байт всего (None — неизвестно)
+    deadline: float | None = None       # unix-время, к которому нужно успеть
+    sent: int = 0
+    rate: float = 0.0                   # выделенная скорость, байт/с
+    transferring: bool = False          # идёт этап file_transfer
+    last_consume: float = 0.0
+    next_at: float = field(default=0.0, repr=False)
+
+    @property
+    def remaining(self) -> int | None:
+        return None if self.total is None else max(self.total - self.sent, 0)
+
+    def active(self, now: float) -> bool:
+        return self.transferring or now - self.last_consume < ACTIVE_WINDOW
+
+
+class BandwidthManager:
+    """Singleton. Доли общего лимита между активными передачами."""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, cap: float | None = None):
+        self.cap = cap_from_env() if cap is None else cap
+        self._flows: set[Flow] = set()
+        self._flows_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def set_cap(self, bytes_per_second: float):
+        """Меняет лимит на ходу; 0 — без ограничения."""
+        with self._flows_lock:
+            self.cap = max(bytes_per_second, 0.0)
+
+    def flows(self) -> list[Flow]:
+        with self._flows_lock:
+            return list(self._flows)
+
+    # ================================================================
+    # Потоки
+    # ================================================================
+    @contextmanager
+    def flow(self, cfg: NetworkConfig, total: int | None = None,
+             deadline: float | None = None, weight: float = 1.0):
+        """Регистрирует передачу сети и делает её текущей для потока."""
+        settings = cfg.platform_settings or {}
+        f = Flow(cfg.key, max(weight * float(settings.get("bandwidth_weight", 1.0)), 1e-6), total, deadline)
+        with self._flows_lock:
+            self._flows.add(f)
+        previous = current()
+        _local.flow = f
+        try:
+            yield f
+        finally:
+            _local.flow = previous
+            with self._flows_lock:
+                self._flows.discard(f)
+            metrics.BANDWIDTH_RATE.set(0, network=f.network)
+
+    # ================================================================
+    # Распределение
+    # ================================================================
+    def _allocate(self, now: float) -> dict[Flow, float]:
+        """Скорости активных потоков (вызывается под _flows_lock)."""
+        active = [f for f in self._flows if f.active(now)]
+        rates = {f: 0.0 for f in active}
+        if not active:
+            return rates
+
+        # 1. Сроки: ближайший — первым, пока не кончилась доля DEADLINE_SHARE
+        left = self.cap * DEADLINE_SHARE
+        wall = time.time()
+        for f in sorted((f for f in active if f.deadline and f.remaining), key=lambda f: f.deadline):
+            need = f.remaining / max(f.deadline - wall, MIN_HORIZON)
+            give = min(need, left)
+            rates[f] += give
+            left -= give
+            if left <= 0:
+                break
+
+        # 2. Остаток — по весам
+        rest = self.cap - sum(rates.values())
+        total_weight = sum(f.weight for f in active)
+        for f in active:
+            rates[f] += rest * f.weight / total_weight
+        return rates
+
+    def consume(self, f: Flow, nbytes: int, cancel: CancelToken | None = None):
+        """
+        Поток передал (или собирается передать) nbytes: ждём, пока
+        средняя скорость потока не войдёт в его долю.
+        """
+        wait = self.reserve(f, nbytes)
+        if wait > 0:
+            if cancel is not None:
+                cancel.sleep(wait)
+            else:
+                time.sleep(wait)
+
+    def reserve(self, f: Flow, nbytes: int) -> float:
+        """Учитывает nbytes и возвращает, сколько секунд потоку подождать (сам не ждёт)."""
+        if not self.cap or nbytes <= 0:
+            return 0.0
+        with self._flows_lock:
+            now = time.monotonic()
+            f.last_consume = now
+            f.sent += nbytes
+            f.rate = self._allocate(now).get(f) or self.cap
+            # Простой не копит кредит: после паузы поток не уходит в залп
+            f.next_at = max(f.next_at, now) + nbytes / f.rate
+            wait = f.next_at - now
+        metrics.BANDWIDTH_RATE.set(f.rate, network=f.network)
+        if wait <= 0:
+            return 0.0
+        metrics.BANDWIDTH_WAIT.inc(wait, network=f.network)
+        return wait
+
+
+_local = threading.local()
+
+
+def current() -> Flow | None:
+    return getattr(_local, "flow", None)
+
+
+def throttle(nbytes: int, cancel: CancelToken | None = None):
+    """Учитывает nbytes текущей передачи (если она зарегистрирована)."""
+    f = current()
+    if f is not None:
+        BandwidthManager.instance().consume(f, nbytes, cancel)
+
+
+async def throttle_async(nbytes: int):
+    """
+    throttle для кода на asyncio (прогресс Telethon): пауза — await,
+    цикл событий в это время обслуживает соединение, а отмена задачи
+    прерывает её сразу.
+    """
+    f = current()
+    if f is not None:
+        wait = BandwidthManager.instance().reserve(f, nbytes)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# ================================================================
+# Этап file_transfer: поток активен, даже если не вызывает throttle
+# ================================================================
+def _on_stage_start(span: Span):
+    f = current()
+    if f is not None and span.stage == "file_transfer" and span.network == f.network:
+        f.transferring = True
+
+
+def _on_stage_end(record: StageRecord):
+    f = current()
+    if f is not None and record.stage == "file_transfer" and record.network == f.network:
+        f.transferring = False
+
+
+add_start_listener(_on_stage_start)
+add_listener(_on_stage_end)
@@ -0,0 +1,78 @@
+import threading
+from typing import Callable
+
+from utils.logger import log
+
+
+class CancelledError(BaseException):
+    """
+    Загрузка отменена пользователем.
+
+    Наследуется от BaseException (как asyncio.CancelledError), чтобы
+    многочисленные `except Exception` в загрузчиках не проглатывали отмену.
+    """
+
+
+class CancelToken:
+    """
+    Токен отмены, который передаётся из GUI через UploaderManager
+    в каждый загрузчик и каждый цикл ожидания.
+
+    - cancel() помечает токен отменённым и запускает колбэки on_cancel
+      в отдельном потоке (закрыть вкладку, оборвать передачу), чтобы
+      вызывающий поток (GUI) не ждал их завершения;
+    - raise_if_cancelled() / sleep() — точки выхода для циклов ожидания.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        log("Получен запрос на отмену загрузки", level="warning")
+        if callbacks:
+            threading.Thread(target=self._run, args=(callbacks,), name="cancel-callbacks", daemon=True).start()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Регистрирует колбэк отмены. Если токен уже отменён — вызывает сразу.
+        Возвращает функцию, снимающую регистрацию (вызывать по завершении этапа).
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        self._run([callback])
+        return lambda: None
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CancelledError("Загрузка отменена")
+
+    def sleep(self, seconds: float):
+        """time.sleep, который прерывается отменой."""
+        if self._event.wait(seconds):
+            raise CancelledError("Загрузка отменена")
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @staticmethod
+    def _run(callbacks):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log(f"Ошибка при отмене: {e}", level="warning")
@@ -0,0 +1,102 @@
+"""
+Контрольные точки загрузки на одну сеть.
+
+Загрузчик отмечает пройденные этапы (файл передан, метаданные заполнены,
+ссылка получена) и сохраняет то, что нужно для продолжения: ссылку на
+редактор, id видео, вкладку браузера. При повторной попытке
+(core/retry.py) он начинает с первого непройденного этапа — большой файл
+не передаётся заново из-за таймаута на кнопке «Опубликовать».
+
+Ключи data, начинающиеся с "_", живут только в памяти процесса
+(объекты API, дескрипторы вкладок) — после перезапуска они недоступны.
+Остальное UploaderManager записывает в журнал (core/journal.py) при
+каждом изменении точки — через on_change.
+"""
+
+import threading
+from typing import Any, Callable
+
+
+class Checkpoint:
+    """Пройденные этапы и данные для продолжения загрузки."""
+
+    def __init__(
+        self,
+        network: str,
+        stages: list[str] | None = None,
+        data: dict | None = None,
+        on_change: Callable[["Checkpoint"], None] | None = None,
+    ):
+        self.network = network
+        self.stages: list[str] = list(stages or [])
+        self.data: dict[str, Any] = dict(data or {})
+        self.on_change = on_change
+        self._lock = threading.Lock()
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change(self)
+
+    @property
+    def last(self) -> str | None:
+        """Последний пройденный этап."""
+        return self.stages[-1] if self.stages else None
+
+    @property
+    def started(self) -> bool:
+        return bool(self.stages)
+
+    def done(self, stage: str) -> bool:
+        return stage in self.stages
+
+    def mark(self, stage: str, **data):
+        """Этап пройден; data — всё, что понадобится для продолжения."""
+        with self._lock:
+            if stage not in self.stages:
+                self.stages.append(stage)
+            self.data.update(data)
+        self._changed()
+
+    def get(self, key: str, default=None):
+        return self.data.get(key, default)
+
+    def set(self, **data):
+        """
+        Данные без новой отметки этапа. Изменение сохраняемых ключей (без
+        "_") сразу уходит в журнал, повторная запись того же значения — нет.
+        """
+        with self._lock:
+            changed = any(not k.startswith("_") and self.data.get(k) != v for k, v in data.items())
+            self.data.update(data)
+        if changed:
+            self._changed()
+
+    def rewind(self, stage: str):
+        """Оставляет этапы до stage включительно — остальные пройдём заново."""
+        with self._lock:
+            if stage in self.stages:
+                del self.stages[self.stages.index(stage) + 1:]
+        self._changed()
+
+    def reset(self):
+        """Продолжить нельзя (вкладка закрыта, сессия истекла) — начинаем сначала."""
+        with self._lock:
+            self.stages.clear()
+            self.data.clear()
+        self._changed()
+
+    def as_dict(self) -> dict:
+        """Сохраняемая часть: этапы и данные без ключей "_"."""
+        with self._lock:
+            return {
+                "network": self.network,
+                "stages": list(self.stages),
+                "data": {k: v for k, v in self.data.items() if not k.startswith("_")},
+            }
+
+    @classmethod
+    def from_dict(cls, raw: dict, on_change: Callable[["Checkpoint"], None] | None = None) -> "Checkpoint":
+        return cls(raw.get("network", ""), raw.get("stages"), raw.get("data"), on_change)
+
+    def __repr__(self) -> str:
+        return f"Checkpoint({self.network}, {self.stages})"
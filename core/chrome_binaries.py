@@ -0,0 +1,266 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, asdict
+
+from config.networks import CHROME_SETTINGS
+from utils.logger import log
+from utils.paths import cache_dir
+
+
+_VERSION = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+
+# Где Chrome обычно лежит, если его нет в PATH
+_BROWSER_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+_BROWSER_PATHS = {
+    "win32": (
+        r"%PROGRAMFILES%\Google\Chrome\Application\chrome.exe",
+        r"%PROGRAMFILES(X86)%\Google\Chrome\Application\chrome.exe",
+        r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe",
+    ),
+    "darwin": (
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/Applications/Chromium.app/Contents/MacOS/Chromium",
+    ),
+}
+
+
+@dataclass
+class ChromeBinaries:
+    """Найденные Chrome и chromedriver."""
+    browser: str | None
+    driver: str
+    browser_version: str | None = None
+    driver_version: str | None = None
+    browser_mtime: float = 0.0
+    driver_mtime: float = 0.0
+    source: str = ""            # pinned / found / selenium-manager
+
+    @property
+    def compatible(self) -> bool:
+        """chromedriver подходит Chrome той же major-версии; неизвестная версия не проверяется."""
+        if not self.browser_version or not self.driver_version:
+            return True
+        return _major(self.browser_version) == _major(self.driver_version)
+
+    def fresh(self) -> bool:
+        """Файлы на месте и не менялись (Chrome не обновился) с момента проверки."""
+        return _mtime(self.driver) == self.driver_mtime and (
+            not self.browser or _mtime(self.browser) == self.browser_mtime
+        )
+
+
+class ChromeResolver:
+    """
+    Singleton. Пути к Chrome и chromedriver без Selenium Manager на каждом запуске.
+
+    Порядок:
+        1. закреплённые пути (FLOWVID_CHROME_BINARY / FLOWVID_CHROMEDRIVER
+           или CHROME_SETTINGS в config/networks.py);
+        2. кэш ./cache/chrome.json — если файлы не менялись, версии
+           заново не проверяются (ни одного подпроцесса);
+        3. поиск в PATH и стандартных папках установки;
+        4. Selenium Manager (может скачать драйвер) — один раз, результат
+           попадает в кэш; FLOWVID_CHROME_DOWNLOAD=0 запрещает этот шаг.
+
+    Версии сверяются по major: если найденный chromedriver не подходит
+    Chrome, берётся следующий источник. Закреплённые пути не заменяются —
+    о несовпадении только предупреждение.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, root: str | None = None):
+        self.path = os.path.join(root or cache_dir(), "chrome.json")
+        # Настройки читаются здесь, а не при импорте — уже после load_dotenv.
+        # Пути, закреплённые явно: переменные окружения важнее config/networks.py
+        self.pinned_browser = os.getenv("FLOWVID_CHROME_BINARY") or CHROME_SETTINGS.get("binary")
+        self.pinned_driver = os.getenv("FLOWVID_CHROMEDRIVER") or CHROME_SETTINGS.get("driver")
+        # 0 — никогда не обращаться к Selenium Manager (он может скачивать драйвер)
+        default = "1" if CHROME_SETTINGS.get("allow_download", True) else "0"
+        self.allow_download = os.getenv("FLOWVID_CHROME_DOWNLOAD", default) != "0"
+        self._resolved: ChromeBinaries | None = None
+        self._resolve_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Публичный API
+    # ================================================================
+    def resolve(self) -> ChromeBinaries:
+        with self._resolve_lock:
+            if self._resolved is None or not self._resolved.fresh():
+                self._resolved = self._resolve()
+            return self._resolved
+
+    def service(self):
+        """
+        chromedriver Service для webdriver.Chrome с уже известным путём —
+        Selenium Manager при этом не запускается. Объект новый на каждый
+        запуск: Service владеет процессом и портом одного драйвера.
+        """
+        from selenium.webdriver.chrome.service import Service
+
+        return Service(executable_path=self.resolve().driver)
+
+    def apply(self, options):
+        """Прописывает найденный Chrome в Options."""
+        binaries = self.resolve()
+        if binaries.browser and not options.binary_location:
+            options.binary_location = binaries.browser
+        return options
+
+    def invalidate(self):
+        """Забывает найденные пути (например, драйвер не запустился)."""
+        with self._resolve_lock:
+            self._resolved = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    # ================================================================
+    # Поиск
+    # ================================================================
+    def _resolve(self) -> ChromeBinaries:
+        pinned_browser, pinned_driver = self.pinned_browser, self.pinned_driver
+        if pinned_driver:
+            binaries = self._inspect(pinned_driver, pinned_browser or _find_browser(), "pinned")
+            if not binaries.compatible:
+                log(
+                    f"chromedriver {binaries.driver_version} не подходит Chrome {binaries.browser_version} "
+                    f"(закреплено: {pinned_driver})", level="warning",
+                )
+            return binaries
+
+        cached = self._load()
+        if cached and cached.fresh() and (not pinned_browser or cached.browser == pinned_browser):
+            return cached
+
+        browser = pinned_browser or _find_browser()
+        driver = shutil.which("chromedriver")
+        if driver:
+            binaries = self._inspect(driver, browser, "found")
+            if binaries.compatible:
+                return self._save(binaries)
+            log(
+                f"chromedriver {binaries.driver_version} из PATH не подходит Chrome "
+                f"{binaries.browser_version}", level="warning",
+            )
+
+        if not self.allow_download:
+            raise RuntimeError(
+                "Не найден подходящий chromedriver, а загрузка запрещена (FLOWVID_CHROME_DOWNLOAD=0). "
+                "Укажите путь в FLOWVID_CHROMEDRIVER."
+            )
+        driver, browser = _selenium_manager(browser)
+        return self._save(self._inspect(driver, browser, "selenium-manager"))
+
+    def _inspect(self, driver: str, browser: str | None, source: str) -> ChromeBinaries:
+        if not os.path.isfile(driver):
+            raise FileNotFoundError(f"chromedriver не найден: {driver}")
+        binaries = ChromeBinaries(
+            browser=browser,
+            driver=driver,
+            browser_version=_browser_version(browser) if browser else None,
+            driver_version=_version([driver, "--version"]),
+            browser_mtime=_mtime(browser) if browser else 0.0,
+            driver_mtime=_mtime(driver),
+            source=source,
+        )
+        log(
+            f"Chrome {binaries.browser_version or '?'} ({browser or 'по умолчанию'}), "
+            f"chromedriver {binaries.driver_version or '?'} ({driver}) — {source}"
+        )
+        return binaries
+
+    # ================================================================
+    # Кэш
+    # ================================================================
+    def _load(self) -> ChromeBinaries | None:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return ChromeBinaries(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            log(f"Кэш путей Chrome повреждён, ищем заново: {e}", level="warning")
+            return None
+
+    def _save(self, binaries: ChromeBinaries) -> ChromeBinaries:
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(asdict(binaries), f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log(f"Не удалось сохранить кэш путей Chrome: {e}", level="warning")
+        return binaries
+
+
+# ================================================================
+# Вспомогательные функции
+# ================================================================
+def _find_browser() -> str | None:
+    for name in _BROWSER_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    for candidate in _BROWSER_PATHS.get(sys.platform, ()):
+        path = os.path.expandvars(candidate)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _selenium_manager(browser: str | None) -> tuple[str, str | None]:
+    """Selenium Manager: путь к драйверу (при необходимости скачивает) и к Chrome."""
+    from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+    args = ["--browser", "chrome"]
+    if browser:
+        args += ["--browser-path", browser]
+    log("Поиск chromedriver через Selenium Manager…")
+    try:
+        paths = SeleniumManager().binary_paths(args)
+    except Exception as e:
+        raise RuntimeError(f"Selenium Manager не нашёл chromedriver: {e}") from e
+    return paths["driver_path"], paths.get("browser_path") or browser
+
+
+def _version(cmd: list[str]) -> str | None:
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, timeout=15).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION.search(out)
+    return match.group(0) if match else None
+
+
+def _browser_version(browser: str) -> str | None:
+    # chrome.exe --version ничего не печатает: версия — имя папки рядом с ним
+    if sys.platform == "win32":
+        root = os.path.dirname(browser)
+        versions = [d for d in os.listdir(root) if _VERSION.fullmatch(d)] if os.path.isdir(root) else []
+        return max(versions, key=lambda v: tuple(map(int, v.split(".")))) if versions else None
+    return _version([browser, "--version"])
+
+
+def _major(version: str) -> int:
+    return int(version.split(".", 1)[0])
+
+
+def _mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return -1.0
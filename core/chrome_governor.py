@@ -0,0 +1,308 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from core import metrics
+from utils.logger import log
+
+
+# Сколько ждать выхода процессов после quit(), прежде чем убивать, с
+QUIT_GRACE = 3.0
+
+Pid = tuple[int, float]     # (pid, время старта) — защита от переиспользования pid
+
+
+@dataclass
+class TreeSample:
+    """Замер дерева процессов драйвера."""
+    pids: list[Pid] = field(default_factory=list)
+    rss: int = 0
+
+
+@dataclass
+class _Tracked:
+    root: int
+    uploads: int = 0
+    last: TreeSample | None = None
+
+
+class ChromeGovernor:
+    """
+    Singleton. Следит за памятью Chrome, который SeleniumManager держит
+    между загрузками, и перезапускает его, пока SPA VK и Rutube не
+    раздули процесс до OOM.
+
+    - Замер — суммарный RSS дерева процессов от chromedriver вниз
+      (psutil, если установлен; на Linux без него — /proc).
+    - Перезапуск — при выдаче драйвера следующей загрузке
+      (SeleniumManager.start), если дерево больше FLOWVID_CHROME_MAX_RSS_MB
+      или драйвер обслужил FLOWVID_CHROME_MAX_UPLOADS загрузок. Посреди
+      загрузки браузер не трогается.
+    - После quit() процессы дерева, которые остались живы (quit упал или
+      Chrome завис), убиваются по pid.
+    - Метрики: flowvid_chrome_rss_bytes, flowvid_chrome_processes,
+      flowvid_chrome_recycles_total, flowvid_chrome_orphans_killed_total.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, max_rss_mb: float | None = None, max_uploads: int | None = None,
+                 interval: float | None = None):
+        # Настройки читаются здесь, а не при импорте — уже после load_dotenv.
+        # Порог памяти дерева процессов одного Chrome (chromedriver + браузер +
+        # рендереры), МБ; 0 — не ограничивать
+        if max_rss_mb is None:
+            max_rss_mb = float(os.getenv("FLOWVID_CHROME_MAX_RSS_MB", "2048"))
+        # Перезапуск после N загрузок на одном драйвере; 0 — не ограничивать
+        if max_uploads is None:
+            max_uploads = int(os.getenv("FLOWVID_CHROME_MAX_UPLOADS", "25"))
+        # Период фонового замера памяти (только метрики и предупреждения), с
+        if interval is None:
+            interval = float(os.getenv("FLOWVID_CHROME_SAMPLE_INTERVAL", "30"))
+        self.max_rss = int(max_rss_mb * 1024 * 1024)
+        self.max_uploads = max_uploads
+        self.interval = interval
+        self._tracked: dict[str, _Tracked] = {}
+        self._data_lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Жизненный цикл драйвера
+    # ================================================================
+    def launched(self, profile_name: str, driver):
+        """Драйвер запущен: начинаем следить за его деревом процессов."""
+        root = _root_pid(driver)
+        if root is None:
+            return
+        with self._data_lock:
+            self._tracked[profile_name] = _Tracked(root=root)
+        self._sample(profile_name)
+        self._start_sampler()
+
+    def recycle_reason(self, profile_name: str) -> str | None:
+        """
+        Вызывается перед повторной выдачей драйвера. Причина перезапуска
+        или None. Загрузки считает finished — по завершённым заданиям,
+        а не по выдачам: повторные попытки одной загрузки не в счёт.
+        """
+        with self._data_lock:
+            tracked = self._tracked.get(profile_name)
+        if tracked is None:
+            return None
+        if self.max_uploads and tracked.uploads >= self.max_uploads:
+            return "uploads"
+        sample = self._sample(profile_name)
+        if self.max_rss and sample and sample.rss > self.max_rss:
+            return "memory"
+        return None
+
+    def finished(self, profile_name: str):
+        """Загрузка на сеть завершена (со всеми повторами) — засчитываем её драйверу."""
+        with self._data_lock:
+            tracked = self._tracked.get(profile_name)
+            if tracked is not None:
+                tracked.uploads += 1
+
+    def recycled(self, profile_name: str, reason: str):
+        with self._data_lock:
+            tracked = self._tracked.get(profile_name)
+        rss = tracked.last.rss if tracked and tracked.last else 0
+        uploads = tracked.uploads if tracked else 0
+        log(
+            f"Перезапуск Chrome профиля {profile_name}: "
+            + (f"память {rss / 1024 / 1024:.0f} МБ" if reason == "memory" else f"{uploads} загрузок")
+        )
+        metrics.CHROME_RECYCLES.inc(profile=profile_name, reason=reason)
+
+    def snapshot(self, profile_name: str, driver) -> list[Pid]:
+        """Процессы драйвера перед quit() — чтобы потом добить оставшиеся."""
+        root = _root_pid(driver)
+        if root is None:
+            with self._data_lock:
+                tracked = self._tracked.get(profile_name)
+            root = tracked.root if tracked else None
+        sample = sample_tree(root) if root else None
+        return sample.pids if sample else []
+
+    def forget(self, profile_name: str):
+        """Драйвер закрывается: больше не следим за ним."""
+        with self._data_lock:
+            self._tracked.pop(profile_name, None)
+        metrics.CHROME_RSS.set(0, profile=profile_name)
+        metrics.CHROME_PROCESSES.set(0, profile=profile_name)
+
+    def reap(self, profile_name: str, pids: list[Pid]) -> int:
+        """
+        Убивает процессы из снимка, пережившие quit(). Возвращает их число.
+        Ждёт их выхода до QUIT_GRACE секунд — вызывать без блокировок
+        SeleniumManager.
+        """
+        # Нормально закрытый Chrome выходит не мгновенно — даём ему секунды
+        deadline = time.monotonic() + QUIT_GRACE
+        alive = [pid for pid, started in pids if _alive(pid, started)]
+        while alive and time.monotonic() < deadline:
+            time.sleep(0.1)
+            alive = [pid for pid, started in pids if pid in alive and _alive(pid, started)]
+        if not alive:
+            return 0
+        log(f"После закрытия Chrome профиля {profile_name} остались процессы {alive} — завершаем", level="warning")
+        killed = sum(1 for pid in alive if _kill(pid))
+        metrics.CHROME_ORPHANS_KILLED.inc(killed, profile=profile_name)
+        return killed
+
+    # ================================================================
+    # Замеры
+    # ================================================================
+    def _sample(self, profile_name: str) -> TreeSample | None:
+        with self._data_lock:
+            tracked = self._tracked.get(profile_name)
+        if tracked is None:
+            return None
+        sample = sample_tree(tracked.root)
+        if sample is None:
+            return None
+        tracked.last = sample
+        metrics.CHROME_RSS.set(sample.rss, profile=profile_name)
+        metrics.CHROME_PROCESSES.set(len(sample.pids), profile=profile_name)
+        return sample
+
+    def _start_sampler(self):
+        with self._data_lock:
+            if self.interval <= 0 or self._sampler is not None:
+                return
+            self._sampler = threading.Thread(target=self._sample_loop, name="chrome-governor", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self):
+        warned: set[str] = set()
+        while True:
+            time.sleep(self.interval)
+            with self._data_lock:
+                names = list(self._tracked)
+            for name in names:
+                sample = self._sample(name)
+                over = bool(self.max_rss and sample and sample.rss > self.max_rss)
+                if over and name not in warned:
+                    log(
+                        f"Chrome профиля {name} занимает {sample.rss / 1024 / 1024:.0f} МБ — "
+                        f"перезапустится перед следующей загрузкой", level="warning",
+                    )
+                    warned.add(name)
+                elif not over:
+                    warned.discard(name)
+
+
+# ================================================================
+# Дерево процессов
+# ================================================================
+def _root_pid(driver) -> int | None:
+    """pid chromedriver: Chrome и его рендереры — его потомки."""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _psutil():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil
+
+
+def sample_tree(root: int) -> TreeSample | None:
+    """RSS и pid всего дерева от root; None — замер на этой платформе недоступен."""
+    psutil = _psutil()
+    if psutil is not None:
+        try:
+            parent = psutil.Process(root)
+            procs = [parent] + parent.children(recursive=True)
+        except psutil.Error:
+            return TreeSample()
+        sample = TreeSample()
+        for proc in procs:
+            try:
+                sample.rss += proc.memory_info().rss
+                sample.pids.append((proc.pid, proc.create_time()))
+            except psutil.Error:
+                continue
+        return sample
+
+    table = _proc_table()
+    if table is None:
+        return None
+    children: dict[int, list[int]] = {}
+    for pid, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(pid)
+    sample = TreeSample()
+    stack = [root] if root in table else []
+    while stack:
+        pid = stack.pop()
+        _, started, rss = table[pid]
+        sample.pids.append((pid, started))
+        sample.rss += rss
+        stack.extend(children.get(pid, ()))
+    return sample
+
+
+def _proc_table() -> dict[int, tuple[int, float, int]] | None:
+    """Linux без psutil: pid -> (ppid, starttime, rss в байтах) живых процессов."""
+    if not sys.platform.startswith("linux"):
+        return None
+    table = {}
+    for entry in os.listdir("/proc"):
+        stat = _proc_stat(int(entry)) if entry.isdigit() else None
+        if stat and stat[0] != "Z":
+            table[int(entry)] = stat[1:]
+    return table
+
+
+def _proc_stat(pid: int) -> tuple[str, int, float, int] | None:
+    """(состояние, ppid, starttime, rss в байтах) из /proc/<pid>/stat."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+    # Имя процесса в скобках может содержать пробелы — поля после последней ')'
+    fields = stat[stat.rfind(")") + 2:].split()
+    return fields[0], int(fields[1]), float(fields[19]), int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _alive(pid: int, started: float) -> bool:
+    psutil = _psutil()
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            return proc.create_time() == started and proc.status() != psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            return False
+    if not sys.platform.startswith("linux"):
+        return False
+    stat = _proc_stat(pid)
+    return stat is not None and stat[0] != "Z" and stat[2] == started
+
+
+def _kill(pid: int) -> bool:
+    psutil = _psutil()
+    try:
+        if psutil is not None:
+            psutil.Process(pid).kill()
+        elif sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/PID", str(pid)], capture_output=True, timeout=10)
+        else:
+            os.kill(pid, signal.SIGKILL)
+        return True
+    except Exception as e:
+        log(f"Не удалось завершить процесс {pid}: {e}", level="warning")
+        return False
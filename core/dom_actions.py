@@ -0,0 +1,330 @@
+"""
+Действия на странице за один вызов execute_script.
+
+Шаг интерфейса — найти элемент, прокрутить к нему, проверить, что он
+видим и доступен, кликнуть или записать значение — выполняется одной
+командой WebDriver вместо 3–6 (find_element, is_displayed, is_enabled,
+scrollIntoView, click…). Вызов возвращает структурированный результат:
+
+    {"found": bool, "ok": bool, "reason": str, "element": WebElement, ...}
+
+reason — почему действие не выполнено: "missing", "hidden", "disabled",
+"obscured" (поверх элемента что-то лежит — тогда делается обычный
+клик Selenium, он прокрутит и кликнет как пользователь).
+
+target — WebElement или локатор Selenium: (By.CSS_SELECTOR, "..."),
+(By.XPATH, "..."), (By.NAME, "..."), (By.ID, "...").
+
+until_* — то же внутри wait.until: каждая итерация опроса — одна
+команда, действие выполняется в той же команде, где элемент найден.
+
+Ввод текста (enter_text, fill_text) — вместо send_keys, который печатает
+по одному синтетическому нажатию: длинное описание с хэштегами — это
+секунды на каждую сеть. Способы, по порядку (TEXT_MODES):
+
+    native — значение через нативный сеттер + события input/change;
+    cdp    — CDP Input.insertText: одно «настоящее» событие ввода для
+             всего текста (только Chromium);
+    keys   — send_keys, как раньше.
+
+Каждый способ проверяется чтением значения обратно — отдельной командой,
+после blur и следующего тика (settled): значение, записанное в тот же
+тик, есть в поле всегда, даже если фреймворк его не принял и откатит
+при перерисовке. Если страница значение не удержала, берётся следующий. Сработавший способ запоминается для
+поля (remember="rutube.title"), и следующие загрузки начинают с него.
+"""
+
+from __future__ import annotations
+
+from utils.logger import log
+
+TEXT_MODES = ("native", "cdp", "keys")
+
+# Пауза перед чтением значения обратно (после blur и текущей задачи), мс
+SETTLE_MS = 50
+
+# remember → способ ввода, который это поле приняло
+_accepted: dict[str, str] = {}
+
+_LIBRARY = r"""
+const FV = {
+  find(target) {
+    if (!Array.isArray(target)) return target;
+    const [by, value] = target;
+    switch (by) {
+      case "css selector": return document.querySelector(value);
+      case "xpath": return document.evaluate(
+        value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+      case "name": return document.getElementsByName(value)[0] || null;
+      case "id": return document.getElementById(value);
+      case "class name": return document.getElementsByClassName(value)[0] || null;
+      case "tag name": return document.getElementsByTagName(value)[0] || null;
+    }
+    throw new Error("dom_actions: неподдерживаемый локатор " + by);
+  },
+
+  visible(el) {
+    const style = getComputedStyle(el);
+    const rect = el.getBoundingClientRect();
+    return style.visibility !== "hidden" && style.display !== "none" && rect.width > 0 && rect.height > 0;
+  },
+
+  // Элемент найден, видим и доступен; прокручен к нему, если нужно
+  prepare(target, opts) {
+    const el = FV.find(target);
+    if (!el) return {found: false, ok: false, reason: "missing"};
+    if (opts.visible !== false && !FV.visible(el)) return {found: true, ok: false, reason: "hidden", element: el};
+    if (el.disabled || el.getAttribute("aria-disabled") === "true")
+      return {found: true, ok: false, reason: "disabled", element: el};
+    if (opts.scroll) el.scrollIntoView({block: opts.block || "center"});
+    return {found: true, ok: true, reason: "", element: el};
+  },
+
+  // Ничего не лежит поверх центра элемента
+  hittable(el) {
+    const rect = el.getBoundingClientRect();
+    const hit = document.elementFromPoint(rect.left + rect.width / 2, rect.top + rect.height / 2);
+    return !hit || hit === el || el.contains(hit);
+  },
+
+  press(el) {
+    const rect = el.getBoundingClientRect();
+    const init = {bubbles: true, cancelable: true, view: window,
+                  clientX: rect.left + rect.width / 2, clientY: rect.top + rect.height / 2};
+    el.dispatchEvent(new PointerEvent("pointerdown", init));
+    el.dispatchEvent(new MouseEvent("mousedown", init));
+    if (el.focus) el.focus();
+    el.dispatchEvent(new PointerEvent("pointerup", init));
+    el.dispatchEvent(new MouseEvent("mouseup", init));
+    el.click();
+  },
+
+  click(target, opts) {
+    const res = FV.prepare(target, opts);
+    if (!res.ok) return res;
+    if (opts.native) return res;
+    if (!FV.hittable(res.element)) return Object.assign(res, {ok: false, reason: "obscured"});
+    FV.press(res.element);
+    return res;
+  },
+
+  // Значение через нативный сеттер: фреймворки (React, Vue) видят его как ввод
+  fill(target, text, opts) {
+    const res = FV.prepare(target, opts);
+    if (!res.ok) return res;
+    const el = res.element;
+    if (el.focus) el.focus();
+    if (el.isContentEditable) {
+      el.textContent = text;
+    } else {
+      const setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), "value").set;
+      setter.call(el, text);
+    }
+    for (const name of opts.events || ["input", "change"])
+      el.dispatchEvent(new Event(name, {bubbles: true}));
+    // Принято ли значение, видно только позже — см. settle
+    return res;
+  },
+
+  // Фокус и выделение всего текста: Input.insertText заменит выделенное
+  select(el) {
+    el.focus();
+    if (el.isContentEditable) {
+      const range = document.createRange();
+      range.selectNodeContents(el);
+      const selection = window.getSelection();
+      selection.removeAllRanges();
+      selection.addRange(range);
+    } else {
+      el.select();
+    }
+    return {found: true, ok: true, reason: "", element: el};
+  },
+
+  // Значение после blur и следующих задач цикла событий: к этому времени
+  // фреймворк перерисовал поле, и значение, которое он не принял в своё
+  // состояние (контролируемые поля React, проверка isTrusted), уже откатилось.
+  // Таймеры, а не requestAnimationFrame: фоновые вкладки кадров не рисуют
+  settle(el, delay, done) {
+    if (el === document.activeElement && el.blur) el.blur();
+    const read = () => done(el.isContentEditable ? el.textContent : el.value);
+    setTimeout(() => setTimeout(read, delay), 0);
+  },
+
+  // Видимая опция, текст которой содержит text (без учёта регистра)
+  pickOption(css, text, opts) {
+    const options = Array.from(document.querySelectorAll(css)).filter(FV.visible);
+    const needle = text.toLowerCase();
+    const option = options.find((o) => o.innerText.toLowerCase().includes(needle));
+    const res = {found: options.length > 0, ok: false, reason: option ? "" : "missing",
+                 options: options.length, text: option ? option.innerText.trim() : null};
+    if (!option) return res;
+    if (opts.scroll) option.scrollIntoView({block: opts.block || "center"});
+    FV.press(option);
+    res.ok = true;
+    return res;
+  },
+};
+"""
+
+_SCRIPT = _LIBRARY + "return FV[arguments[0]].apply(null, Array.prototype.slice.call(arguments, 1));"
+_SETTLE_SCRIPT = _LIBRARY + "FV.settle(arguments[0], arguments[1], arguments[arguments.length - 1]);"
+
+
+def run(driver, action: str, *args) -> dict:
+    """Выполняет действие библиотеки одной командой WebDriver."""
+    return driver.execute_script(_SCRIPT, action, *(_target(a) for a in args))
+
+
+def _target(value):
+    # Локатор Selenium — кортеж (By, value); в JS он приходит массивом
+    return list(value) if isinstance(value, tuple) else value
+
+
+# ================================================================
+# Действия
+# ================================================================
+def click(driver, target, scroll: bool = True, block: str = "center", native: bool = False) -> dict:
+    """
+    Находит, прокручивает и кликает элемент.
+
+    native=True — клик Selenium по найденному элементу (нужен там, где
+    страница требует настоящего жеста пользователя, например открывает
+    системный диалог выбора файла). Он же — запасной путь, если элемент
+    перекрыт.
+    """
+    result = run(driver, "click", target, {"scroll": scroll, "block": block, "native": native})
+    if result["found"] and (native and result["ok"] or result["reason"] == "obscured"):
+        result["element"].click()
+        result["ok"], result["reason"] = True, ""
+    return result
+
+
+def fill(driver, target, text: str, scroll: bool = True, events: tuple[str, ...] = ("input", "change")) -> dict:
+    """
+    Записывает значение поля нативным сеттером и рассылает события.
+    ok — значение записано; приняла ли его страница, проверяет settled.
+    """
+    return run(driver, "fill", target, text, {"scroll": scroll, "events": list(events)})
+
+
+def pick_option(driver, options_css: str, text: str, scroll: bool = True) -> dict:
+    """Кликает первую видимую опцию, в тексте которой есть text."""
+    return run(driver, "pickOption", options_css, text, {"scroll": scroll})
+
+
+# ================================================================
+# Ввод текста
+# ================================================================
+def enter_text(driver, element, text: str, modes: tuple[str, ...] = TEXT_MODES, remember: str | None = None) -> str:
+    """
+    Вводит text в найденное поле первым способом, который страница
+    приняла (см. описание модуля). Возвращает способ.
+    """
+    text = _normalize(text)
+    modes = _preferred(modes, remember)
+    mode, rejected = _enter(driver, element, text, modes)
+    _accept(remember, mode, rejected)
+    return mode
+
+
+def fill_text(driver, wait, target, text: str, modes: tuple[str, ...] = TEXT_MODES,
+              remember: str | None = None) -> dict:
+    """
+    Ждёт поле и вводит text. Способ native выполняется в той же команде,
+    что и поиск; остальные — после (поле предварительно очищается).
+    Результат — как у fill, плюс "mode".
+    """
+    text = _normalize(text)
+    modes = _preferred(modes, remember)
+    native = modes[0] == "native"
+    result = until_fill(wait, target, text if native else "", scroll=False)
+    if native and result["ok"] and settled(driver, result["element"], text):
+        _accept(remember, "native", ())
+        result["mode"] = "native"
+        return result
+    mode, rejected = _enter(driver, result["element"], text, modes[1:] if native else modes)
+    _accept(remember, mode, modes[:1] + rejected if native else rejected)
+    result.update(ok=True, reason="", mode=mode)
+    return result
+
+
+def settled(driver, element, text: str) -> bool:
+    """
+    Поле держит text и после blur и следующего тика — отдельной
+    командой, когда фреймворк уже обработал ввод (см. FV.settle).
+    """
+    return driver.execute_async_script(_SETTLE_SCRIPT, element, SETTLE_MS) == text
+
+
+def _enter(driver, element, text: str, modes: tuple[str, ...]) -> tuple[str, tuple[str, ...]]:
+    for i, mode in enumerate(modes):
+        if _ENTER[mode](driver, element, text):
+            return mode, modes[:i]
+    raise RuntimeError(f"Поле не приняло текст ни одним способом: {', '.join(modes)}")
+
+
+def _enter_native(driver, element, text: str) -> bool:
+    return fill(driver, element, text, scroll=False)["ok"] and settled(driver, element, text)
+
+
+def _enter_cdp(driver, element, text: str) -> bool:
+    # Пустой текст вставкой не записать — очистит send_keys
+    if not text or not hasattr(driver, "execute_cdp_cmd"):
+        return False
+    run(driver, "select", element)
+    driver.execute_cdp_cmd("Input.insertText", {"text": text})
+    return settled(driver, element, text)
+
+
+def _enter_keys(driver, element, text: str) -> bool:
+    element.clear()
+    element.send_keys(text)
+    return True
+
+
+_ENTER = {"native": _enter_native, "cdp": _enter_cdp, "keys": _enter_keys}
+
+
+def _normalize(text: str) -> str:
+    # <textarea> хранит переводы строк как \n — иначе проверка не сойдётся
+    return text.replace("\r\n", "\n")
+
+
+def _preferred(modes: tuple[str, ...], remember: str | None) -> tuple[str, ...]:
+    modes = tuple(m for m in modes if m in _ENTER) or ("keys",)
+    known = _accepted.get(remember) if remember else None
+    return modes[modes.index(known):] if known in modes else modes
+
+
+def _accept(remember: str | None, mode: str, rejected: tuple[str, ...]):
+    if rejected:
+        log(f"[DOM] {remember or 'поле'}: ввод через {mode} ({', '.join(rejected)} не приняты)")
+    if remember:
+        _accepted[remember] = mode
+
+
+# ================================================================
+# Ожидание + действие
+# ================================================================
+def until_click(wait, target, **kwargs) -> dict:
+    """Ждёт, пока элемент станет кликабельным, и кликает в той же команде."""
+    return wait.until(lambda d: _done(click(d, target, **kwargs)))
+
+
+def until_fill(wait, target, text: str, **kwargs) -> dict:
+    """Ждёт появления поля и записывает значение; отказ страницы — не повод ждать."""
+    return wait.until(lambda d: _present(fill(d, target, text, **kwargs)))
+
+
+def until_pick_option(wait, options_css: str, text: str, **kwargs) -> dict:
+    """Ждёт появления списка опций и выбирает нужную (ok=False — такой нет)."""
+    return wait.until(lambda d: _present(pick_option(d, options_css, text, **kwargs)))
+
+
+def _done(result: dict):
+    return result if result["ok"] else False
+
+
+def _present(result: dict):
+    return result if result["found"] and result["reason"] not in ("hidden", "disabled") else False
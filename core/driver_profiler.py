@@ -0,0 +1,260 @@
+"""
+Профилировщик команд WebDriver (включается FLOWVID_PROFILE_WEBDRIVER=1).
+
+SeleniumManager оборачивает driver.execute — через него проходят все
+команды драйвера и элементов (find_element, click, send_keys,
+execute_script, опросы wait.until). Для каждой команды записываются:
+
+    - command  — команда протокола (findElement, clickElement, executeScript…);
+    - locator  — "xpath=…", "css selector=…" или начало скрипта; команды
+                 элемента получают локатор, по которому элемент был найден;
+    - caller   — метод загрузчика, который её вызвал (rutube._fill_metadata),
+                 — первый кадр стека за пределами selenium и пула вкладок
+                 (core/tab_pool.py);
+    - duration и тип ошибки.
+
+Итоги:
+    - профиль загрузки — UploaderManager кладёт его в
+      timings[сеть]["webdriver"] и пишет строку в лог;
+    - сводка «горячих» команд за все загрузки — ./stats/webdriver_profile.json,
+      отчёт: python bench/webdriver_profile.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core import metrics
+from core.timing import UploadTrace, current_trace
+from utils.logger import log
+from utils.paths import stats_dir
+
+
+# Сколько строк «горячих» команд оставлять в профиле загрузки
+TOP = 10
+# Соответствие id элемента → локатор не растёт бесконечно
+MAX_LOCATORS = 10_000
+
+_SELENIUM_DIR = os.sep + "selenium" + os.sep
+_THIS_FILE = os.path.abspath(__file__)
+# Обёртки driver.execute поверх профилировщика: их кадры — не вызывающий
+_WRAPPERS = {_THIS_FILE, os.path.join(os.path.dirname(_THIS_FILE), "tab_pool.py")}
+
+
+@dataclass
+class CommandStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    errors: int = 0
+
+    def add(self, duration: float, error: str | None):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        if error:
+            self.errors += 1
+
+    def merge(self, raw: dict):
+        self.count += raw.get("count", 0)
+        self.total += raw.get("total", 0.0)
+        self.max = max(self.max, raw.get("max", 0.0))
+        self.errors += raw.get("errors", 0)
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "total": round(self.total, 4), "max": round(self.max, 4), "errors": self.errors}
+
+
+Key = tuple[str, str, str]      # (caller, command, locator)
+
+
+@dataclass
+class UploadProfile:
+    """Команды одной загрузки на одну сеть."""
+    commands: dict[Key, CommandStats] = field(default_factory=dict)
+
+    def add(self, key: Key, duration: float, error: str | None):
+        self.commands.setdefault(key, CommandStats()).add(duration, error)
+
+    @property
+    def total(self) -> float:
+        return sum(s.total for s in self.commands.values())
+
+    @property
+    def count(self) -> int:
+        return sum(s.count for s in self.commands.values())
+
+    def summary(self, top: int = TOP) -> dict:
+        by_caller: dict[str, float] = {}
+        for (caller, _, _), s in self.commands.items():
+            by_caller[caller] = by_caller.get(caller, 0.0) + s.total
+        hot = sorted(self.commands.items(), key=lambda kv: kv[1].total, reverse=True)[:top]
+        return {
+            "commands": self.count,
+            "total": round(self.total, 3),
+            "by_caller": {k: round(v, 3) for k, v in sorted(by_caller.items(), key=lambda kv: -kv[1])},
+            "top": [
+                {"caller": caller, "command": command, "locator": locator, **s.as_dict()}
+                for (caller, command, locator), s in hot
+            ],
+        }
+
+
+class DriverProfiler:
+    """Singleton. Запись команд WebDriver по загрузкам и в общую сводку."""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, path: str | None = None, enabled: bool | None = None):
+        self.path = path or os.path.join(stats_dir(), "webdriver_profile.json")
+        # Читается при создании, а не при импорте — уже после load_dotenv
+        if enabled is None:
+            enabled = os.getenv("FLOWVID_PROFILE_WEBDRIVER", "") == "1"
+        self.enabled = enabled
+        self._profiles: "weakref.WeakKeyDictionary[UploadTrace, UploadProfile]" = weakref.WeakKeyDictionary()
+        self._totals: dict[Key, CommandStats] = {}
+        self._locators: dict[str, str] = {}
+        self._data_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Обёртка драйвера
+    # ================================================================
+    def attach(self, driver):
+        """Оборачивает driver.execute; команды элементов идут через него же."""
+        original = driver.execute
+
+        def execute(driver_command, params=None):
+            t0 = time.perf_counter()
+            try:
+                response = original(driver_command, params)
+            except Exception as e:
+                self.record(driver_command, params, time.perf_counter() - t0, type(e).__name__)
+                raise
+            self.record(driver_command, params, time.perf_counter() - t0, None, response)
+            return response
+
+        driver.execute = execute
+        return driver
+
+    # ================================================================
+    # Запись
+    # ================================================================
+    def record(self, command: str, params: dict | None, duration: float, error: str | None, response=None):
+        params = params or {}
+        locator = self._locator(command, params)
+        key = (_caller(), command, locator)
+        tr = current_trace()
+        with self._data_lock:
+            if response is not None and "using" in params:
+                self._remember(response.get("value"), locator)
+            self._totals.setdefault(key, CommandStats()).add(duration, error)
+            if tr is not None:
+                profile = self._profiles.get(tr)
+                if profile is None:
+                    profile = self._profiles[tr] = UploadProfile()
+                profile.add(key, duration, error)
+        metrics.WEBDRIVER_COMMAND.observe(duration, command=command)
+
+    def _locator(self, command: str, params: dict) -> str:
+        if "using" in params:
+            return _short(f"{params['using']}={params.get('value', '')}")
+        if "script" in params:
+            return "js:" + _short(params["script"].strip().splitlines()[0] if params["script"].strip() else "")
+        if command == "get":
+            return _short(params.get("url", ""))
+        if "id" in params:
+            return self._locators.get(params["id"], "element")
+        return ""
+
+    def _remember(self, value, locator: str):
+        """Найденные элементы → локатор, по которому их нашли."""
+        elements = value if isinstance(value, list) else [value]
+        if len(self._locators) > MAX_LOCATORS:
+            self._locators.clear()
+        for element in elements:
+            element_id = getattr(element, "id", None)
+            if element_id:
+                self._locators[element_id] = locator
+
+    # ================================================================
+    # Итоги
+    # ================================================================
+    def pop(self, tr: UploadTrace) -> UploadProfile | None:
+        """Профиль закончившейся загрузки; общая сводка дописывается в файл."""
+        with self._data_lock:
+            profile = self._profiles.pop(tr, None)
+        if profile is None:
+            return None
+        hot = max(profile.commands.items(), key=lambda kv: kv[1].total)
+        (caller, command, locator), s = hot
+        log(
+            f"[WEBDRIVER] {tr.network}: {profile.count} команд, {profile.total:.2f} с; "
+            f"дольше всего {caller} {command} {locator} — {s.count} раз, {s.total:.2f} с"
+        )
+        self.save()
+        return profile
+
+    def save(self):
+        """Сливает накопленное со сводкой на диске (атомарная запись)."""
+        with self._data_lock:
+            totals, self._totals = self._totals, {}
+        merged = load_report(self.path)
+        for key, s in totals.items():
+            merged.setdefault(key, CommandStats()).merge(s.as_dict())
+        data = [
+            {"caller": caller, "command": command, "locator": locator, **s.as_dict()}
+            for (caller, command, locator), s in merged.items()
+        ]
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log(f"[WEBDRIVER] Не удалось сохранить профиль команд: {e}", level="warning")
+
+
+def load_report(path: str) -> dict[Key, CommandStats]:
+    """Сводка с диска: {(caller, command, locator): CommandStats}."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    result: dict[Key, CommandStats] = {}
+    for row in rows:
+        stats = CommandStats()
+        stats.merge(row)
+        result[(row["caller"], row["command"], row["locator"])] = stats
+    return result
+
+
+def _short(text: str, limit: int = 80) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _caller() -> str:
+    """Первый кадр вне selenium, этого модуля и пула вкладок: модуль.функция."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        name = frame.f_code.co_name
+        if _SELENIUM_DIR not in filename and os.path.abspath(filename) not in _WRAPPERS and not name.startswith("<"):
+            return f"{Path(filename).stem}.{name}"
+        frame = frame.f_back
+    return "-"
@@ -0,0 +1,370 @@
+"""
+Общее хранилище заданий для нескольких машин-воркеров (worker.py).
+
+SQLite-файл на общем диске (FLOWVID_JOB_STORE). Единица работы —
+задача «задание × сеть»: Chrome-профили и файлы сессий лежат на
+конкретной машине, поэтому каждая машина (узел) объявляет, какие сети
+она обслуживает, и берёт только их.
+
+    jobs   — видео и метаданные
+    tasks  — (job_id, network): статус, узел, аренда, контрольная точка
+    nodes  — узлы: сети, ёмкость, время последнего heartbeat
+
+Аренда (lease): узел забирает задачу на lease_seconds и продлевает
+аренду heartbeat'ом, пока загрузка идёт. Если узел пропал, аренда
+истекает и задачу забирает другой узел — с сохранённой контрольной
+точкой (core/checkpoint.py), если она переносима.
+
+Распределение: при отправке задача закрепляется за наименее загруженным
+живым узлом, который обслуживает сеть (поле node). Узел берёт сначала
+свои задачи, потом ничьи, а затем «крадёт» чужие, если их узел мёртв
+или задача ждёт дольше steal_after — так свободные машины разгружают
+занятые.
+
+Все изменения — в транзакциях BEGIN IMMEDIATE, поэтому несколько
+процессов безопасно работают с одним файлом. На сетевом диске
+используется обычный журнал отката SQLite (WAL там не работает);
+часы узлов должны быть синхронизированы (NTP): сроки аренды
+сравниваются по часам того узла, который их проверяет.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from utils.paths import data_dir
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    video_file  TEXT NOT NULL,
+    title       TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    tags        TEXT NOT NULL DEFAULT '[]',
+    thumbnail   TEXT,
+    created     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    job_id      TEXT NOT NULL REFERENCES jobs(id),
+    network     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',   -- pending | leased | done | error | cancelled
+    node        TEXT,                              -- закреплённый узел (NULL — любой)
+    queued      REAL NOT NULL,                     -- с какого момента задача ждёт
+    lease_owner TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    checkpoint  TEXT,
+    url         TEXT,
+    error       TEXT,
+    updated     REAL NOT NULL,
+    PRIMARY KEY (job_id, network)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, network);
+CREATE TABLE IF NOT EXISTS nodes (
+    node_id     TEXT PRIMARY KEY,
+    networks    TEXT NOT NULL,
+    capacity    INTEGER NOT NULL,
+    active      INTEGER NOT NULL DEFAULT 0,
+    heartbeat   REAL NOT NULL,
+    started     REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class StoredTask:
+    """Задача, выданная узлу в аренду."""
+    job_id: str
+    network: str
+    attempts: int
+    params: dict
+    checkpoint: dict | None = None
+    stolen_from: str | None = None
+
+
+@dataclass
+class NodeInfo:
+    node_id: str
+    networks: list[str]
+    capacity: int
+    active: int
+    heartbeat: float
+    alive: bool = True
+
+
+@dataclass
+class JobStatus:
+    id: str
+    video_file: str
+    title: str
+    created: float
+    tasks: list[dict] = field(default_factory=list)
+
+    @property
+    def status(self) -> str:
+        states = {t["status"] for t in self.tasks}
+        if states & {"pending", "leased"}:
+            return "running" if "leased" in states else "pending"
+        if "error" in states:
+            return "error"
+        if states == {"cancelled"}:
+            return "cancelled"
+        return "done"
+
+
+class JobStore:
+    """Доступ к общему хранилищу заданий (см. описание модуля)."""
+
+    def __init__(
+        self,
+        path: str | None = None,
+        lease_seconds: float | None = None,
+        steal_after: float | None = None,
+        max_attempts: int | None = None,
+    ):
+        self.path = os.path.abspath(
+            path or os.getenv("FLOWVID_JOB_STORE") or os.path.join(data_dir(), "jobs.sqlite")
+        )
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lease_seconds = lease_seconds or float(os.getenv("FLOWVID_LEASE_SECONDS", "60"))
+        self.steal_after = steal_after if steal_after is not None else float(os.getenv("FLOWVID_STEAL_AFTER", "30"))
+        self.max_attempts = max_attempts or int(os.getenv("FLOWVID_MAX_ATTEMPTS", "3"))
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _tx(self):
+        """Транзакция с блокировкой на запись с самого начала (BEGIN IMMEDIATE)."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    # ================================================================
+    # Узлы
+    # ================================================================
+    def register(self, node_id: str, networks: list[str], capacity: int):
+        """
+        Регистрирует узел (или его перезапуск). Аренды, оставшиеся от
+        прошлого запуска узла, возвращаются в очередь сразу, не дожидаясь
+        истечения, — закреплёнными за этим же узлом.
+        """
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "UPDATE tasks SET status = 'pending', lease_owner = NULL, lease_until = NULL, "
+                "attempts = MAX(attempts - 1, 0), queued = ?, updated = ? "
+                "WHERE lease_owner = ? AND status = 'leased'",
+                (now, now, node_id),
+            )
+            db.execute(
+                "INSERT INTO nodes (node_id, networks, capacity, active, heartbeat, started) "
+                "VALUES (?, ?, ?, 0, ?, ?) "
+                "ON CONFLICT(node_id) DO UPDATE SET networks=excluded.networks, "
+                "capacity=excluded.capacity, active=0, heartbeat=excluded.heartbeat, started=excluded.started",
+                (node_id, json.dumps(networks), capacity, now, now),
+            )
+
+    def unregister(self, node_id: str):
+        """Штатная остановка узла: новые задачи за ним больше не закрепляются."""
+        with self._tx() as db:
+            db.execute("UPDATE nodes SET heartbeat = 0, active = 0 WHERE node_id = ?", (node_id,))
+
+    def heartbeat(self, node_id: str, active: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        """
+        Продлевает аренду задач узла. Возвращает задачи, которые узел
+        потерял (отменены или аренда истекла и их забрал другой узел) —
+        их загрузку нужно остановить.
+        """
+        now = time.time()
+        lost = []
+        with self._tx() as db:
+            db.execute(
+                "UPDATE nodes SET heartbeat = ?, active = ? WHERE node_id = ?",
+                (now, len(active), node_id),
+            )
+            for job_id, network in active:
+                cur = db.execute(
+                    "UPDATE tasks SET lease_until = ?, updated = ? "
+                    "WHERE job_id = ? AND network = ? AND status = 'leased' AND lease_owner = ?",
+                    (now + self.lease_seconds, now, job_id, network, node_id),
+                )
+                if cur.rowcount == 0:
+                    lost.append((job_id, network))
+        return lost
+
+    def nodes(self) -> list[NodeInfo]:
+        dead_before = time.time() - self.lease_seconds
+        with self._tx() as db:
+            rows = db.execute("SELECT * FROM nodes ORDER BY node_id").fetchall()
+        return [
+            NodeInfo(r["node_id"], json.loads(r["networks"]), r["capacity"], r["active"], r["heartbeat"],
+                     alive=r["heartbeat"] >= dead_before)
+            for r in rows
+        ]
+
+    def _pick_node(self, db, network: str, now: float) -> str | None:
+        """Наименее загруженный живой узел, обслуживающий сеть."""
+        best, best_load = None, None
+        for r in db.execute("SELECT * FROM nodes WHERE heartbeat >= ?", (now - self.lease_seconds,)):
+            if network not in json.loads(r["networks"]):
+                continue
+            queued = db.execute(
+                "SELECT COUNT(*) FROM tasks WHERE node = ? AND status IN ('pending', 'leased')",
+                (r["node_id"],),
+            ).fetchone()[0]
+            load = queued / max(r["capacity"], 1)
+            if best_load is None or load < best_load:
+                best, best_load = r["node_id"], load
+        return best
+
+    # ================================================================
+    # Задания
+    # ================================================================
+    def submit(
+        self,
+        video_file: str,
+        networks: list[str],
+        title: str = "",
+        description: str = "",
+        tags: list[str] | None = None,
+        thumbnail: str | None = None,
+        job_id: str | None = None,
+    ) -> str:
+        job_id = job_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "INSERT INTO jobs (id, video_file, title, description, tags, thumbnail, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, video_file, title, description, json.dumps(tags or [], ensure_ascii=False), thumbnail, now),
+            )
+            for network in networks:
+                db.execute(
+                    "INSERT INTO tasks (job_id, network, node, queued, updated) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, network, self._pick_node(db, network, now), now, now),
+                )
+        return job_id
+
+    def claim(self, node_id: str, networks: list[str]) -> StoredTask | None:
+        """
+        Берёт в аренду следующую задачу для узла: свои, ничьи, затем
+        чужие — у мёртвых узлов или ждущие дольше steal_after.
+        """
+        if not networks:
+            return None
+        now = time.time()
+        marks = ",".join("?" * len(networks))
+        with self._tx() as db:
+            # Задачи, на которых узлы падали раз за разом, дальше не раздаём
+            db.execute(
+                "UPDATE tasks SET status = 'error', error = 'аренда истекла: узел не завершил загрузку', "
+                "updated = ? WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = db.execute(
+                f"""
+                SELECT t.*, j.video_file, j.title, j.description, j.tags, j.thumbnail
+                FROM tasks t
+                JOIN jobs j ON j.id = t.job_id
+                LEFT JOIN nodes n ON n.node_id = t.node
+                WHERE t.network IN ({marks})
+                  AND (t.status = 'pending' OR (t.status = 'leased' AND t.lease_until < ?))
+                  AND (t.node IS NULL OR t.node = ? OR n.heartbeat IS NULL
+                       OR n.heartbeat < ? OR t.queued < ?)
+                ORDER BY CASE WHEN t.node = ? THEN 0 WHEN t.node IS NULL THEN 1 ELSE 2 END, t.queued
+                LIMIT 1
+                """,
+                (*networks, now, node_id, now - self.lease_seconds, now - self.steal_after, node_id),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE tasks SET status = 'leased', node = ?, lease_owner = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated = ? WHERE job_id = ? AND network = ?",
+                (node_id, node_id, now + self.lease_seconds, now, row["job_id"], row["network"]),
+            )
+        stolen_from = row["node"] if row["node"] not in (None, node_id) else None
+        return StoredTask(
+            job_id=row["job_id"],
+            network=row["network"],
+            attempts=row["attempts"] + 1,
+            params={
+                "video_file": row["video_file"],
+                "title": row["title"],
+                "description": row["description"],
+                "tags": json.loads(row["tags"]),
+                "thumbnail": row["thumbnail"],
+            },
+            checkpoint=json.loads(row["checkpoint"]) if row["checkpoint"] else None,
+            stolen_from=stolen_from,
+        )
+
+    def save_checkpoint(self, job_id: str, network: str, node_id: str, checkpoint: dict):
+        with self._tx() as db:
+            db.execute(
+                "UPDATE tasks SET checkpoint = ?, updated = ? "
+                "WHERE job_id = ? AND network = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(checkpoint, ensure_ascii=False, default=str), time.time(), job_id, network, node_id),
+            )
+
+    def complete(
+        self, job_id: str, network: str, node_id: str, ok: bool, url: str | None = None, error: str | None = None,
+    ) -> bool:
+        """Фиксирует итог; False — аренду уже забрал другой узел или задачу отменили."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE tasks SET status = ?, url = ?, error = ?, lease_until = NULL, updated = ? "
+                "WHERE job_id = ? AND network = ? AND lease_owner = ? AND status = 'leased'",
+                ("done" if ok else "error", url, error, time.time(), job_id, network, node_id),
+            )
+            return cur.rowcount > 0
+
+    def release(self, job_id: str, network: str, node_id: str):
+        """Узел останавливается: задача возвращается в очередь (без закрепления)."""
+        now = time.time()
+        with self._tx() as db:
+            db.execute(
+                "UPDATE tasks SET status = 'pending', node = NULL, lease_owner = NULL, lease_until = NULL, "
+                "attempts = MAX(attempts - 1, 0), queued = ?, updated = ? "
+                "WHERE job_id = ? AND network = ? AND lease_owner = ? AND status = 'leased'",
+                (now, now, job_id, network, node_id),
+            )
+
+    def cancel(self, job_id: str) -> int:
+        """Отменяет незавершённые задачи задания; идущие остановятся на heartbeat."""
+        with self._tx() as db:
+            cur = db.execute(
+                "UPDATE tasks SET status = 'cancelled', updated = ? "
+                "WHERE job_id = ? AND status IN ('pending', 'leased')",
+                (time.time(), job_id),
+            )
+            return cur.rowcount
+
+    def jobs(self, limit: int = 100) -> list[JobStatus]:
+        with self._tx() as db:
+            rows = db.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+            result = []
+            for r in rows:
+                tasks = db.execute(
+                    "SELECT network, status, node, attempts, url, error FROM tasks WHERE job_id = ? ORDER BY network",
+                    (r["id"],),
+                ).fetchall()
+                result.append(JobStatus(r["id"], r["video_file"], r["title"], r["created"], [dict(t) for t in tasks]))
+        return result
@@ -0,0 +1,424 @@
+"""
+Журнал заданий (write-ahead log) для восстановления после сбоя.
+
+UploaderManager записывает в журнал каждый переход задания:
+
+    begin       — задание принято: параметры загрузки и его источник (origin)
+    start       — началась загрузка на сеть (аккаунт)
+    checkpoint  — снимок контрольной точки сети (core/checkpoint.py)
+    done        — сеть завершена: успех/ошибка, ссылка
+    end         — задание завершено целиком
+
+Записи — строки JSON в ./data/journal/<pid>-<id>.wal. Каждый процесс
+пишет свой файл и держит на нём блокировку (<имя>.lock): если процесс
+упал, ОС снимает блокировку, и файл «осиротел».
+
+Запись группируется (group commit): фоновый поток раз в
+FLOWVID_JOURNAL_SYNC_MS пишет накопленное одним write + fsync.
+begin, checkpoint и done — «долговечные»: вызывающий поток ждёт fsync
+своей записи, поэтому уже опубликованная сеть не будет опубликована
+повторно. Параллельные загрузки делят один fsync.
+
+При старте recover() читает осиротевшие журналы и по каждой сети
+определяет: finished (опубликована), resumable (есть сохраняемая
+контрольная точка), restart (начать заново). Задания нужного источника
+переносятся в журнал текущего процесса и возвращаются вызывающему
+для повторного запуска с тем же job_id — завершённые сети
+UploaderManager пропустит. Задания источников, которые никто не
+восстанавливает (direct — бенчмарки, вызовы из кода), из журналов
+упавших процессов отбрасываются: иначе файлы копились бы без конца.
+
+Настройки (.env):
+    FLOWVID_JOURNAL_SYNC_MS=200    период группового fsync
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+from core.checkpoint import Checkpoint
+from utils.filelock import try_lock
+from utils.logger import log
+from utils.paths import data_dir
+
+
+FINISHED = "finished"
+RESUMABLE = "resumable"
+RESTART = "restart"
+
+# Источники, чьи процессы вызывают recover(): очередь GUI, планировщик, воркер
+RECOVERED_ORIGINS = ("queue", "scheduler", "worker")
+
+
+@dataclass
+class NetworkEntry:
+    """Состояние загрузки на одну сеть по журналу."""
+    status: str = "pending"          # pending | running | done | failed
+    account: str | None = None
+    checkpoint: dict | None = None
+    url: str | None = None
+    error: str | None = None
+
+    def recovery(self) -> str:
+        if self.status == "done":
+            return FINISHED
+        stages = (self.checkpoint or {}).get("stages") or []
+        # Публикация прошла, но процесс упал до записи done
+        if "publish" in stages:
+            return FINISHED
+        if stages and (self.checkpoint or {}).get("data"):
+            return RESUMABLE
+        return RESTART
+
+
+@dataclass
+class JobEntry:
+    """Задание по журналу: параметры загрузки и состояние сетей."""
+    job_id: str
+    origin: str = "direct"
+    params: dict = field(default_factory=dict)
+    networks: dict[str, NetworkEntry] = field(default_factory=dict)
+    status: str | None = None        # None — задание не завершено
+
+    @property
+    def open(self) -> bool:
+        return self.status is None
+
+    def network(self, key: str) -> NetworkEntry:
+        if key not in self.networks:
+            self.networks[key] = NetworkEntry()
+        return self.networks[key]
+
+    def recovery(self) -> dict[str, str]:
+        return {key: self.network(key).recovery() for key in self.params.get("networks", [])}
+
+    def snapshot(self) -> list[dict]:
+        """Минимальный набор записей, воспроизводящий это состояние."""
+        records = [{"ev": "begin", "job": self.job_id, "origin": self.origin, "params": self.params}]
+        for key, net in self.networks.items():
+            if net.account:
+                records.append({"ev": "start", "job": self.job_id, "net": key, "account": net.account})
+            if net.checkpoint:
+                records.append({"ev": "checkpoint", "job": self.job_id, "net": key, "cp": net.checkpoint})
+            if net.status in ("done", "failed"):
+                records.append({
+                    "ev": "done", "job": self.job_id, "net": key,
+                    "ok": net.status == "done", "url": net.url, "error": net.error,
+                })
+        if self.status:
+            records.append({"ev": "end", "job": self.job_id, "status": self.status})
+        return records
+
+
+def apply(jobs: dict[str, JobEntry], record: dict):
+    """Применяет одну запись журнала к состоянию заданий."""
+    ev, job_id = record.get("ev"), record.get("job")
+    if ev == "begin":
+        job = jobs.get(job_id)
+        if job is None:
+            jobs[job_id] = JobEntry(job_id, record.get("origin", "direct"), record.get("params") or {})
+        else:
+            # Повторный запуск того же задания: завершённые сети сохраняются
+            job.status = None
+            job.params = record.get("params") or job.params
+        return
+    job = jobs.get(job_id)
+    if job is None:
+        return
+    if ev == "start":
+        net = job.network(record["net"])
+        net.status, net.account = "running", record.get("account")
+    elif ev == "checkpoint":
+        job.network(record["net"]).checkpoint = record.get("cp")
+    elif ev == "done":
+        net = job.network(record["net"])
+        net.status = "done" if record.get("ok") else "failed"
+        net.url, net.error = record.get("url"), record.get("error")
+    elif ev == "end":
+        job.status = record.get("status", "done")
+
+
+def replay(path: str) -> dict[str, JobEntry]:
+    """Читает журнал; оборванная при сбое последняя строка пропускается."""
+    jobs: dict[str, JobEntry] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    apply(jobs, json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+    except OSError as e:
+        log(f"Не удалось прочитать журнал {path}: {e}", level="warning")
+    return jobs
+
+
+class Journal:
+    """Singleton. Журнал заданий текущего процесса (см. описание модуля)."""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, root: str | None = None, sync_interval: float | None = None):
+        self.dir = os.path.join(root or data_dir(), "journal")
+        os.makedirs(self.dir, exist_ok=True)
+        name = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(self.dir, f"{name}.wal")
+        self._owner_lock = try_lock(os.path.join(self.dir, f"{name}.lock"))
+        self._file = open(self.path, "a", encoding="utf-8")
+
+        if sync_interval is None:
+            sync_interval = float(os.getenv("FLOWVID_JOURNAL_SYNC_MS", "200")) / 1000
+        self.sync_interval = max(sync_interval, 0.001)
+
+        self.jobs: dict[str, JobEntry] = {}
+        self._jobs_lock = threading.RLock()
+        self._listeners: list[Callable[[dict], None]] = []
+
+        self._buffer: list[str] = []
+        self._seq = 0           # номер последней поставленной записи
+        self._synced = 0        # номер последней записи, прошедшей fsync
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()     # файл журнала: запись и сжатие
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Запись
+    # ================================================================
+    def _append(self, record: dict, durable: bool = False):
+        # После close() задания, остановленные вместе с приложением, должны
+        # остаться в журнале незавершёнными — ни в файл, ни в память
+        if self._closed:
+            return
+        record = {"ts": round(time.time(), 3), **record}
+        with self._jobs_lock:
+            apply(self.jobs, record)
+        for listener in list(self._listeners):
+            try:
+                listener(record)
+            except Exception as e:
+                log(f"Журнал заданий: ошибка подписчика: {e}", level="warning")
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._cond:
+            if self._closed:
+                return
+            self._buffer.append(line)
+            self._seq += 1
+            seq = self._seq
+            if durable:
+                self._cond.notify_all()
+                while self._synced < seq and not self._closed:
+                    self._cond.wait()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                if not self._buffer and not self._closed:
+                    self._cond.wait(self.sync_interval)
+                if not self._buffer:
+                    if self._closed:
+                        return
+                    continue
+                lines, self._buffer = self._buffer, []
+                seq = self._seq
+            try:
+                with self._io_lock:
+                    self._file.write("".join(lines))
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+            except (OSError, ValueError) as e:
+                log(f"Журнал заданий: ошибка записи: {e}", level="warning")
+            with self._cond:
+                self._synced = seq
+                self._cond.notify_all()
+
+    def flush(self):
+        """Дожидается записи всего поставленного на диск."""
+        with self._cond:
+            seq = self._seq
+            self._cond.notify_all()
+            while self._synced < seq and not self._closed:
+                self._cond.wait(self.sync_interval)
+
+    def close(self):
+        """Записывает хвост и закрывает журнал (при штатном выходе)."""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join(timeout=5)
+        with self._io_lock:
+            self._file.close()
+        with self._jobs_lock:
+            has_open = any(job.open for job in self.jobs.values())
+        if self._owner_lock:
+            self._owner_lock.close()
+            self._owner_lock = None
+        # Незавершённые задания остаются в файле — их заберёт следующий запуск
+        if not has_open:
+            self._remove_files(self.path)
+
+    def _compact(self):
+        """
+        Переписывает журнал снимком незавершённых заданий.
+        Записи, поставленные во время сжатия, попадут уже в новый файл.
+        """
+        with self._io_lock:
+            if self._closed:
+                return
+            with self._jobs_lock:
+                lines = [
+                    json.dumps(r, ensure_ascii=False, default=str) + "\n"
+                    for job in self.jobs.values() if job.open
+                    for r in job.snapshot()
+                ]
+            tmp = f"{self.path}.tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._file.close()
+                os.replace(tmp, self.path)
+            except OSError as e:
+                log(f"Не удалось сжать журнал: {e}", level="warning")
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """Подписчик на каждую запись журнала (вызывается в потоке записи события)."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # ================================================================
+    # События заданий (вызывает UploaderManager)
+    # ================================================================
+    def begin(self, job_id: str, origin: str, params: dict) -> JobEntry:
+        """Задание начато (или запущено повторно). Возвращает его состояние."""
+        self._append({"ev": "begin", "job": job_id, "origin": origin, "params": params}, durable=True)
+        with self._jobs_lock:
+            return self.jobs[job_id]
+
+    def start(self, job_id: str, network: str, account: str | None):
+        self._append({"ev": "start", "job": job_id, "net": network, "account": account})
+
+    def checkpoint(self, job_id: str, network: str) -> Checkpoint:
+        """Контрольная точка сети: восстановленная из журнала, если есть, и пишущая в него."""
+        def on_change(cp: Checkpoint):
+            self._append({"ev": "checkpoint", "job": job_id, "net": network, "cp": cp.as_dict()}, durable=True)
+
+        with self._jobs_lock:
+            job = self.jobs.get(job_id)
+            saved = job.network(network).checkpoint if job else None
+        if saved:
+            return Checkpoint.from_dict(saved, on_change)
+        return Checkpoint(network, on_change=on_change)
+
+    def done(self, job_id: str, network: str, ok: bool, url: str | None = None, error: str | None = None):
+        self._append(
+            {"ev": "done", "job": job_id, "net": network, "ok": ok, "url": url, "error": error},
+            durable=True,
+        )
+
+    def end(self, job_id: str, status: str):
+        # Журнал закрыт при выходе: задание не завершено, а прервано —
+        # его продолжит следующий запуск
+        if self._closed:
+            return
+        self._append({"ev": "end", "job": job_id, "status": status})
+        with self._jobs_lock:
+            idle = not any(job.open for job in self.jobs.values())
+        # Нечего восстанавливать — журнал можно начать с чистого листа
+        if idle:
+            self._compact()
+
+    def restore(self, job_id: str, origin: str, params: dict, network: str, checkpoint: dict):
+        """
+        Контрольная точка, полученная извне (общее хранилище заданий,
+        core/job_store.py): следующий upload() с этим job_id продолжит с неё.
+        """
+        self._append({"ev": "begin", "job": job_id, "origin": origin, "params": params})
+        self._append({"ev": "checkpoint", "job": job_id, "net": network, "cp": checkpoint}, durable=True)
+
+    def get(self, job_id: str) -> JobEntry | None:
+        with self._jobs_lock:
+            return self.jobs.get(job_id)
+
+    # ================================================================
+    # Восстановление
+    # ================================================================
+    def recover(self, origins: tuple[str, ...]) -> list[JobEntry]:
+        """
+        Забирает из журналов упавших процессов незавершённые задания
+        с origin из origins. Задания других источников из
+        RECOVERED_ORIGINS остаются в файле — их заберёт процесс, который
+        за них отвечает; задания остальных источников отбрасываются.
+        """
+        recovered: list[JobEntry] = []
+        for path in sorted(glob.glob(os.path.join(self.dir, "*.wal"))):
+            if path == self.path:
+                continue
+            lock = try_lock(f"{path[:-4]}.lock")
+            if lock is None:
+                continue        # процесс жив
+            try:
+                jobs = replay(path)
+                mine = [j for j in jobs.values() if j.open and j.origin in origins]
+                rest = [
+                    j for j in jobs.values()
+                    if j.open and j.origin not in origins and j.origin in RECOVERED_ORIGINS
+                ]
+                for job in jobs.values():
+                    if job.open and job.origin not in origins and job.origin not in RECOVERED_ORIGINS:
+                        log(f"[JOURNAL] Задание {job.job_id} ({job.origin}) прервано сбоем и не будет продолжено",
+                            level="warning")
+                for job in mine:
+                    for record in job.snapshot():
+                        self._append(record, durable=True)
+                    recovered.append(self.get(job.job_id))
+                    summary = ", ".join(f"{k}: {v}" for k, v in job.recovery().items())
+                    log(f"[JOURNAL] Восстановлено задание {job.job_id} ({job.origin}): {summary}")
+                if rest:
+                    self._rewrite(path, rest)
+                else:
+                    lock.close()
+                    lock = None
+                    self._remove_files(path)
+            finally:
+                if lock:
+                    lock.close()
+        return recovered
+
+    @staticmethod
+    def _rewrite(path: str, jobs: list[JobEntry]):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for job in jobs:
+                for record in job.snapshot():
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _remove_files(path: str):
+        for p in (path, f"{path[:-4]}.lock"):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
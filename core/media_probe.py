@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict
+
+from utils.logger import log
+from utils.paths import cache_dir
+
+
+FFPROBE = os.getenv("FLOWVID_FFPROBE", "ffprobe")
+FFMPEG = os.getenv("FLOWVID_FFMPEG", "ffmpeg")
+
+# Высота кадра-постера в пикселях (ширина — по пропорциям)
+POSTER_HEIGHT = 360
+
+
+@dataclass
+class MediaInfo:
+    """Что известно о видеофайле без его полной загрузки."""
+    path: str
+    size: int
+    duration: float | None = None       # секунды
+    width: int | None = None
+    height: int | None = None
+    codec: str | None = None
+    poster: str | None = None           # путь к jpg кадра-постера
+
+    @property
+    def resolution(self) -> str | None:
+        if self.width and self.height:
+            return f"{self.width}×{self.height}"
+        return None
+
+
+class MediaProbe:
+    """
+    Singleton. Кэш свойств видеофайлов (ffprobe) и кадров-постеров (ffmpeg).
+
+    Ключ кэша — (абсолютный путь, размер, mtime): изменённый файл
+    пробуется заново. Результаты хранятся в ./cache/media_probe.json,
+    постеры — в ./cache/posters. Если ffprobe/ffmpeg не установлены,
+    probe() возвращает MediaInfo только с размером, а неудача запоминается
+    лишь до перезапуска программы.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, root: str | None = None):
+        self.root = root or cache_dir()
+        self.path = os.path.join(self.root, "media_probe.json")
+        self.posters_dir = os.path.join(self.root, "posters")
+        self._data: Dict[str, dict] = {}
+        self._failed: set[str] = set()
+        self._data_lock = threading.RLock()
+        self._load()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Хранение
+    # ================================================================
+    @staticmethod
+    def _key(path: str) -> str:
+        st = os.stat(path)
+        return f"{os.path.abspath(path)}|{st.st_size}|{int(st.st_mtime)}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except Exception as e:
+            log(f"Не удалось прочитать кэш медиафайлов {self.path}: {e}", level="warning")
+            self._data = {}
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log(f"Не удалось сохранить кэш медиафайлов: {e}", level="warning")
+
+    # ================================================================
+    # Пробы
+    # ================================================================
+    def probe(self, path: str, poster: bool = True) -> MediaInfo:
+        """
+        Возвращает свойства файла из кэша или запускает ffprobe
+        (и ffmpeg для постера, если poster=True).
+        """
+        key = self._key(path)
+        with self._data_lock:
+            cached = self._data.get(key)
+
+        if cached:
+            info = MediaInfo(**cached)
+            if not poster or (info.poster and os.path.exists(info.poster)):
+                return info
+        else:
+            info = MediaInfo(path=os.path.abspath(path), size=os.path.getsize(path))
+            if key in self._failed:
+                return info
+            if not self._run_ffprobe(info):
+                self._failed.add(key)
+                return info
+
+        if poster and f"{key}|poster" not in self._failed:
+            info.poster = self._make_poster(path, key, info.duration)
+            if info.poster is None:
+                self._failed.add(f"{key}|poster")
+
+        with self._data_lock:
+            self._data[key] = asdict(info)
+            self._save()
+        return info
+
+    def poster(self, path: str) -> str | None:
+        return self.probe(path, poster=True).poster
+
+    @staticmethod
+    def _run_ffprobe(info: MediaInfo) -> bool:
+        try:
+            proc = subprocess.run(
+                [FFPROBE, "-v", "error", "-print_format", "json",
+                 "-show_format", "-show_streams", info.path],
+                capture_output=True, text=True, timeout=30,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            log(f"ffprobe недоступен: {e}", level="warning")
+            return False
+        if proc.returncode != 0:
+            log(f"ffprobe не смог прочитать {info.path}: {proc.stderr.strip()}", level="warning")
+            return False
+
+        try:
+            data = json.loads(proc.stdout or "{}")
+        except ValueError as e:
+            log(f"ffprobe вернул некорректный JSON для {info.path}: {e}", level="warning")
+            return False
+        duration = data.get("format", {}).get("duration")
+        info.duration = float(duration) if duration else None
+        video = next((s for s in data.get("streams", []) if s.get("codec_type") == "video"), None)
+        if video:
+            info.width = video.get("width")
+            info.height = video.get("height")
+            info.codec = video.get("codec_name")
+        return True
+
+    def _make_poster(self, path: str, key: str, duration: float | None) -> str | None:
+        os.makedirs(self.posters_dir, exist_ok=True)
+        out = os.path.join(self.posters_dir, hashlib.sha1(key.encode()).hexdigest()[:16] + ".jpg")
+        # Первый кадр часто чёрный — берём кадр чуть дальше от начала.
+        # -ss перед -i: ffmpeg ищет по ключевым кадрам и не читает файл целиком
+        at = min(1.0, duration * 0.1) if duration else 0.0
+        try:
+            proc = subprocess.run(
+                [FFMPEG, "-v", "error", "-y", "-ss", f"{at:.2f}", "-i", path,
+                 "-frames:v", "1", "-vf", f"scale=-2:{POSTER_HEIGHT}", out],
+                capture_output=True, text=True, timeout=30,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            log(f"ffmpeg недоступен: {e}", level="warning")
+            return None
+        if proc.returncode != 0 or not os.path.exists(out):
+            log(f"Не удалось получить кадр {path}: {proc.stderr.strip()}", level="warning")
+            return None
+        return out
@@ -0,0 +1,305 @@
+"""
+Метрики FlowVid в формате Prometheus.
+
+Реестр собирает:
+    - flowvid_uploads_started_total / finished / failed по сетям;
+    - flowvid_uploaded_bytes_total по сетям;
+    - flowvid_stage_duration_seconds — гистограмма длительностей этапов;
+    - flowvid_chrome_drivers — число живых драйверов Chrome;
+    - flowvid_queue_depth — сколько загрузок ждёт выполнения.
+
+Экспорт:
+    - HTTP: start_http_server(port) → GET /metrics;
+    - textfile: write_textfile(path) (для node_exporter textfile collector).
+
+Из окружения (.env):
+    FLOWVID_METRICS_PORT=9464
+    FLOWVID_METRICS_TEXTFILE=stats/flowvid.prom
+    FLOWVID_METRICS_TEXTFILE_INTERVAL=15
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+from core.timing import StageRecord, add_listener
+from utils.logger import log
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Загрузки длятся от долей секунды (клик) до десятков минут (обработка)
+DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [счётчики по корзинам..., +Inf], сумма
+        self._counts: Dict[Tuple[str, ...], list] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            counts[idx] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def _samples(self):
+        lines = []
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Singleton. Хранит все метрики процесса и отдаёт их в текстовом формате Prometheus.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._metrics_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._metrics_lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labels=()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        with self._metrics_lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ================================================================
+# Метрики FlowVid
+# ================================================================
+REGISTRY = MetricsRegistry.instance()
+
+UPLOADS_STARTED = REGISTRY.counter(
+    "flowvid_uploads_started_total", "Uploads started per network", ("network",))
+UPLOADS_FINISHED = REGISTRY.counter(
+    "flowvid_uploads_finished_total", "Uploads finished successfully per network", ("network",))
+UPLOADS_FAILED = REGISTRY.counter(
+    "flowvid_uploads_failed_total", "Uploads failed per network", ("network",))
+UPLOAD_RETRIES = REGISTRY.counter(
+    "flowvid_upload_retries_total", "Upload retries after transient errors per network", ("network",))
+UPLOADED_BYTES = REGISTRY.counter(
+    "flowvid_uploaded_bytes_total", "Bytes of video transferred per network", ("network",))
+STAGE_DURATION = REGISTRY.histogram(
+    "flowvid_stage_duration_seconds", "Upload stage latency", ("network", "stage", "outcome"))
+CHROME_DRIVERS = REGISTRY.gauge(
+    "flowvid_chrome_drivers", "Live Chrome WebDriver instances")
+QUEUE_DEPTH = REGISTRY.gauge(
+    "flowvid_queue_depth", "Uploads waiting to be processed")
+ACCOUNT_ACTIVE = REGISTRY.gauge(
+    "flowvid_account_active_uploads", "Uploads in progress per account", ("network", "account"))
+ACCOUNT_HEALTHY = REGISTRY.gauge(
+    "flowvid_account_healthy", "1 if the account is not cooling down after failures", ("network", "account"))
+BANDWIDTH_RATE = REGISTRY.gauge(
+    "flowvid_bandwidth_rate_bytes", "Uplink share allocated to the running transfer per network", ("network",))
+WEBDRIVER_COMMAND = REGISTRY.histogram(
+    "flowvid_webdriver_command_seconds", "WebDriver command round-trip (FLOWVID_PROFILE_WEBDRIVER=1)", ("command",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+CHROME_RSS = REGISTRY.gauge(
+    "flowvid_chrome_rss_bytes", "Resident memory of the chromedriver/Chrome process tree per profile", ("profile",))
+CHROME_PROCESSES = REGISTRY.gauge(
+    "flowvid_chrome_processes", "Processes in the chromedriver/Chrome tree per profile", ("profile",))
+CHROME_RECYCLES = REGISTRY.counter(
+    "flowvid_chrome_recycles_total", "Chrome restarts by the memory governor", ("profile", "reason"))
+CHROME_ORPHANS_KILLED = REGISTRY.counter(
+    "flowvid_chrome_orphans_killed_total", "Chrome processes killed after quit() left them running", ("profile",))
+BANDWIDTH_WAIT = REGISTRY.counter(
+    "flowvid_bandwidth_wait_seconds_total", "Time transfers spent paced by the bandwidth cap", ("network",))
+
+
+def observe_stage(record: StageRecord):
+    """Подписчик core.timing: переводит записи этапов в метрики."""
+    STAGE_DURATION.observe(record.duration, network=record.network, stage=record.stage, outcome=record.outcome)
+    if record.stage == "file_transfer" and record.outcome == "ok" and record.bytes:
+        UPLOADED_BYTES.inc(record.bytes, network=record.network)
+
+
+add_listener(observe_stage)
+
+
+# ================================================================
+# Экспорт
+# ================================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Опросы Prometheus не засоряют лог
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Поднимает локальный HTTP-эндпоинт /metrics в фоновом потоке."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log(f"Метрики доступны на http://{host}:{server.server_port}/metrics")
+    return server
+
+
+def write_textfile(path: str):
+    """Атомарно записывает метрики в файл (формат textfile collector)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(REGISTRY.render())
+    os.replace(tmp, path)
+
+
+def start_textfile_exporter(path: str, interval: float = 15.0) -> threading.Thread:
+    """Периодически обновляет textfile с метриками в фоновом потоке."""
+    def loop():
+        while True:
+            try:
+                write_textfile(path)
+            except Exception as e:
+                log(f"Не удалось записать метрики в {path}: {e}", level="warning")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-textfile", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporters_from_env():
+    """Включает экспорт метрик по переменным окружения (см. docstring модуля)."""
+    port = os.getenv("FLOWVID_METRICS_PORT")
+    if port:
+        try:
+            start_http_server(int(port), os.getenv("FLOWVID_METRICS_HOST", "127.0.0.1"))
+        except Exception as e:
+            log(f"Не удалось запустить HTTP-эндпоинт метрик: {e}", level="warning")
+
+    textfile = os.getenv("FLOWVID_METRICS_TEXTFILE")
+    if textfile:
+        interval = float(os.getenv("FLOWVID_METRICS_TEXTFILE_INTERVAL", "15"))
+        start_textfile_exporter(textfile, interval)
@@ -0,0 +1,154 @@
+"""
+Структурированные события прогресса загрузки.
+
+UploaderManager создаёт ProgressReporter на каждую сеть и делает его
+текущим для потока (reporting). Дальше:
+    - начало каждого этапа (core.timing.stage) меняет поле stage;
+    - загрузчики сообщают переданные байты через update(sent, total);
+    - менеджер завершает строку finish(url) / fail(error) / cancelled().
+
+Подписчик получает ProgressEvent в потоке загрузки. Для GUI события
+складываются в ProgressBuffer, который Qt-таймер вычитывает с ограниченной
+частотой, — поток загрузки не ждёт event loop.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from core.timing import Span, add_start_listener
+
+
+@dataclass
+class ProgressEvent:
+    network: str
+    stage: str = ""
+    status: str = "queued"          # queued | running | done | error | cancelled
+    sent: int = 0                   # байт передано
+    total: int | None = None        # байт всего (None — неизвестно)
+    rate: float | None = None       # байт/с
+    eta: float | None = None        # секунд до конца передачи
+    url: str | None = None
+    error: str | None = None
+    job: str | None = None          # id задания очереди (core.upload_queue)
+    ts: float = field(default_factory=time.time)
+
+    @property
+    def fraction(self) -> float | None:
+        if self.status == "done":
+            return 1.0
+        if self.total:
+            return min(self.sent / self.total, 1.0)
+        return None
+
+
+ProgressSink = Callable[[ProgressEvent], None]
+
+
+class ProgressReporter:
+    """Считает скорость и ETA для одной сети и отдаёт события в sink."""
+
+    # Сглаживание скорости (экспоненциальное среднее)
+    RATE_ALPHA = 0.3
+
+    def __init__(self, network: str, sink: ProgressSink | None, total: int | None = None):
+        self.network = network
+        self.sink = sink
+        self.event = ProgressEvent(network=network, total=total)
+        self._last: tuple[float, int] | None = None
+
+    def _emit(self, **changes):
+        if self.sink is None:
+            return
+        for name, value in changes.items():
+            setattr(self.event, name, value)
+        self.event.ts = time.time()
+        # Копия: sink может хранить событие, пока мы его меняем
+        self.sink(ProgressEvent(**self.event.__dict__))
+
+    def queued(self):
+        self._emit(status="queued")
+
+    def stage(self, name: str):
+        self._emit(status="running", stage=name)
+
+    def update(self, sent: int, total: int | None = None):
+        now = time.monotonic()
+        rate = self.event.rate
+        if self._last is not None:
+            dt = now - self._last[0]
+            if dt > 0:
+                instant = (sent - self._last[1]) / dt
+                rate = instant if rate is None else rate + self.RATE_ALPHA * (instant - rate)
+        self._last = (now, sent)
+
+        total = total or self.event.total
+        eta = (total - sent) / rate if total and rate else None
+        self._emit(status="running", sent=sent, total=total, rate=rate, eta=eta)
+
+    def finish(self, url: str | None = None):
+        self._emit(status="done", url=url, eta=0.0)
+
+    def fail(self, error: str):
+        self._emit(status="error", error=error)
+
+    def cancelled(self):
+        self._emit(status="cancelled")
+
+
+_local = threading.local()
+
+
+def current() -> ProgressReporter | None:
+    return getattr(_local, "reporter", None)
+
+
+@contextmanager
+def reporting(reporter: ProgressReporter):
+    """Делает reporter текущим для потока на время блока."""
+    previous = current()
+    _local.reporter = reporter
+    try:
+        yield reporter
+    finally:
+        _local.reporter = previous
+
+
+def update(sent: int, total: int | None = None):
+    """Сообщает о переданных байтах текущей загрузки (если есть подписчик)."""
+    reporter = current()
+    if reporter is not None:
+        reporter.update(sent, total)
+
+
+def _on_stage_start(span: Span):
+    reporter = current()
+    if reporter is not None and reporter.network == span.network:
+        reporter.stage(span.stage)
+
+
+add_start_listener(_on_stage_start)
+
+
+class ProgressBuffer:
+    """
+    Потокобезопасный буфер последних событий по сетям.
+
+    push() вызывается из потоков загрузки, drain() — из GUI по таймеру:
+    промежуточные события одной сети (одного задания) схлопываются в последнее.
+    """
+
+    def __init__(self):
+        self._events: Dict[tuple, ProgressEvent] = {}
+        self._lock = threading.Lock()
+
+    def push(self, event: ProgressEvent):
+        with self._lock:
+            self._events[(event.job, event.network)] = event
+
+    def drain(self) -> List[ProgressEvent]:
+        with self._lock:
+            events, self._events = list(self._events.values()), {}
+        return events
@@ -0,0 +1,281 @@
+"""
+Ограничение частоты загрузок и дневные квоты API.
+
+Для каждой сети и каждого аккаунта — token bucket из platform_settings:
+
+    "rate_limit":         {"per_hour": 10, "burst": 3}   # на аккаунт
+    "network_rate_limit": {"per_hour": 30, "burst": 5}   # на сеть целиком
+
+UploaderManager перед загрузкой вызывает RateLimiter.acquire(): если
+токена нет, загрузка ждёт (этап throttle), а не уходит пачкой в сеть,
+чтобы потом упасть на антиспаме. Ответы платформ вида «подождите N секунд»
+(Telegram FloodWaitError, retry_after в результате загрузчика) блокируют
+ведро аккаунта на это время — penalize().
+
+Дневная квота в единицах API (YouTube Data API: videos.insert = 1600):
+
+    "daily_quota": 10000,
+    "quota_costs": {"upload": 1600, "thumbnail": 50},
+
+Квота списывается при acquire() (резерв: параллельные загрузки не
+превысят бюджет), а если загрузка не удалась — несостоявшиеся вызовы API
+возвращаются через refund(). Расход хранится в ./stats/quota.json по
+(сеть, аккаунт, день). День квоты YouTube начинается в полночь по
+тихоокеанскому времени.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from config.networks import NetworkConfig
+from core.cancellation import CancelToken
+from core.timing import stage
+from utils.logger import log
+from utils.paths import stats_dir
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:   # нет базы часовых поясов (Windows без tzdata)
+    QUOTA_TZ = timezone(timedelta(hours=-8))
+
+
+class QuotaExceeded(Exception):
+    """Дневная квота аккаунта исчерпана."""
+
+    def __init__(self, message: str, reset_in: float):
+        super().__init__(message)
+        self.reset_in = reset_in
+
+
+class TokenBucket:
+    """Классический token bucket: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    @classmethod
+    def from_settings(cls, spec: dict | None) -> "TokenBucket | None":
+        if not spec:
+            return None
+        rate = spec.get("per_second") or spec.get("per_minute", 0) / 60 or spec.get("per_hour", 0) / 3600
+        if not rate:
+            return None
+        return cls(rate, spec.get("burst", 1))
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Через сколько секунд можно будет взять tokens."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < tokens:
+            wait = max(wait, (tokens - self.tokens) / self.rate)
+        return wait
+
+    def take(self, tokens: float = 1.0):
+        self._refill(time.monotonic())
+        self.tokens -= tokens
+
+    def block(self, seconds: float):
+        """Ответ платформы «подождите»: токенов нет минимум seconds."""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self.updated = now
+
+
+class QuotaTracker:
+    """Расход дневной квоты API по (сеть, аккаунт)."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(stats_dir(), "quota.json")
+        self._data: dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    @staticmethod
+    def today() -> str:
+        return datetime.now(QUOTA_TZ).date().isoformat()
+
+    @staticmethod
+    def reset_in() -> float:
+        """Секунд до начала следующего дня квоты."""
+        now = datetime.now(QUOTA_TZ)
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - now).total_seconds()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except Exception as e:
+            log(f"Не удалось прочитать расход квот {self.path}: {e}", level="warning")
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log(f"Не удалось сохранить расход квот: {e}", level="warning")
+
+    def used(self, key: str) -> int:
+        with self._lock:
+            entry = self._data.get(key)
+            if not entry or entry.get("day") != self.today():
+                return 0
+            return entry.get("used", 0)
+
+    def charge(self, key: str, units: int):
+        with self._lock:
+            used = self.used(key) + units
+            self._data[key] = {"day": self.today(), "used": used}
+            self._save()
+
+    def refund(self, key: str, units: int):
+        """Возвращает списанные units (вызовы API не состоялись)."""
+        with self._lock:
+            if self.used(key) == 0:
+                return          # день квоты сменился — возвращать нечего
+            self._data[key] = {"day": self.today(), "used": max(0, self.used(key) - units)}
+            self._save()
+
+    def exhaust(self, key: str, budget: int):
+        """Платформа ответила quotaExceeded — считаем квоту израсходованной."""
+        with self._lock:
+            self._data[key] = {"day": self.today(), "used": max(budget, self.used(key))}
+            self._save()
+
+
+class RateLimiter:
+    """Singleton. Вёдра токенов по сетям и аккаунтам плюс дневные квоты."""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self._buckets: dict[str, TokenBucket | None] = {}
+        self._buckets_lock = threading.Lock()
+        self.quota = QuotaTracker()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Ключи и настройки
+    # ================================================================
+    @staticmethod
+    def _account_key(cfg: NetworkConfig) -> str:
+        return f"{cfg.key}/{cfg.account.key if cfg.account else 'default'}"
+
+    def _bucket(self, key: str, spec: dict | None) -> TokenBucket | None:
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket.from_settings(spec)
+        return self._buckets[key]
+
+    def _buckets_for(self, cfg: NetworkConfig) -> list[TokenBucket]:
+        settings = cfg.platform_settings or {}
+        buckets = [
+            self._bucket(cfg.key, settings.get("network_rate_limit")),
+            self._bucket(self._account_key(cfg), settings.get("rate_limit")),
+        ]
+        return [b for b in buckets if b is not None]
+
+    @staticmethod
+    def quota_units(cfg: NetworkConfig, thumbnail: bool = False) -> int:
+        """Стоимость одной загрузки в единицах квоты API (0 — квоты нет)."""
+        costs = (cfg.platform_settings or {}).get("quota_costs") or {}
+        return costs.get("upload", 0) + (costs.get("thumbnail", 0) if thumbnail else 0)
+
+    def quota_left(self, cfg: NetworkConfig) -> int | None:
+        budget = (cfg.platform_settings or {}).get("daily_quota")
+        if budget is None:
+            return None
+        return budget - self.quota.used(self._account_key(cfg))
+
+    # ================================================================
+    # Основные операции
+    # ================================================================
+    def delay(self, cfg: NetworkConfig, units: int = 0) -> float:
+        """Сколько секунд аккаунт не сможет начать загрузку."""
+        left = self.quota_left(cfg)
+        if left is not None and units and left < units:
+            return self.quota.reset_in()
+        with self._buckets_lock:
+            return max((b.delay() for b in self._buckets_for(cfg)), default=0.0)
+
+    def acquire(self, cfg: NetworkConfig, cancel: CancelToken, units: int = 0):
+        """
+        Ждёт токен сети и аккаунта и списывает units квоты.
+        QuotaExceeded — квоты на сегодня не хватает (ждать до сброса не стоит).
+        """
+        left = self.quota_left(cfg)
+        if left is not None and units and left < units:
+            reset_in = self.quota.reset_in()
+            raise QuotaExceeded(
+                f"дневная квота исчерпана (осталось {left}, нужно {units}), "
+                f"сброс через {reset_in / 3600:.1f} ч",
+                reset_in,
+            )
+
+        with self._buckets_lock:
+            wait = max((b.delay() for b in self._buckets_for(cfg)), default=0.0)
+            if wait <= 0:
+                self._take(cfg, units)
+                return
+
+        with stage("throttle", record_stats=False):
+            log(f"[{self._account_key(cfg)}] Лимит частоты: ожидание {wait:.0f} с")
+            while True:
+                cancel.sleep(min(wait, 5.0))
+                with self._buckets_lock:
+                    wait = max((b.delay() for b in self._buckets_for(cfg)), default=0.0)
+                    if wait <= 0:
+                        self._take(cfg, units)
+                        return
+
+    def _take(self, cfg: NetworkConfig, units: int):
+        for bucket in self._buckets_for(cfg):
+            bucket.take()
+        if units:
+            self.quota.charge(self._account_key(cfg), units)
+
+    def refund(self, cfg: NetworkConfig, units: int):
+        """Загрузка не удалась: единицы квоты, которые она не потратила, возвращаются."""
+        if units:
+            self.quota.refund(self._account_key(cfg), units)
+            log(f"[{self._account_key(cfg)}] Возвращено {units} ед. квоты API")
+
+    def penalize(self, cfg: NetworkConfig, seconds: float):
+        """Платформа попросила подождать: блокируем ведро аккаунта."""
+        key = self._account_key(cfg)
+        with self._buckets_lock:
+            bucket = self._bucket(key, (cfg.platform_settings or {}).get("rate_limit"))
+            if bucket is None:
+                # Лимит не настроен — заводим ведро на 1 загрузку/мин только ради паузы
+                bucket = self._buckets[key] = TokenBucket(1 / 60, 1)
+            bucket.block(seconds)
+        log(f"[{key}] Платформа просит подождать {seconds:.0f} с", level="warning")
+
+    def exhaust_quota(self, cfg: NetworkConfig):
+        budget = (cfg.platform_settings or {}).get("daily_quota")
+        if budget is not None:
+            self.quota.exhaust(self._account_key(cfg), budget)
+            log(f"[{self._account_key(cfg)}] Квота API исчерпана до конца дня", level="warning")
@@ -0,0 +1,160 @@
+"""
+Политики повторных попыток загрузки.
+
+Ошибка классифицируется как временная (таймаут, обрыв соединения, 5xx,
+«подождите N секунд») или окончательная (нет файла, исчерпана квота,
+отказ платформы). Временные ошибки повторяются с экспоненциальной
+паузой и случайным разбросом (jitter), чтобы параллельные загрузки не
+возвращались к платформе одновременно.
+
+Настройки сети (platform_settings["retry"]), все ключи необязательны:
+
+    "retry": {
+        "attempts": 3,            # всего попыток, включая первую
+        "base_delay": 10,         # пауза перед 2-й попыткой, с
+        "max_delay": 300,         # верхняя граница паузы
+        "multiplier": 2,
+        "jitter": 0.5,            # пауза случайно уменьшается до 50 %
+        "max_retry_after": 900,   # дольше «подождите N с» не ждём — ошибка окончательная
+        "transient": ["RuntimeError"],      # дополнительные временные типы ошибок
+        "fatal": ["ElementNotInteractableException"],
+        "transient_markers": ["502"],       # подстроки текста ошибки
+    }
+
+Типы ошибок сравниваются по имени класса и его предков — selenium,
+googleapiclient и telethon не импортируются ради классификации.
+"""
+
+import random
+from dataclasses import dataclass, field
+
+from config.networks import NetworkConfig
+
+
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+# Сравниваются с именами классов всей иерархии исключения
+TRANSIENT_ERRORS = (
+    "TimeoutError",
+    "TimeoutException",          # selenium
+    "ConnectionError",
+    "WebDriverException",        # selenium: упавшая вкладка/сессия
+    "ServerError",               # telethon: 5xx
+    "FloodError",                # telethon: FloodWaitError
+    "TimedOutError",             # telethon
+    "ResumableUploadError",      # googleapiclient
+)
+FATAL_ERRORS = (
+    "FileNotFoundError",
+    "PermissionError",
+    "NotImplementedError",
+    "ValueError",
+    "QuotaExceeded",             # core/rate_limit.py
+    "AuthKeyError",              # telethon: сессия недействительна
+    "UnauthorizedError",         # telethon
+    "RefreshError",              # google-auth: токен отозван
+)
+TRANSIENT_MARKERS = (
+    "timed out",
+    "timeout",
+    "connection reset",
+    "connection aborted",
+    "temporarily unavailable",
+    "try again",
+)
+
+
+def error_types(error: BaseException) -> list[str]:
+    """Имена класса исключения и его предков — для результата-словаря загрузчика."""
+    return [c.__name__ for c in type(error).__mro__]
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 3
+    base_delay: float = 10.0
+    max_delay: float = 300.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+    max_retry_after: float = 900.0
+    transient: tuple[str, ...] = TRANSIENT_ERRORS
+    fatal: tuple[str, ...] = FATAL_ERRORS
+    transient_markers: tuple[str, ...] = TRANSIENT_MARKERS
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    @classmethod
+    def for_network(cls, cfg: NetworkConfig) -> "RetryPolicy":
+        spec = (cfg.platform_settings or {}).get("retry") or {}
+        policy = cls()
+        for name in ("attempts", "base_delay", "max_delay", "multiplier", "jitter", "max_retry_after"):
+            if name in spec:
+                setattr(policy, name, type(getattr(policy, name))(spec[name]))
+        policy.transient = TRANSIENT_ERRORS + tuple(spec.get("transient", ()))
+        policy.fatal = FATAL_ERRORS + tuple(spec.get("fatal", ()))
+        policy.transient_markers = TRANSIENT_MARKERS + tuple(m.lower() for m in spec.get("transient_markers", ()))
+        return policy
+
+    # ================================================================
+    # Классификация
+    # ================================================================
+    def classify(self, failure) -> str:
+        """
+        failure — исключение загрузчика или его результат-словарь
+        ({"success": False, "error": ..., "error_types": [...],
+        "transient"/"retry_after"/...}). error_types — имена класса
+        исключения и его предков (error_types(e)); без них словарь
+        сравнивается только по error_type.
+        """
+        if isinstance(failure, BaseException):
+            names = {c.__name__ for c in type(failure).__mro__}
+            text = str(failure)
+        elif isinstance(failure, dict):
+            if failure.get("quota_exceeded"):
+                return FATAL
+            if "transient" in failure:
+                return TRANSIENT if failure["transient"] else FATAL
+            if failure.get("retry_after"):
+                return self._retry_after_kind(failure["retry_after"])
+            names = set(failure.get("error_types") or ())
+            if failure.get("error_type"):
+                names.add(failure["error_type"])
+            text = str(failure.get("error", ""))
+        else:
+            names, text = set(), str(failure or "")
+
+        if names & set(self.fatal):
+            return FATAL
+        retry_after = getattr(failure, "seconds", None)
+        if "FloodWaitError" in names and retry_after is not None:
+            return self._retry_after_kind(retry_after)
+        if names & set(self.transient):
+            return TRANSIENT
+        lowered = text.lower()
+        if any(marker in lowered for marker in self.transient_markers):
+            return TRANSIENT
+        return FATAL
+
+    def _retry_after_kind(self, seconds) -> str:
+        return TRANSIENT if float(seconds) <= self.max_retry_after else FATAL
+
+    # ================================================================
+    # Пауза
+    # ================================================================
+    def backoff(self, attempt: int, failure=None) -> float:
+        """
+        Пауза после неудачной попытки номер attempt (с 1):
+        base_delay * multiplier^(attempt-1), не больше max_delay,
+        уменьшенная случайно на долю до jitter. Если платформа назвала
+        время ожидания (retry_after), ждём не меньше него.
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        delay *= 1.0 - self.jitter * self.rng.random()
+        retry_after = None
+        if isinstance(failure, dict):
+            retry_after = failure.get("retry_after")
+        elif failure is not None:
+            retry_after = getattr(failure, "seconds", None)
+        if retry_after:
+            delay = max(delay, float(retry_after))
+        return delay
@@ -0,0 +1,488 @@
+"""
+Планировщик отложенных публикаций.
+
+Пост (ScheduledPost) — видео, метаданные, сети и время публикации.
+Для каждого поста строятся задачи (ScheduledTask) в очереди с приоритетом
+по времени запуска:
+
+    - preupload — сети с supports_scheduling (YouTube): видео загружается
+      заранее приватным с publishAt, платформа публикует его сама.
+      Тяжёлые файлы переносятся в окно низкой нагрузки (off-peak),
+      если передача успевает закончиться до публикации;
+    - publish — остальные сети: загрузка стартует «точно в срок»,
+      за ожидаемую длительность (история этапов StageStats) до публикации.
+
+Расписание хранится в ./data/schedule.json и переживает перезапуск.
+Новые посты и отмены принимаются через папку ./data/schedule_inbox:
+её может пополнять любой процесс (GUI, CLI), а выполняет задачи
+только один владелец расписания (блокировка schedule.lock).
+
+Настройки (.env):
+    FLOWVID_OFFPEAK=01:00-07:00        окно для тяжёлых передач (пусто — выкл.)
+    FLOWVID_OFFPEAK_MIN_MB=200         с какого размера файл считается тяжёлым
+    FLOWVID_SCHEDULE_MARGIN=600        запас (с) между концом предзагрузки и публикацией
+    FLOWVID_SCHEDULER_WORKERS=2        сколько задач выполняется одновременно
+"""
+
+import heapq
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config.networks import NETWORKS
+from core.cancellation import CancelToken, CancelledError
+from core.journal import Journal
+from core.progress import ProgressEvent, ProgressSink
+from core.stage_stats import MB, StageStats
+from core.uploader_manager import UploaderManager
+from utils.filelock import try_lock
+from utils.logger import log
+from utils.paths import data_dir
+
+
+# Оценка длительности загрузки, пока нет истории этапов
+FALLBACK_BASE = 120.0      # секунд на открытие, авторизацию, публикацию
+FALLBACK_PER_MB = 0.5      # секунд на каждый МБ файла
+
+# Как часто демон проверяет входящие заявки, если задач нет
+INBOX_POLL = 5.0
+
+
+def parse_window(text: str | None) -> tuple[int, int] | None:
+    """'01:00-07:00' → (60, 420) в минутах от полуночи; пустая строка → None."""
+    if not text or not text.strip():
+        return None
+
+    def minutes(hm: str) -> int:
+        hours, _, mins = hm.strip().partition(":")
+        return int(hours) * 60 + int(mins or 0)
+
+    start, end = text.split("-", 1)
+    return minutes(start), minutes(end)
+
+
+def offpeak_start(after: float, deadline: float, duration: float, window: tuple[int, int] | None) -> float | None:
+    """
+    Ближайший момент ≥ after внутри окна off-peak (локальное время),
+    стартовав в который, передача длительностью duration успевает до deadline.
+    Окно может переходить через полночь (23:00-06:00). None — такого нет.
+    """
+    if window is None:
+        return None
+    start_min, end_min = window
+    length = (end_min - start_min) % (24 * 60) or 24 * 60
+
+    day = datetime.fromtimestamp(after).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    while True:
+        w_start = (day + timedelta(minutes=start_min)).timestamp()
+        w_end = w_start + length * 60
+        candidate = max(w_start, after)
+        if candidate + duration > deadline:
+            return None
+        if candidate < w_end:
+            return candidate
+        day += timedelta(days=1)
+
+
+@dataclass
+class ScheduledPost:
+    """Видео с метаданными, которое должно выйти в publish_at (unix-время)."""
+    video_file: str
+    networks: list[str]
+    publish_at: float
+    title: str = ""
+    description: str = ""
+    tags: list[str] = field(default_factory=list)
+    thumbnail: str | None = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "scheduled"       # scheduled | running | done | error | cancelled
+    results: dict = field(default_factory=dict)   # {network: {"status", "url"|"error", "kind"}}
+    created: float = field(default_factory=time.time)
+
+    @property
+    def name(self) -> str:
+        return Path(self.video_file).name
+
+    @property
+    def publish_datetime(self) -> datetime:
+        return datetime.fromtimestamp(self.publish_at)
+
+
+@dataclass(order=True)
+class ScheduledTask:
+    """Запуск загрузки поста на часть сетей в момент run_at."""
+    run_at: float
+    post_id: str = field(compare=False)
+    networks: list[str] = field(compare=False, default_factory=list)
+    kind: str = field(compare=False, default="publish")    # preupload | publish
+
+
+class Scheduler:
+    """
+    Singleton. Расписание отложенных публикаций и демон, который
+    выполняет задачи в срок (см. описание модуля).
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, root: str | None = None):
+        self.root = root or data_dir()
+        self.path = os.path.join(self.root, "schedule.json")
+        self.inbox = os.path.join(self.root, "schedule_inbox")
+        os.makedirs(self.inbox, exist_ok=True)
+
+        self.offpeak = parse_window(os.getenv("FLOWVID_OFFPEAK", "01:00-07:00"))
+        self.offpeak_min_bytes = float(os.getenv("FLOWVID_OFFPEAK_MIN_MB", "200")) * MB
+        self.margin = float(os.getenv("FLOWVID_SCHEDULE_MARGIN", "600"))
+        self.workers = max(1, int(os.getenv("FLOWVID_SCHEDULER_WORKERS", "2")))
+
+        self.posts: dict[str, ScheduledPost] = {}
+        self._heap: list[ScheduledTask] = []
+        self._active: list[ScheduledTask] = []
+        self._tokens: dict[str, CancelToken] = {}
+        self._cond = threading.Condition(threading.RLock())
+        self._slots = threading.Semaphore(self.workers)
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._owner_lock = None
+        # Ход загрузок по расписанию (ProgressEvent.job = id поста), например панель GUI
+        self.on_progress: ProgressSink | None = None
+        self._loaded_mtime: float | None = None
+        self._load()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Хранение
+    # ================================================================
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            self._loaded_mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self.posts = {p["id"]: ScheduledPost(**p) for p in raw.get("posts", [])}
+            # Задачи, прерванные остановкой процесса, лежат в том же списке
+            # и выполнятся заново
+            self._heap = [ScheduledTask(**t) for t in raw.get("tasks", [])]
+            heapq.heapify(self._heap)
+        except Exception as e:
+            log(f"Не удалось прочитать расписание {self.path}: {e}", level="warning")
+            return
+        for post in self.posts.values():
+            if post.status == "running":
+                post.status = "scheduled"
+
+    def _save(self):
+        data = {
+            "posts": [asdict(p) for p in self.posts.values()],
+            "tasks": [asdict(t) for t in [*self._heap, *self._active]],
+        }
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log(f"Не удалось сохранить расписание: {e}", level="warning")
+
+    # ================================================================
+    # Заявки (из любого процесса)
+    # ================================================================
+    @staticmethod
+    def _write_request(root: str | None, name: str, request: dict):
+        inbox = os.path.join(root or data_dir(), "schedule_inbox")
+        os.makedirs(inbox, exist_ok=True)
+        path = os.path.join(inbox, f"{time.time_ns()}-{name}.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(request, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+    @staticmethod
+    def submit(post: ScheduledPost, root: str | None = None) -> ScheduledPost:
+        """Отправляет пост владельцу расписания (демону или GUI)."""
+        Scheduler._write_request(root, post.id, {"op": "add", "post": asdict(post)})
+        return post
+
+    @staticmethod
+    def request_cancel(post_id: str, root: str | None = None):
+        Scheduler._write_request(root, post_id, {"op": "cancel", "id": post_id})
+
+    def pending_requests(self) -> int:
+        return sum(1 for name in os.listdir(self.inbox) if name.endswith(".json"))
+
+    def _ingest_inbox(self):
+        # Ошибки файловой системы не должны останавливать цикл планировщика
+        try:
+            names = sorted(os.listdir(self.inbox))
+        except OSError as e:
+            log(f"Папка заявок планировщика недоступна: {e}", level="warning")
+            return
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.inbox, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    request = json.load(f)
+            except FileNotFoundError:
+                continue            # заявку уже забрали
+            except Exception as e:
+                log(f"Некорректная заявка планировщику {name}: {e}", level="warning")
+                request = None
+            try:
+                # Удаляем до применения: заявка, которую не удалось удалить,
+                # не должна применяться на каждом круге цикла
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log(f"Не удалось удалить заявку планировщику {name}: {e}", level="warning")
+                continue
+            if request is None:
+                continue
+            try:
+                if request.get("op") == "add":
+                    self.add(ScheduledPost(**request["post"]))
+                elif request.get("op") == "cancel":
+                    self.cancel(request["id"])
+            except Exception as e:
+                log(f"Некорректная заявка планировщику {name}: {e}", level="warning")
+
+    # ================================================================
+    # Планирование
+    # ================================================================
+    @staticmethod
+    def estimate(network: str, size_bytes: int | None) -> float:
+        """Ожидаемая (p95) длительность загрузки на сеть."""
+        expected = StageStats.instance().expected_duration(network, size_bytes, q=0.95)
+        if expected is None:
+            expected = FALLBACK_BASE + FALLBACK_PER_MB * (size_bytes or 0) / MB
+        return expected
+
+    def plan(self, post: ScheduledPost, now: float | None = None) -> list[ScheduledTask]:
+        now = time.time() if now is None else now
+        try:
+            size = os.path.getsize(post.video_file)
+        except OSError:
+            size = None
+
+        configs = {net.key: net for net in NETWORKS}
+        ahead = [n for n in post.networks if n in configs and configs[n].supports_scheduling]
+        live = [n for n in post.networks if n not in ahead]
+
+        tasks = []
+        if ahead:
+            run_at = now
+            if size and size >= self.offpeak_min_bytes:
+                duration = max(self.estimate(n, size) for n in ahead)
+                deadline = post.publish_at - self.margin
+                run_at = offpeak_start(now, deadline, duration, self.offpeak) or now
+            tasks.append(ScheduledTask(run_at, post.id, ahead, "preupload"))
+
+        for network in live:
+            run_at = max(now, post.publish_at - self.estimate(network, size))
+            tasks.append(ScheduledTask(run_at, post.id, [network], "publish"))
+        return tasks
+
+    def add(self, post: ScheduledPost) -> ScheduledPost:
+        with self._cond:
+            self.posts[post.id] = post
+            for task in self.plan(post):
+                heapq.heappush(self._heap, task)
+                log(
+                    f"[SCHEDULE] {post.name}: {task.kind} {','.join(task.networks)} "
+                    f"в {datetime.fromtimestamp(task.run_at):%Y-%m-%d %H:%M}, "
+                    f"публикация {post.publish_datetime:%Y-%m-%d %H:%M}"
+                )
+            self._save()
+            self._cond.notify()
+        return post
+
+    def cancel(self, post_id: str):
+        with self._cond:
+            post = self.posts.get(post_id)
+            if not post or post.status in ("done", "error", "cancelled"):
+                return
+            post.status = "cancelled"
+            self._heap = [t for t in self._heap if t.post_id != post_id]
+            heapq.heapify(self._heap)
+            token = self._tokens.get(post_id)
+            self._save()
+            self._cond.notify()
+        if token:
+            token.cancel()
+        log(f"[SCHEDULE] Публикация {post_id} отменена")
+
+    def all_posts(self) -> list[ScheduledPost]:
+        with self._cond:
+            return sorted(self.posts.values(), key=lambda p: p.publish_at)
+
+    def status(self, post_id: str) -> ScheduledPost | None:
+        """
+        Текущее состояние поста. Если расписанием владеет другой процесс
+        (daemon.py), посты перечитываются из его schedule.json, когда тот
+        изменился.
+        """
+        with self._cond:
+            if self._thread is None:
+                self._reload_posts()
+            return self.posts.get(post_id)
+
+    def _reload_posts(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self.posts = {p["id"]: ScheduledPost(**p) for p in raw.get("posts", [])}
+            self._loaded_mtime = mtime
+        except (OSError, ValueError, TypeError) as e:
+            log(f"Не удалось перечитать расписание {self.path}: {e}", level="warning")
+
+    def next_runs(self) -> list[ScheduledTask]:
+        with self._cond:
+            return sorted(self._heap)
+
+    # ================================================================
+    # Демон
+    # ================================================================
+    def start(self) -> bool:
+        """
+        Запускает выполнение задач, если расписанием ещё не владеет
+        другой процесс. False — владелец уже есть (заявки дойдут до него).
+        """
+        if self._thread:
+            return True
+        self._owner_lock = try_lock(os.path.join(self.root, "schedule.lock"))
+        if self._owner_lock is None:
+            log("Планировщик уже запущен другим процессом", level="info")
+            return False
+        # Прерванные сбоем задачи выполнятся заново из schedule.json; журнал
+        # подскажет UploaderManager, какие сети уже опубликованы
+        Journal.instance().recover(("scheduler",))
+        self._stopping = False
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+        log(f"Планировщик запущен: задач {len(self._heap)}, воркеров {self.workers}")
+        return True
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            tokens = list(self._tokens.values())
+            self._cond.notify_all()
+        for token in tokens:
+            token.cancel()
+        self._thread = None
+        if self._owner_lock:
+            self._owner_lock.close()
+            self._owner_lock = None
+
+    def _next_due(self) -> ScheduledTask | None:
+        with self._cond:
+            now = time.time()
+            if self._heap and self._heap[0].run_at <= now:
+                task = heapq.heappop(self._heap)
+                self._active.append(task)
+                self._save()
+                return task
+            wait = INBOX_POLL
+            if self._heap:
+                wait = min(wait, self._heap[0].run_at - now)
+            self._cond.wait(max(wait, 0.05))
+            return None
+
+    def _loop(self):
+        while not self._stopping:
+            self._ingest_inbox()
+            task = self._next_due()
+            if task is None:
+                continue
+            while not self._slots.acquire(timeout=1.0):
+                if self._stopping:
+                    return
+            threading.Thread(target=self._run, args=(task,), name=f"scheduled-{task.post_id}", daemon=True).start()
+
+    def _run(self, task: ScheduledTask):
+        try:
+            with self._cond:
+                post = self.posts.get(task.post_id)
+                if not post or post.status == "cancelled":
+                    return
+                post.status = "running"
+                token = self._tokens.setdefault(post.id, CancelToken())
+
+            # publishAt в прошлом платформа отвергнет — тогда публикуем сразу
+            publish_at = None
+            if task.kind == "preupload" and post.publish_at > time.time() + 60:
+                publish_at = datetime.fromtimestamp(post.publish_at).astimezone()
+
+            def forward(ev: ProgressEvent):
+                ev.job = post.id
+                if self.on_progress:
+                    self.on_progress(ev)
+
+            log(f"[SCHEDULE] Старт {task.kind} {post.name} → {', '.join(task.networks)}")
+            try:
+                result = UploaderManager.upload(
+                    post.video_file, task.networks, post.title, post.description,
+                    post.tags, post.thumbnail,
+                    cancel=token,
+                    on_progress=forward,
+                    publish_at=publish_at,
+                    job_id=f"{post.id}:{task.kind}:{'+'.join(task.networks)}",
+                    origin="scheduler",
+                    deadline=post.publish_at,
+                )
+            except CancelledError:
+                result = {"cancelled": True}
+            except Exception as e:
+                result = {"errors": [f"{n}: {e}" for n in task.networks]}
+
+            self._finish(post, task, result)
+        finally:
+            with self._cond:
+                # Задачи равны при равном run_at (dataclass order) — убираем именно эту
+                self._active = [t for t in self._active if t is not task]
+                self._save()
+            self._slots.release()
+
+    def _finish(self, post: ScheduledPost, task: ScheduledTask, result: dict):
+        errors = result.get("errors", [])
+        with self._cond:
+            for network in task.networks:
+                error = next((e.split(": ", 1)[-1] for e in errors if e.startswith(f"{network}:")), None)
+                if result.get("cancelled"):
+                    entry = {"status": "cancelled"}
+                elif error:
+                    entry = {"status": "error", "error": error}
+                else:
+                    entry = {"status": "done", "url": UploaderManager._result_url(result.get("results", {}).get(network))}
+                post.results[network] = {**entry, "kind": task.kind}
+
+            if post.status == "cancelled" or result.get("cancelled"):
+                post.status = "cancelled"
+            elif all(n in post.results for n in post.networks):
+                failed = any(r["status"] != "done" for r in post.results.values())
+                post.status = "error" if failed else "done"
+            else:
+                post.status = "scheduled"   # остальные сети ещё ждут своего времени
+            if post.status != "scheduled":
+                self._tokens.pop(post.id, None)
+        log(f"[SCHEDULE] {post.name}: {task.kind} завершён, статус поста {post.status}")
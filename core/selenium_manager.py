@@ -1,25 +1,39 @@
+import os
 import threading
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import WebDriverException
+from contextlib import contextmanager, nullcontext
+from core import driver_profiler
+from core.chrome_binaries import ChromeResolver
+from core.chrome_governor import ChromeGovernor
+from core.tab_pool import BACKGROUND_FLAGS, BrowserPipeline, TabPool, close_window
 from core.browser_profile import BrowserProfile
+from core.timing import stage
+from core.metrics import CHROME_DRIVERS
 from utils.logger import log
 from utils.paths import site_profile
 import time
-from typing import Dict
+from typing import Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from core.checkpoint import Checkpoint
 
 class SeleniumManager:
     """
     Singleton manager. Хранит драйверы по имени профиля.
     start(profile_name) -> webdriver.Chrome
     stop(profile_name) / stop_all()
+    tab(profile_name) — вкладка загрузки (core/tab_pool.py)
     """
     _instance = None
     _lock = threading.Lock()
 
     def __init__(self):
-        self._drivers: Dict[str, webdriver.Chrome] = {}
+        self._drivers: Dict[str, "webdriver.Chrome"] = {}
+        self._pools: Dict[str, TabPool] = {}
+        self._held: Dict[str, set] = {}         # без пула: вкладки загрузок, ждущих повтора
         self._drivers_lock = threading.RLock()
+        self._profile_locks: Dict[str, threading.Lock] = {}   # запуск/перезапуск одного профиля
+        self._users = 0
 
     @classmethod
     def instance(cls):
@@ -34,17 +48,48 @@ class SeleniumManager:
         Если драйвер уже запущен — вернёт существующий.
         """
         extra_args = extra_args or []
+        # Без окна (сервер, бенчмарк): FLOWVID_HEADLESS=1
+        headless = headless or os.getenv("FLOWVID_HEADLESS", "") == "1"
+        governor = ChromeGovernor.instance()
+        tabs = BrowserPipeline.instance().tabs
+        with self._drivers_lock:
+            profile_lock = self._profile_locks.setdefault(profile_name, threading.Lock())
+        # Профиль запускается и перезапускается одним потоком: новый Chrome
+        # стартует только после того, как старый добит
+        with profile_lock:
+            return self._start(profile_name, headless, extra_args, timeout, governor, tabs)
+
+    def _start(self, profile_name: str, headless: bool, extra_args: list, timeout: int,
+               governor: ChromeGovernor, tabs: int):
+        # Selenium импортируется лениво — только при первом запуске браузера
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.common.exceptions import WebDriverException
+
+        stopped = None
         with self._drivers_lock:
             if profile_name in self._drivers:
                 try:
                     # quick alive check
                     _ = self._drivers[profile_name].title
-                    log(f"Reusing existing driver for profile {profile_name}")
-                    return self._drivers[profile_name]
+                    reason = governor.recycle_reason(profile_name)
+                    # В других вкладках идут загрузки — перезапуск подождёт
+                    pool = self._pools.get(profile_name)
+                    held = pool.busy if pool else bool(self._held.get(profile_name))
+                    if reason is None or held:
+                        log(f"Reusing existing driver for profile {profile_name}")
+                        return self._drivers[profile_name]
+                    # Раздувшийся или старый Chrome перезапускается между загрузками
+                    governor.recycled(profile_name, reason)
+                    stopped = self._detach(profile_name)
                 except Exception:
                     log(f"Existing driver for {profile_name} не отвечает — перезапускаем", level="warning")
-                    self.stop(profile_name)
+                    stopped = self._detach(profile_name)
+        # Ожидание выхода процессов — без блокировки: другие профили не ждут
+        if stopped:
+            governor.reap(*stopped)
 
+        with self._drivers_lock:
             # ensure profile lock removed
             BrowserProfile.remove_lock(profile_name)
 
@@ -59,46 +104,203 @@ class SeleniumManager:
             options.add_argument("--no-sandbox")
             options.add_argument("--disable-dev-shm-usage")
             options.add_argument("--disable-extensions")
+            if tabs > 1:
+                for a in BACKGROUND_FLAGS:
+                    options.add_argument(a)
             for a in extra_args:
                 options.add_argument(a)
 
+            # Пути к Chrome/chromedriver — из кэша, без Selenium Manager на каждом запуске
+            resolver = ChromeResolver.instance()
+            resolver.apply(options)
+
             try:
                 log(f"Запуск Chrome для профиля {profile_name} (path={profile_path})")
-                driver = webdriver.Chrome(options=options)  # CDP встроенный
-                # wait for browser to be usable
-                started = False
-                start_ts = time.time()
-                while time.time() - start_ts < timeout:
-                    try:
-                        _ = driver.current_url  # will raise if not ready
-                        started = True
-                        break
-                    except Exception:
-                        time.sleep(0.2)
-                if not started:
-                    log("Chrome запустился, но не отвечает в отведённое время", level="warning")
+                with stage("chrome_launch") as span:
+                    driver = webdriver.Chrome(service=resolver.service(), options=options)  # CDP встроенный
+                    # wait for browser to be usable
+                    started = False
+                    start_ts = time.time()
+                    while time.time() - start_ts < timeout:
+                        try:
+                            _ = driver.current_url  # will raise if not ready
+                            started = True
+                            break
+                        except Exception:
+                            time.sleep(0.2)
+                    if not started:
+                        span.outcome = "timeout"
+                        log("Chrome запустился, но не отвечает в отведённое время", level="warning")
+                profiler = driver_profiler.DriverProfiler.instance()
+                if profiler.enabled:
+                    profiler.attach(driver)
+                if tabs > 1:
+                    self._pools[profile_name] = TabPool(driver)
                 self._drivers[profile_name] = driver
+                governor.launched(profile_name, driver)
+                CHROME_DRIVERS.set(len(self._drivers))
                 return driver
             except WebDriverException as e:
                 log(f"Ошибка запуска Chrome: {e}", level="error")
+                # Возможно, Chrome обновился на месте — при следующем запуске пути ищутся заново
+                resolver.invalidate()
                 raise
 
     def stop(self, profile_name: str):
         with self._drivers_lock:
-            drv = self._drivers.pop(profile_name, None)
-            if drv:
-                try:
-                    drv.quit()
-                except Exception:
+            stopped = self._detach(profile_name)
+        if stopped:
+            ChromeGovernor.instance().reap(*stopped)
+
+    def _detach(self, profile_name: str):
+        """
+        Закрывает драйвер профиля (под _drivers_lock). Возвращает аргументы
+        ChromeGovernor.reap — процессы, пережившие quit(), добиваются по pid
+        уже без блокировки: ожидание их выхода не должно держать другие профили.
+        """
+        drv = self._drivers.pop(profile_name, None)
+        self._pools.pop(profile_name, None)
+        self._held.pop(profile_name, None)
+        CHROME_DRIVERS.set(len(self._drivers))
+        if not drv:
+            return None
+        governor = ChromeGovernor.instance()
+        pids = governor.snapshot(profile_name, drv)
+        governor.forget(profile_name)
+        try:
+            drv.quit()
+        except Exception:
+            log(f"Не удалось корректно закрыть драйвер для {profile_name}", level="warning")
+        return profile_name, pids
+
+    @contextmanager
+    def tab(self, profile_name: str, checkpoint: "Checkpoint | None" = None):
+        """
+        Вкладка для загрузки в драйвере профиля (запущенном через start).
+
+        При FLOWVID_BROWSER_TABS > 1 — своя вкладка из пула: команды потока
+        идут в неё, пока в других вкладках ждут обработки другие загрузки.
+        Иначе — текущая вкладка, как раньше.
+
+        checkpoint["_handle"] — вкладка прошлой попытки. Если попытка
+        упала после того, как отметила в точке свою вкладку, вкладка
+        откладывается до повтора: пока идёт пауза перед ним, другие
+        загрузки профиля её не получат и не уведут со страницы. Отложенную
+        вкладку освобождает drop_tab, когда повтора не будет.
+
+        Возвращает выданную вкладку: продолжать в вкладке прошлой попытки
+        можно, только если выдана именно она.
+        """
+        hint = checkpoint.get("_handle") if checkpoint else None
+
+        def hold(handle: str | None) -> bool:
+            # Вкладка отмечена в точке — в ней есть что продолжать
+            return handle is not None and checkpoint is not None and checkpoint.get("_handle") == handle
+
+        with self._drivers_lock:
+            drv = self._drivers.get(profile_name)
+            pool = self._pools.get(profile_name)
+        if pool is not None:
+            with pool.lease(hint, hold) as handle:
+                yield handle
+            return
+        if drv is None:
+            yield None
+            return
+
+        # Одна загрузка на профиль: вкладка прошлой попытки — её, если открыта
+        with self._drivers_lock:
+            held = self._held.setdefault(profile_name, set())
+            opened = False
+            if hint in held and hint in drv.window_handles:
+                held.discard(hint)
+                handle = hint
+            else:
+                handle = drv.current_window_handle
+                if handle in held:
+                    # В текущей вкладке ждёт повтора другая загрузка — открываем свою
+                    drv.switch_to.new_window("tab")
+                    handle = drv.current_window_handle
+                    opened = True
+        ok = False
+        try:
+            yield handle
+            ok = True
+        finally:
+            with self._drivers_lock:
+                if not ok and hold(handle):
+                    held.add(handle)
+                elif ok and opened:
                     try:
-                        # best-effort kill processes for profile (platform dependent)
-                        log(f"Не удалось корректно закрыть драйвер для {profile_name}", level="warning")
-                    except Exception:
-                        pass
+                        close_window(drv, handle)
+                    except Exception as e:
+                        log(f"Не удалось закрыть вкладку {handle}: {e}", level="warning")
+
+    def drop_tab(self, profile_name: str, handle: str | None):
+        """Повтора загрузки не будет: её отложенная вкладка снова доступна всем."""
+        with self._drivers_lock:
+            pool = self._pools.get(profile_name)
+            self._held.get(profile_name, set()).discard(handle)
+        if pool is not None:
+            pool.drop(handle)
+
+    @contextmanager
+    def exclusive(self, profile_name: str):
+        """Остальные вкладки профиля ждут, пока поток не выйдет из блока."""
+        with self._drivers_lock:
+            pool = self._pools.get(profile_name)
+        if pool is None:
+            yield
+            return
+        with pool.exclusive():
+            yield
+
+    def close_tab(self, profile_name: str, handle: str | None = None):
+        """
+        Закрывает вкладку загрузки (используется при отмене).
+
+        Незавершённая передача файла в этой вкладке обрывается, а ожидания
+        загрузчика падают сразу. Если вкладка последняя — драйвер
+        останавливается целиком.
+        """
+        with self._drivers_lock:
+            drv = self._drivers.get(profile_name)
+            pool = self._pools.get(profile_name)
+        if not drv:
+            return
+        try:
+            # Под блокировкой пула: иначе между переключением и закрытием
+            # другая загрузка переключит драйвер, и закроется её вкладка
+            with pool.exclusive() if pool else nullcontext():
+                closed = close_window(drv, handle)
+            if closed:
+                log(f"Закрыта вкладка загрузки профиля {profile_name}")
+                return
+        except Exception as e:
+            log(f"Не удалось закрыть вкладку профиля {profile_name}: {e}", level="warning")
+        self.stop(profile_name)
+
+    def acquire(self):
+        """Отмечает, что драйверы нужны ещё одной параллельной загрузке."""
+        with self._drivers_lock:
+            self._users += 1
+
+    def release(self):
+        """
+        Освобождает драйверы. Chrome останавливается, только когда
+        закончилась последняя параллельная загрузка.
+        """
+        with self._drivers_lock:
+            self._users = max(0, self._users - 1)
+            last = self._users == 0
+        if last:
+            self.stop_all()
 
     def stop_all(self):
         with self._drivers_lock:
-            names = list(self._drivers.keys())
-            for name in names:
-                self.stop(name)
-            log("Остановлены все драйверы Selenium")
+            stopped = [self._detach(name) for name in list(self._drivers.keys())]
+        governor = ChromeGovernor.instance()
+        for item in stopped:
+            if item:
+                governor.reap(*item)
+        log("Остановлены все драйверы Selenium")
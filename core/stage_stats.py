@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+from typing import Dict, List
+
+from utils.logger import log
+from utils.paths import stats_dir
+
+
+MB = 1024 * 1024
+
+# Границы корзин по размеру файла: (верхняя граница в байтах, имя корзины)
+SIZE_BUCKETS = [
+    (50 * MB, "lt50m"),
+    (200 * MB, "lt200m"),
+    (1024 * MB, "lt1g"),
+    (4096 * MB, "lt4g"),
+]
+LARGEST_BUCKET = "ge4g"
+
+# Замеры, которые перекрываются с этапами загрузки (самое долгое ожидание
+# элемента внутри них) — в сумму длительности загрузки не входят
+OVERLAPPING_STAGES = ("ui",)
+
+
+def size_bucket(size_bytes: int | None) -> str:
+    """Возвращает имя корзины для размера файла."""
+    size_bytes = size_bytes or 0
+    for limit, name in SIZE_BUCKETS:
+        if size_bytes < limit:
+            return name
+    return LARGEST_BUCKET
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Перцентиль с линейной интерполяцией, q в диапазоне [0, 1]."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+class StageStats:
+    """
+    Singleton. Локальное хранилище длительностей этапов загрузки.
+
+    Ключ — (сеть, этап, корзина размера файла), значение — последние
+    `max_samples` успешных длительностей в секундах. Из перцентилей этих
+    выборок выводятся таймауты и интервалы опроса:
+        - есть история → timeout = p95 * factor (с ограничением сверху/снизу);
+        - истории нет  → timeout = default + per_mb * размер_в_МБ.
+
+    Записи поступают из core/timing.py: каждый успешный этап (stage)
+    сохраняется в ./stats/stage_stats.json.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, path: str | None = None, max_samples: int = 50, min_samples: int = 3):
+        self.path = path or os.path.join(stats_dir(), "stage_stats.json")
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self._data: Dict[str, List[float]] = {}
+        self._data_lock = threading.RLock()
+        self._load()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ================================================================
+    # Хранение
+    # ================================================================
+    @staticmethod
+    def _key(network: str, stage: str, size_bytes: int | None) -> str:
+        return f"{network}/{stage}/{size_bucket(size_bytes)}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self._data = {k: [float(v) for v in vals] for k, vals in raw.items()}
+        except Exception as e:
+            log(f"Не удалось прочитать статистику этапов {self.path}: {e}", level="warning")
+            self._data = {}
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log(f"Не удалось сохранить статистику этапов: {e}", level="warning")
+
+    def record(self, network: str, stage: str, duration: float, size_bytes: int | None = None):
+        """Добавляет длительность успешного этапа."""
+        key = self._key(network, stage, size_bytes)
+        with self._data_lock:
+            samples = self._data.setdefault(key, [])
+            samples.append(round(float(duration), 3))
+            del samples[:-self.max_samples]
+            self._save()
+
+    def samples(self, network: str, stage: str, size_bytes: int | None = None) -> List[float]:
+        with self._data_lock:
+            return list(self._data.get(self._key(network, stage, size_bytes), []))
+
+    # ================================================================
+    # Производные значения
+    # ================================================================
+    def percentile(self, network: str, stage: str, q: float, size_bytes: int | None = None) -> float | None:
+        """Перцентиль длительности этапа или None, если истории мало."""
+        values = self.samples(network, stage, size_bytes)
+        if len(values) < self.min_samples:
+            return None
+        return _percentile(values, q)
+
+    def timeout(
+        self,
+        network: str,
+        stage: str,
+        default: float,
+        size_bytes: int | None = None,
+        per_mb: float = 0.0,
+        q: float = 0.95,
+        factor: float = 2.0,
+        minimum: float = 5.0,
+        maximum: float | None = None,
+    ) -> float:
+        """
+        Таймаут этапа.
+
+        Параметры:
+            default: таймаут без истории (как раньше был захардкожен)
+            per_mb: добавка секунд на каждый МБ файла, пока истории нет
+            q, factor: таймаут = перцентиль q * factor
+            minimum, maximum: жёсткие границы результата
+        """
+        p = self.percentile(network, stage, q, size_bytes)
+        if p is None:
+            value = default + per_mb * (size_bytes or 0) / MB
+        else:
+            value = p * factor
+        value = max(value, minimum)
+        if maximum is not None:
+            value = min(value, maximum)
+        return value
+
+    def poll_interval(
+        self,
+        network: str,
+        stage: str,
+        default: float,
+        size_bytes: int | None = None,
+        divisor: float = 20.0,
+        minimum: float = 0.2,
+        maximum: float = 5.0,
+    ) -> float:
+        """
+        Интервал опроса — медиана длительности этапа / divisor,
+        чтобы короткие этапы опрашивались часто, а длинные — реже.
+        """
+        p = self.percentile(network, stage, 0.5, size_bytes)
+        value = default if p is None else p / divisor
+        return min(max(value, minimum), maximum)
+
+    def expected_duration(self, network: str, size_bytes: int | None = None, q: float = 0.5) -> float | None:
+        """
+        Ожидаемая длительность всей загрузки на сеть: сумма перцентилей q
+        по всем этапам с историей для этой корзины размера. None — истории нет.
+        """
+        prefix, suffix = f"{network}/", f"/{size_bucket(size_bytes)}"
+        with self._data_lock:
+            stages = [
+                key[len(prefix):-len(suffix)] for key in self._data
+                if key.startswith(prefix) and key.endswith(suffix)
+            ]
+        stages = [stage for stage in stages if stage not in OVERLAPPING_STAGES]
+        values = [self.percentile(network, stage, q, size_bytes) for stage in stages]
+        values = [v for v in values if v is not None]
+        return sum(values) if values else None
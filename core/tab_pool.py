@@ -0,0 +1,233 @@
+"""
+Несколько загрузок в одном Chrome — по вкладке на загрузку.
+
+Rutube и VK минутами ждут обработки видео на сервере, а браузер всё это
+время простаивает. С FLOWVID_BROWSER_TABS > 1 загрузки одного профиля
+Chrome идут конвейером:
+
+    - TabPool — вкладки (window handles) одного драйвера. Загрузка берёт
+      вкладку в аренду; каждая команда WebDriver из её потока сначала
+      переключается на эту вкладку, команды разных потоков не
+      перемешиваются (блокировка драйвера). Ожидания wait.until разных
+      вкладок чередуются: между опросами блокировка свободна.
+    - BrowserPipeline — очередь загрузок профиля: не больше
+      FLOWVID_BROWSER_TABS вкладок одновременно, и интерактивное начало
+      (открыть страницу, передать файл) — по одной. Когда загрузка N доходит до ожидания обработки
+      или публикации (HANDOFF_STAGES), загрузка N+1 начинает передачу
+      в своей вкладке.
+
+При FLOWVID_BROWSER_TABS = 1 поведение прежнее: профиль Chrome занят одной загрузкой.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable
+
+from core.cancellation import CancelToken
+from core.timing import Span, add_start_listener
+from utils.logger import log
+
+
+# Этапы-ожидания: с их началом следующая загрузка профиля может стартовать
+HANDOFF_STAGES = ("processing", "link", "publish")
+
+# Фоновые вкладки не должны засыпать: их ожидания идут параллельно
+BACKGROUND_FLAGS = (
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+)
+
+# Команды, которым не нужна вкладка потока
+_UNROUTED = {"newSession", "quit", "getWindowHandles", "newWindow", "switchToWindow"}
+
+
+class TabPool:
+    """
+    Вкладки одного драйвера. Оборачивает driver.execute (как
+    DriverProfiler): команда потока, арендовавшего вкладку, выполняется
+    в ней.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._lock = threading.RLock()          # одна команда драйвера за раз
+        self._local = threading.local()         # вкладка текущего потока
+        self._leased: set[str] = set()
+        self._held: set[str] = set()            # вкладки загрузок, ждущих повтора
+        self.active: str | None = driver.current_window_handle
+        self._attach()
+
+    def _attach(self):
+        original = self.driver.execute
+
+        def execute(driver_command, params=None):
+            with self._lock:
+                want = getattr(self._local, "handle", None)
+                if driver_command == "switchToWindow":
+                    response = original(driver_command, params)
+                    # Загрузчик сам перешёл в другую вкладку (продолжение после сбоя)
+                    self.active = params["handle"]
+                    if want is not None:
+                        self._local.handle = self.active
+                    return response
+                if want is not None and want != self.active and driver_command not in _UNROUTED:
+                    original("switchToWindow", {"handle": want})
+                    self.active = want
+                response = original(driver_command, params)
+                if driver_command == "closeWindow":
+                    self.active = None
+                return response
+
+        self.driver.execute = execute
+
+    @property
+    def busy(self) -> bool:
+        """Есть вкладки в аренде или ждущие повтора — драйвер нельзя перезапускать."""
+        with self._lock:
+            return bool(self._leased or self._held)
+
+    # ================================================================
+    # Аренда вкладок
+    # ================================================================
+    @contextmanager
+    def lease(self, hint: str | None = None, hold: Callable[[str], bool] | None = None):
+        """
+        Вкладка для загрузки; поток привязывается к ней.
+
+        hint — вкладка прошлой попытки (контрольная точка): если она
+        открыта и свободна (или отложена для этой загрузки), выдаётся она.
+        После успешной загрузки вкладка закрывается (последняя остаётся,
+        чтобы Chrome жил); после ошибки — остаётся открытой для повтора.
+        Если hold(handle) истинно, она откладывается: другие загрузки её не
+        получат, пока повтор не заберёт её снова или не вызовут drop.
+        """
+        handle = self._acquire(hint)
+        self._local.handle = handle
+        ok = False
+        try:
+            yield handle
+            ok = True
+        finally:
+            handle = self._local.handle       # загрузчик мог перейти в другую вкладку
+            self._local.handle = None
+            self._release(handle, close=ok, hold=not ok and hold is not None and hold(handle))
+
+    def _acquire(self, hint: str | None) -> str:
+        with self._lock:
+            handles = self.driver.window_handles
+            free = [h for h in handles if h not in self._leased and h not in self._held]
+            if hint in free or (hint in self._held and hint in handles):
+                self._held.discard(hint)
+                handle = hint
+            elif free:
+                # Свободная вкладка (после ошибки прошлой загрузки или единственная)
+                handle = self.active if self.active in free else free[0]
+            else:
+                handle = self.driver.execute("newWindow", {"type": "tab"})["value"]["handle"]
+                log(f"Открыта вкладка {handle} (вкладок: {len(handles) + 1})")
+            self._leased.add(handle)
+            return handle
+
+    def _release(self, handle: str | None, close: bool, hold: bool = False):
+        with self._lock:
+            self._leased.discard(handle)
+            if hold and handle:
+                self._held.add(handle)
+            if not close:
+                return
+            try:
+                close_window(self.driver, handle)
+            except Exception as e:
+                log(f"Не удалось закрыть вкладку {handle}: {e}", level="warning")
+
+    def drop(self, handle: str | None):
+        """Повтора не будет: отложенная вкладка снова доступна всем."""
+        with self._lock:
+            self._held.discard(handle)
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Драйвер целиком за текущим потоком: другие вкладки ждут.
+        Нужно там, где действие выходит за пределы WebDriver (системный
+        диалог выбора файла и pyautogui) — вкладка должна оставаться активной.
+        """
+        with self._lock:
+            yield
+
+
+def close_window(driver, handle: str | None) -> bool:
+    """
+    Закрывает вкладку handle, если она открыта и не последняя.
+    Переключение и закрытие — две команды: при пуле вкладок вызывать под
+    его блокировкой (TabPool.exclusive), иначе между ними другой поток
+    может переключить драйвер на свою вкладку.
+    """
+    if not handle:
+        return False
+    handles = driver.window_handles
+    if handle not in handles or len(handles) < 2:
+        return False
+    driver.switch_to.window(handle)
+    driver.close()
+    return True
+
+
+class BrowserPipeline:
+    """Singleton. Очередь загрузок на профиль Chrome (см. описание модуля)."""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, tabs: int | None = None):
+        # Сколько загрузок одного профиля Chrome идут одновременно (по вкладке
+        # на каждую). Читается здесь, а не при импорте — уже после load_dotenv
+        if tabs is None:
+            tabs = int(os.getenv("FLOWVID_BROWSER_TABS", "1"))
+        self.tabs = max(1, tabs)
+        self._slots: dict[str, threading.Semaphore] = {}
+        self._leads: dict[str, threading.Lock] = {}
+        self._local = threading.local()
+        self._guard = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @contextmanager
+    def slot(self, profile_name: str, cancel: CancelToken):
+        """Место в конвейере профиля; ожидание прерывается отменой."""
+        with self._guard:
+            slots = self._slots.setdefault(profile_name, threading.Semaphore(self.tabs))
+            lead = self._leads.setdefault(profile_name, threading.Lock())
+        while not slots.acquire(timeout=0.5):
+            cancel.raise_if_cancelled()
+        try:
+            while not lead.acquire(timeout=0.5):
+                cancel.raise_if_cancelled()
+            self._local.lead = lead
+            try:
+                yield
+            finally:
+                self.handoff()
+        finally:
+            slots.release()
+
+    def handoff(self):
+        """Отпускает начало конвейера: следующая загрузка профиля может стартовать."""
+        lead = getattr(self._local, "lead", None)
+        if lead is not None:
+            self._local.lead = None
+            lead.release()
+
+
+def _on_stage_start(span: Span):
+    if span.stage in HANDOFF_STAGES:
+        BrowserPipeline.instance().handoff()
+
+
+add_start_listener(_on_stage_start)
@@ -0,0 +1,94 @@
+import re
+from typing import Dict, List
+
+
+# Разделители при массовой вставке: запятые, точки с запятой, переводы строк
+_SEPARATORS = re.compile(r"[,;\r\n]+")
+
+
+def split_tags(text: str) -> List[str]:
+    """
+    Разбивает вставленный текст (список из SEO-инструмента, CSV и т.п.)
+    на отдельные теги: обрезает пробелы и ведущие '#', пустые отбрасывает.
+    """
+    tags = []
+    for part in _SEPARATORS.split(text or ""):
+        tag = part.strip().lstrip("#").strip()
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+class TagModel:
+    """
+    Упорядоченный список тегов редактора.
+
+    Каждый тег имеет стабильный id (виджет тега хранит его), поэтому
+    правка и удаление — O(1), а gather_tags читает модель напрямую,
+    не обходя виджеты. Дубли (без учёта регистра) не добавляются
+    через add() и отбрасываются в tags().
+    """
+
+    def __init__(self):
+        self._tags: Dict[int, str] = {}
+        self._counts: Dict[str, int] = {}
+        self._next_id = 0
+
+    @staticmethod
+    def _norm(text: str) -> str:
+        return text.strip().casefold()
+
+    def _count(self, text: str, delta: int):
+        key = self._norm(text)
+        if not key:
+            return
+        count = self._counts.get(key, 0) + delta
+        if count > 0:
+            self._counts[key] = count
+        else:
+            self._counts.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._tags)
+
+    def __contains__(self, text: str) -> bool:
+        return self._norm(text) in self._counts
+
+    def add(self, text: str = "") -> int | None:
+        """Добавляет тег и возвращает его id; None — такой тег уже есть."""
+        if text.strip() and text in self:
+            return None
+        tag_id = self._next_id
+        self._next_id += 1
+        self._tags[tag_id] = text
+        self._count(text, +1)
+        return tag_id
+
+    def set(self, tag_id: int, text: str):
+        old = self._tags.get(tag_id)
+        if old is None:
+            return
+        self._count(old, -1)
+        self._tags[tag_id] = text
+        self._count(text, +1)
+
+    def remove(self, tag_id: int):
+        old = self._tags.pop(tag_id, None)
+        if old is not None:
+            self._count(old, -1)
+
+    def clear(self):
+        self._tags.clear()
+        self._counts.clear()
+
+    def tags(self) -> List[str]:
+        """Непустые теги в порядке добавления, без дублей."""
+        seen = set()
+        result = []
+        for text in self._tags.values():
+            tag = text.strip()
+            key = tag.casefold()
+            if tag and key not in seen:
+                seen.add(key)
+                result.append(tag)
+        return result
@@ -0,0 +1,188 @@
+"""
+Поэтапные замеры загрузок (span/timer API).
+
+Использование:
+    with trace("rutube", size_bytes=...) as tr:      # UploaderManager
+        with stage("file_transfer", bytes=size):     # загрузчик
+            ...
+    tr.breakdown()  # {"file_transfer": 12.3, ...}
+
+Каждый завершённый этап превращается в StageRecord
+(сеть, этап, начало, длительность, байты, исход) и:
+    - добавляется в текущий UploadTrace потока;
+    - пишется в лог строкой [STAGE] key=value;
+    - при успехе попадает в StageStats (адаптивные таймауты);
+    - передаётся подписчикам (add_listener), например метрикам.
+
+Начало этапа передаётся подписчикам add_start_listener (прогресс в GUI).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Callable, List
+
+from utils.logger import log
+
+
+@dataclass
+class StageRecord:
+    """Структурированная запись об одном этапе загрузки."""
+    network: str
+    stage: str
+    start: float                 # unix-время начала
+    duration: float              # секунды
+    bytes: int = 0
+    outcome: str = "ok"          # ok | error | timeout | cancelled
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Span:
+    """Открытый этап. Внутри блока можно обновить bytes или outcome."""
+    network: str
+    stage: str
+    bytes: int = 0
+    outcome: str = "ok"
+    error: str | None = None
+    start: float = field(default_factory=time.time)
+    _t0: float = field(default_factory=time.monotonic, repr=False)
+
+
+class UploadTrace:
+    """Все этапы одной загрузки на одну сеть."""
+
+    def __init__(self, network: str, size_bytes: int | None = None):
+        self.network = network
+        self.size_bytes = size_bytes
+        self.records: List[StageRecord] = []
+        self.start = time.time()
+        self._t0 = time.monotonic()
+        self.total: float | None = None
+
+    def add(self, record: StageRecord):
+        self.records.append(record)
+
+    def breakdown(self) -> dict:
+        """Суммарная длительность по этапам: {stage: seconds}."""
+        result: dict = {}
+        for r in self.records:
+            result[r.stage] = round(result.get(r.stage, 0.0) + r.duration, 3)
+        return result
+
+    def as_dict(self) -> dict:
+        return {
+            "network": self.network,
+            "total": round(self.total if self.total is not None else time.monotonic() - self._t0, 3),
+            "stages": self.breakdown(),
+            "records": [r.as_dict() for r in self.records],
+        }
+
+
+_local = threading.local()
+_listeners: List[Callable[[StageRecord], None]] = []
+_start_listeners: List[Callable[[Span], None]] = []
+
+
+def add_listener(callback: Callable[[StageRecord], None]):
+    """Подписка на завершённые этапы (вызывается в потоке загрузки)."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback: Callable[[StageRecord], None]):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def add_start_listener(callback: Callable[[Span], None]):
+    """Подписка на начало этапов (вызывается в потоке загрузки)."""
+    if callback not in _start_listeners:
+        _start_listeners.append(callback)
+
+
+def current_trace() -> UploadTrace | None:
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def trace(network: str, size_bytes: int | None = None):
+    """Делает UploadTrace текущим для потока на время блока."""
+    previous = current_trace()
+    tr = UploadTrace(network, size_bytes)
+    _local.trace = tr
+    try:
+        yield tr
+    finally:
+        tr.total = time.monotonic() - tr._t0
+        _local.trace = previous
+
+
+@contextmanager
+def stage(name: str, bytes: int = 0, network: str | None = None, record_stats: bool = True, sized: bool = True):
+    """
+    Замеряет этап загрузки.
+
+    Параметры:
+        name: имя этапа (chrome_launch, file_transfer, processing, ...)
+        bytes: сколько байт передаётся на этапе
+        network: сеть; по умолчанию — сеть текущего trace
+        record_stats: записывать ли успешную длительность в StageStats
+        sized: зависит ли длительность от размера файла; если нет (вход
+            в аккаунт), история пишется без корзины размера — там же,
+            где её читает _stage_timeout без size_bytes
+    """
+    tr = current_trace()
+    span = Span(network=network or (tr.network if tr else "-"), stage=name, bytes=bytes)
+    for callback in list(_start_listeners):
+        try:
+            callback(span)
+        except Exception as e:
+            log(f"Ошибка подписчика этапов: {e}", level="warning")
+    try:
+        yield span
+    except BaseException as e:
+        if span.outcome == "ok":
+            span.outcome = "cancelled" if type(e).__name__ == "CancelledError" else "error"
+        span.error = span.error or str(e) or type(e).__name__
+        raise
+    finally:
+        _finish(span, tr, record_stats, sized)
+
+
+def _finish(span: Span, tr: UploadTrace | None, record_stats: bool, sized: bool = True):
+    record = StageRecord(
+        network=span.network,
+        stage=span.stage,
+        start=span.start,
+        duration=time.monotonic() - span._t0,
+        bytes=span.bytes,
+        outcome=span.outcome,
+        error=span.error,
+    )
+    if tr is not None:
+        tr.add(record)
+
+    log(
+        f"[STAGE] network={record.network} stage={record.stage} "
+        f"duration={record.duration:.3f} bytes={record.bytes} outcome={record.outcome}",
+        **record.as_dict(),
+    )
+
+    if record_stats and record.outcome == "ok":
+        # Импорт здесь: StageStats читает файл статистики при первом обращении
+        from core.stage_stats import StageStats
+        StageStats.instance().record(
+            record.network, record.stage, record.duration,
+            tr.size_bytes if tr and sized else None,
+        )
+
+    for callback in list(_listeners):
+        try:
+            callback(record)
+        except Exception as e:
+            log(f"Ошибка подписчика этапов: {e}", level="warning")
@@ -0,0 +1,259 @@
+"""
+Очередь загрузок для пакетной работы.
+
+GUI добавляет задания (по одному на видео), правит их метаданные и
+отправляет воркерам; пул фоновых потоков непрерывно выполняет задания
+через UploaderManager.upload. Сети, которым нужен общий ресурс (браузер),
+UploaderManager сериализует сам, поэтому воркеров может быть несколько.
+
+Задания запускаются с job_id = UploadJob.id, поэтому журнал
+(core/journal.py) помнит их между запусками: recover() возвращает
+в очередь задания, прерванные сбоем, а повторная отправка задания
+с ошибкой не публикует заново сети, где загрузка уже прошла.
+"""
+
+import threading
+import uuid
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from core.cancellation import CancelToken, CancelledError
+from core.journal import Journal
+from core.progress import ProgressEvent, ProgressSink
+from core.uploader_manager import UploaderManager
+from utils.logger import log
+
+
+@dataclass
+class UploadJob:
+    """
+    Одно видео в очереди со своими метаданными и сетями.
+
+    Статусы:
+        draft     — добавлено, метаданные ещё редактируются
+        pending   — отправлено в очередь, ждёт свободного воркера
+        running   — загружается
+        scheduled — передано планировщику (core/scheduler.py) на publish_at
+        done / error / cancelled — завершено
+
+    Метаданные можно менять во всех статусах, кроме running, scheduled и done.
+    """
+    video_file: str
+    networks: list[str] = field(default_factory=list)
+    title: str = ""
+    description: str = ""
+    tags: list[str] = field(default_factory=list)
+    thumbnail: str | None = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = "draft"
+    result: dict | None = None
+    publish_at: float | None = None
+    cancel: CancelToken = field(default_factory=CancelToken, repr=False, compare=False)
+
+    @property
+    def name(self) -> str:
+        return Path(self.video_file).name
+
+    @property
+    def editable(self) -> bool:
+        return self.status not in ("running", "scheduled", "done")
+
+
+class UploadQueue:
+    """
+    Очередь заданий с пулом фоновых воркеров.
+
+    Воркеры непрерывно забирают задания в статусе pending (FIFO) и
+    выполняют их через UploaderManager.upload. Метаданные заданий
+    можно менять, пока они в draft/pending: воркер берёт снимок задания
+    в момент старта.
+    """
+
+    # Из каких статусов задание можно (повторно) отправить воркерам
+    SUBMITTABLE = ("draft", "error", "cancelled")
+
+    def __init__(self, workers: int = 2, on_progress: ProgressSink | None = None):
+        self.workers = max(1, workers)
+        self.on_progress = on_progress
+        self._jobs: dict[str, UploadJob] = {}
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stopping = False
+
+    # ================================================================
+    # Управление заданиями
+    # ================================================================
+    def add(self, job: UploadJob) -> UploadJob:
+        with self._cond:
+            self._jobs[job.id] = job
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> UploadJob | None:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[UploadJob]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def update(self, job_id: str, **changes) -> bool:
+        """Меняет метаданные задания, если оно ещё не начало загружаться."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or not job.editable:
+                return False
+            for name, value in changes.items():
+                setattr(job, name, value)
+            return True
+
+    def submit(self, job_id: str) -> bool:
+        """draft → pending: задание уходит воркерам (error/cancelled — повтор)."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job.status not in self.SUBMITTABLE:
+                return False
+            if job.status != "draft":
+                job.cancel = CancelToken()
+                job.result = None
+            job.status = "pending"
+            self._cond.notify()
+            return True
+
+    def mark_scheduled(self, job_id: str, publish_at: float) -> bool:
+        """Задание ушло планировщику: воркеры очереди его не берут."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job.status not in self.SUBMITTABLE:
+                return False
+            job.status = "scheduled"
+            job.publish_at = publish_at
+            return True
+
+    def finish_scheduled(self, job_id: str, status: str, result: dict) -> bool:
+        """Планировщик завершил пост задания: итог переносится в очередь."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job.status != "scheduled":
+                return False
+            job.status = status
+            job.result = result
+            return True
+
+    def remove(self, job_id: str) -> bool:
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job or job.status == "running":
+                return False
+            del self._jobs[job_id]
+            return True
+
+    def cancel(self, job_id: str):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            if job.status in ("draft", "pending", "scheduled"):
+                job.status = "cancelled"
+                return
+        job.cancel.cancel()
+
+    def recover(self) -> list[UploadJob]:
+        """Возвращает воркерам задания, прерванные сбоем прошлого запуска."""
+        jobs = []
+        for entry in Journal.instance().recover(("queue",)):
+            params = entry.params
+            job = UploadJob(
+                video_file=params.get("video_file", ""),
+                networks=list(params.get("networks", [])),
+                title=params.get("title", ""),
+                description=params.get("description", ""),
+                tags=list(params.get("tags", [])),
+                thumbnail=params.get("thumbnail"),
+                id=entry.job_id,
+                status="pending",
+            )
+            jobs.append(self.add(job))
+        if jobs:
+            log(f"[QUEUE] Восстановлено прерванных заданий: {len(jobs)}")
+        return jobs
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(1 for j in self._jobs.values() if j.status == "pending")
+
+    # ================================================================
+    # Пул воркеров
+    # ================================================================
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker_loop, name=f"upload-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        log(f"Очередь загрузок запущена, воркеров: {self.workers}")
+
+    def stop(self, cancel_running: bool = True):
+        with self._cond:
+            self._stopping = True
+            running = [j for j in self._jobs.values() if j.status == "running"]
+            self._cond.notify_all()
+        if cancel_running:
+            for job in running:
+                job.cancel.cancel()
+        self._threads = []
+
+    def _next_job(self) -> UploadJob | None:
+        with self._cond:
+            while not self._stopping:
+                job = next((j for j in self._jobs.values() if j.status == "pending"), None)
+                if job:
+                    job.status = "running"
+                    # Снимок: дальнейшие правки в GUI не влияют на идущую загрузку
+                    return replace(job, networks=list(job.networks), tags=list(job.tags))
+                self._cond.wait()
+            return None
+
+    def _worker_loop(self):
+        while True:
+            snapshot = self._next_job()
+            if snapshot is None:
+                return
+            self._run(snapshot)
+
+    def _run(self, job: UploadJob):
+        log(f"[QUEUE] Старт задания {job.id}: {job.name} → {', '.join(job.networks)}")
+
+        def forward(ev: ProgressEvent):
+            ev.job = job.id
+            if self.on_progress:
+                self.on_progress(ev)
+
+        try:
+            result = UploaderManager.upload(
+                job.video_file, job.networks, job.title, job.description,
+                job.tags, job.thumbnail,
+                cancel=job.cancel,
+                on_progress=forward,
+                job_id=job.id,
+                origin="queue",
+            )
+            if result.get("cancelled"):
+                status = "cancelled"
+            else:
+                status = "error" if result.get("errors") else "done"
+        except CancelledError:
+            result, status = {"cancelled": True}, "cancelled"
+        except Exception as e:
+            log(f"[QUEUE] Задание {job.id} упало: {e}", level="error")
+            result, status = {"errors": [str(e)]}, "error"
+
+        with self._cond:
+            original = self._jobs.get(job.id)
+            if original:
+                original.result = result
+                original.status = status
+        log(f"[QUEUE] Задание {job.id} завершено: {status}")
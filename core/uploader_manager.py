@@ -1,6 +1,22 @@
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
 from importlib import import_module
 from utils.logger import log
-from core.selenium_manager import SeleniumManager
+from core.timing import stage, trace
+from core.cancellation import CancelToken, CancelledError
+from core.progress import ProgressReporter, ProgressSink, reporting
+from core import driver_profiler, metrics
+from core.accounts import AccountDispatcher
+from core.bandwidth import BandwidthManager
+from core.chrome_governor import ChromeGovernor
+from core.tab_pool import BrowserPipeline
+from core.rate_limit import QuotaExceeded, RateLimiter
+from core.retry import FATAL, TRANSIENT, RetryPolicy
+from core.checkpoint import Checkpoint
+from core.journal import FINISHED, Journal
 from config.networks import NETWORKS, NetworkConfig
 from typing import Callable
 
@@ -11,8 +27,48 @@ class UploaderManager:
     Список сетей передается ключами (key).
     Динамически импортирует модули из папки upload.
     Управляет Selenium при необходимости.
+
+    Временные ошибки повторяются по политике сети (core/retry.py);
+    повторная попытка продолжает загрузку с контрольной точки
+    (core/checkpoint.py), не передавая файл заново. Переходы заданий
+    пишутся в журнал (core/journal.py), чтобы после сбоя процесса
+    задание продолжилось без повторных публикаций.
+
+    upload() можно вызывать из нескольких потоков (очередь загрузок):
+    загрузки через один профиль браузера и через один аккаунт сети
+    выполняются по очереди благодаря _resource_lock. Аккаунт для каждой
+    загрузки выбирает AccountDispatcher (нагрузка и здоровье аккаунтов),
+    поэтому несколько аккаунтов одной сети работают параллельно.
     """
 
+    _resource_locks: dict[str, threading.Lock] = {}
+    _resource_guard = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def _resource_lock(cfg: NetworkConfig, cancel: CancelToken):
+        """
+        Держит блокировку общего ресурса: браузерные сети делят профиль
+        Chrome аккаунта, остальные — только свой аккаунт.
+        Ожидание блокировки прерывается отменой.
+        """
+        if cfg.uses_selenium and BrowserPipeline.instance().tabs > 1:
+            # Профиль Chrome делят несколько загрузок, каждая в своей вкладке
+            with BrowserPipeline.instance().slot(cfg.profile_name, cancel):
+                yield
+            return
+
+        account = cfg.account.key if cfg.account else "default"
+        name = f"browser:{cfg.profile_name}" if cfg.uses_selenium else f"network:{cfg.key}:{account}"
+        with UploaderManager._resource_guard:
+            lock = UploaderManager._resource_locks.setdefault(name, threading.Lock())
+        while not lock.acquire(timeout=0.5):
+            cancel.raise_if_cancelled()
+        try:
+            yield
+        finally:
+            lock.release()
+
     @staticmethod
     def _get_network_config(key: str) -> NetworkConfig | None:
         return next((net for net in NETWORKS if net.key == key), None)
@@ -65,7 +121,14 @@ class UploaderManager:
         title: str,
         description: str,
         tags: list[str] | None = None,
-        thumbnail: str | None = None
+        thumbnail: str | None = None,
+        cancel: CancelToken | None = None,
+        on_progress: ProgressSink | None = None,
+        publish_at: datetime | None = None,
+        job_id: str | None = None,
+        origin: str = "direct",
+        deadline: float | None = None,
+        weight: float = 1.0,
     ) -> dict:
         """
         Загружает видео на выбранные соцсети.
@@ -77,11 +140,33 @@ class UploaderManager:
             description: описание видео
             tags: список тегов (добавляются при необходимости)
             thumbnail: путь к миниатюре (если поддерживается загрузчиком)
+            cancel: токен отмены; передаётся в каждый загрузчик
+            on_progress: получатель ProgressEvent по каждой сети
+                         (вызывается в потоке загрузки)
+            publish_at: время отложенной публикации; передаётся только
+                        сетям с supports_scheduling, остальные публикуют сразу
+            job_id: id задания в журнале (core/journal.py). Повторный вызов
+                    с тем же id не публикует заново уже завершённые сети
+                    и продолжает прерванные с контрольной точки
+            origin: кто запустил задание ("queue", "scheduler", ...) —
+                    по нему задание восстанавливается после сбоя
+            deadline: unix-время, к которому загрузка должна закончиться
+                      (публикация по расписанию) — такие загрузки первыми
+                      получают долю канала (core/bandwidth.py)
+            weight: вес задания при делении канала между загрузками
 
         Возвращает:
             dict:
                 {"ok": True} — если загрузка прошла успешно на все сети
                 {"errors": [...]} — если возникли ошибки
+
+            Дополнительно в обоих случаях:
+                "cancelled": True — если загрузка была отменена
+                "results": {key: результат Uploader.upload}
+                "accounts": {key: аккаунт, через который шла загрузка}
+                "timings": {key: {"total", "stages", "records"}} — поэтапные замеры
+                           (+ "webdriver" — профиль команд браузера, если
+                           включён FLOWVID_PROFILE_WEBDRIVER)
         """
         # ---------------------------------------------------------
         # Проверка входных данных
@@ -91,62 +176,307 @@ class UploaderManager:
             return {"errors": ["video missing"]}
 
         errors: list[str] = []
+        results: dict = {}
+        timings: dict = {}
+        accounts: dict = {}
         tags = tags or []
+        cancel = cancel or CancelToken()
+        cancelled = False
+        journal = Journal.instance()
+        job_id = job_id or uuid.uuid4().hex[:12]
+        job = journal.begin(job_id, origin, {
+            "video_file": video_file,
+            "networks": list(networks),
+            "title": title,
+            "description": description,
+            "tags": list(tags),
+            "thumbnail": thumbnail,
+            "publish_at": publish_at.isoformat() if publish_at else None,
+        })
+        try:
+            size_bytes = os.path.getsize(video_file)
+        except OSError:
+            size_bytes = None
 
         # ---------------------------------------------------------
         # Определяем, нужен ли Selenium (для хотя бы одной сети)
         # ---------------------------------------------------------
         selenium_required = any(
             (cfg := UploaderManager._get_network_config(k)) and cfg.enabled and cfg.uses_selenium
+            and job.network(k).recovery() != FINISHED
             for k in networks
         )
-        selenium = SeleniumManager.instance() if selenium_required else None
+        selenium = None
+        if selenium_required:
+            # Импорт здесь, а не на уровне модуля: Selenium тянется только
+            # когда выбрана хотя бы одна браузерная сеть (быстрый старт GUI)
+            from core.selenium_manager import SeleniumManager
+            selenium = SeleniumManager.instance()
+            selenium.acquire()
 
         # ---------------------------------------------------------
         # Основной цикл по выбранным сетям
         # ---------------------------------------------------------
-        for key in networks:
+        reporters = {
+            key: ProgressReporter(key, on_progress, total=size_bytes)
+            for key in networks
+        }
+        for reporter in reporters.values():
+            reporter.queued()
+
+        metrics.QUEUE_DEPTH.inc(len(networks))
+        pending = len(networks)
+        for i, key in enumerate(networks):
+            metrics.QUEUE_DEPTH.dec()
+            pending -= 1
+            if cancel.cancelled:
+                cancelled = True
+                for rest in networks[i:]:
+                    reporters[rest].cancelled()
+                break
+
             cfg = UploaderManager._get_network_config(key)
 
             # Пропускаем несуществующие или отключенные сети
             if not cfg:
                 errors.append(f"{key}: config not found")
+                reporters[key].fail("config not found")
                 continue
             if not cfg.enabled:
                 log(f"{key} disabled, skipping", level="info")
+                reporters[key].fail("disabled")
                 continue
 
-            # Импортируем модуль загрузчика
-            mod = UploaderManager._import_uploader(f"upload.{cfg.key}")
-            if not mod:
-                errors.append(f"{key}: module missing")
+            # Сеть уже опубликована этим заданием (повтор или восстановление после сбоя)
+            entry = job.network(key)
+            if entry.recovery() == FINISHED:
+                log(f"{key}: уже опубликовано в задании {job_id}, пропускаем")
+                results[key] = {"success": True, "url": entry.url, "journal": True}
+                accounts[key] = entry.account
+                reporters[key].finish(entry.url)
                 continue
 
-            # Получаем функцию загрузки
-            upload_callable = UploaderManager._get_upload_callable(mod, cfg)
-            if not upload_callable:
-                errors.append(f"{key}: no entrypoint")
-                continue
+            metrics.UPLOADS_STARTED.inc(network=key)
+            units = RateLimiter.quota_units(cfg, bool(thumbnail))
+            with trace(cfg.key, size_bytes) as tr, reporting(reporters[key]), \
+                    AccountDispatcher.instance().lease(cfg, units) as lease, \
+                    BandwidthManager.instance().flow(lease.cfg, size_bytes, deadline, weight):
+                accounts[key] = lease.account.key
+                journal.start(job_id, key, lease.account.key)
+                checkpoint = journal.checkpoint(job_id, key)
+                charged = False
+                try:
+                    # Ждём лимит частоты сети/аккаунта вне блокировки ресурса
+                    RateLimiter.instance().acquire(lease.cfg, cancel, units)
+                    charged = True
+                    error = UploaderManager._upload_with_retry(
+                        lease.cfg, results, video_file, title, description, tags, thumbnail, cancel,
+                        publish_at, checkpoint,
+                    )
+                    if error is not None:
+                        UploaderManager._refund_quota(lease.cfg, thumbnail, checkpoint, results.get(key))
+                    lease.ok, lease.error = error is None, error
+                    journal.done(job_id, key, error is None, UploaderManager._result_url(results.get(key)), error)
+                except QuotaExceeded as e:
+                    # Не ошибка аккаунта: диспетчер сам обойдёт его до сброса квоты
+                    log(f"{key}: {e}", level="warning")
+                    error = f"{key}: {e}"
+                    journal.done(job_id, key, False, error=error)
+                except CancelledError:
+                    log(f"{key}: загрузка отменена", level="warning")
+                    error = f"{key}: cancelled"
+                    cancelled = True
+                    if charged:
+                        UploaderManager._refund_quota(lease.cfg, thumbnail, checkpoint)
+            timings[key] = tr.as_dict()
+            profiler = driver_profiler.DriverProfiler.instance()
+            if cfg.uses_selenium and profiler.enabled:
+                profile = profiler.pop(tr)
+                if profile is not None:
+                    timings[key]["webdriver"] = profile.summary()
+            if error:
+                errors.append(error)
+                metrics.UPLOADS_FAILED.inc(network=key)
+            else:
+                metrics.UPLOADS_FINISHED.inc(network=key)
 
-            # Выполняем загрузку
-            try:
-                log(f"[UPLOAD] {cfg.key} | selenium={cfg.uses_selenium} | video={video_file}")
-                upload_callable(video_file, title, description, tags, thumbnail)
-            except Exception as e:
-                log(f"{key}: {e}", level="error")
-                errors.append(f"{key}: {e}")
+            if cancelled:
+                for rest in networks[i:]:
+                    reporters[rest].cancelled()
+                break
+            if error:
+                reporters[key].fail(error.split(": ", 1)[-1])
+            else:
+                reporters[key].finish(UploaderManager._result_url(results.get(key)))
+        metrics.QUEUE_DEPTH.dec(pending)
 
         # ---------------------------------------------------------
         # Останавливаем Selenium, если он использовался
         # ---------------------------------------------------------
         if selenium:
             try:
-                selenium.stop_all()
+                selenium.release()
             except Exception as e:
                 log(f"Error stopping Selenium: {e}", level="warning")
 
         # ---------------------------------------------------------
         # Результат
         # ---------------------------------------------------------
-        return {"errors": errors} if errors else {"ok": True}
+        status = {"errors": errors} if errors else {"ok": True}
+        status.update(results=results, timings=timings, accounts=accounts, job_id=job_id)
+        if cancelled:
+            status["cancelled"] = True
+        journal.end(job_id, "cancelled" if cancelled else ("error" if errors else "done"))
+        return status
+
+    @staticmethod
+    def _rate_feedback(cfg: NetworkConfig, result):
+        """
+        Передаёт ограничителю ответы платформы о лимитах:
+            "retry_after": N     — платформа просит подождать N секунд (flood wait)
+            "quota_exceeded": True — дневная квота API исчерпана
+        """
+        if not isinstance(result, dict):
+            return
+        if result.get("retry_after"):
+            RateLimiter.instance().penalize(cfg, float(result["retry_after"]))
+        if result.get("quota_exceeded"):
+            RateLimiter.instance().exhaust_quota(cfg)
+
+    @staticmethod
+    def _refund_quota(cfg: NetworkConfig, thumbnail: str | None, checkpoint: Checkpoint, result=None):
+        """
+        Квота списывается при RateLimiter.acquire, до загрузки. Если
+        загрузка не удалась, возвращаем единицы вызовов API, до которых
+        дело не дошло: videos.insert — пока файл не передан, миниатюра —
+        пока не загружена. После quotaExceeded не возвращаем ничего:
+        квота и так израсходована до конца дня.
+        """
+        if isinstance(result, dict) and result.get("quota_exceeded"):
+            return
+        upload = RateLimiter.quota_units(cfg)
+        units = 0 if checkpoint.done("file_transfer") else upload
+        if thumbnail and not checkpoint.done("thumbnail"):
+            units += RateLimiter.quota_units(cfg, thumbnail=True) - upload
+        if units:
+            RateLimiter.instance().refund(cfg, units)
+
+    @staticmethod
+    def _result_url(result) -> str | None:
+        """Ссылка на опубликованное видео из результата загрузчика."""
+        if isinstance(result, dict):
+            return result.get("video_url") or result.get("url")
+        return None
+
+    @staticmethod
+    def _upload_with_retry(
+        cfg: NetworkConfig,
+        results: dict,
+        video_file: str,
+        title: str,
+        description: str,
+        tags: list[str],
+        thumbnail: str | None,
+        cancel: CancelToken,
+        publish_at: datetime | None = None,
+        checkpoint: Checkpoint | None = None,
+    ) -> str | None:
+        """
+        Загрузка на одну сеть с повторами временных ошибок.
+        Все попытки делят одну контрольную точку, поэтому каждая следующая
+        продолжает с последнего пройденного этапа.
+        Блокировка ресурса (профиль Chrome, аккаунт) держится только на
+        время попытки: пока идёт пауза перед повтором, ресурс свободен
+        для других заданий. Вкладку браузера с пройденными этапами
+        SeleniumManager.tab откладывает до повтора — здесь она
+        освобождается, когда повторов больше не будет.
+        Возвращает текст ошибки последней попытки или None.
+        """
+        policy = RetryPolicy.for_network(cfg)
+        checkpoint = checkpoint or Checkpoint(cfg.key)
+        try:
+            attempt = 1
+            while True:
+                with UploaderManager._resource_lock(cfg, cancel):
+                    error, failure = UploaderManager._upload_one(
+                        cfg, results, video_file, title, description, tags, thumbnail, cancel,
+                        publish_at, checkpoint,
+                    )
+                if error is None:
+                    return None
+                UploaderManager._rate_feedback(cfg, failure)
+
+                kind = policy.classify(failure)
+                if kind == FATAL or attempt >= policy.attempts:
+                    if kind == TRANSIENT:
+                        log(f"{cfg.key}: попытки исчерпаны ({attempt})", level="error")
+                    return error
+
+                delay = policy.backoff(attempt, failure)
+                log(
+                    f"{cfg.key}: временная ошибка, попытка {attempt + 1}/{policy.attempts} через {delay:.0f} с"
+                    f" (продолжение после этапа: {checkpoint.last or 'нет'})",
+                    level="warning",
+                )
+                metrics.UPLOAD_RETRIES.inc(network=cfg.key)
+                with stage("retry_wait", record_stats=False):
+                    cancel.sleep(delay)
+                attempt += 1
+        finally:
+            if cfg.uses_selenium:
+                from core.selenium_manager import SeleniumManager
+                SeleniumManager.instance().drop_tab(cfg.profile_name, checkpoint.get("_handle"))
+                # Перезапуск Chrome «после N загрузок» считает задания, а не попытки
+                ChromeGovernor.instance().finished(cfg.profile_name)
+
+    @staticmethod
+    def _upload_one(
+        cfg: NetworkConfig,
+        results: dict,
+        video_file: str,
+        title: str,
+        description: str,
+        tags: list[str],
+        thumbnail: str | None,
+        cancel: CancelToken,
+        publish_at: datetime | None = None,
+        checkpoint: Checkpoint | None = None,
+    ) -> tuple[str | None, object]:
+        """
+        Одна попытка загрузки на сеть внутри текущего trace.
+        Результат загрузчика кладёт в results.
+
+        Возвращает (текст ошибки или None, причина для классификации:
+        исключение или результат-словарь загрузчика).
+        CancelledError пробрасывается вызывающему.
+        """
+        key = cfg.key
+
+        # Импортируем модуль загрузчика
+        mod = UploaderManager._import_uploader(f"upload.{cfg.key}")
+        if not mod:
+            return f"{key}: module missing", None
+
+        # Получаем функцию загрузки
+        upload_callable = UploaderManager._get_upload_callable(mod, cfg)
+        if not upload_callable:
+            return f"{key}: no entrypoint", None
+
+        # Выполняем загрузку
+        try:
+            account = cfg.account.key if cfg.account else "default"
+            log(f"[UPLOAD] {cfg.key} | account={account} | selenium={cfg.uses_selenium} | video={video_file}")
+            extra = {"publish_at": publish_at} if publish_at and cfg.supports_scheduling else {}
+            if checkpoint is not None:
+                extra["checkpoint"] = checkpoint
+            result = upload_callable(video_file, title, description, tags, thumbnail, cancel=cancel, **extra)
+        except Exception as e:
+            log(f"{key}: {e}", level="error")
+            return f"{key}: {e}", e
+
+        results[key] = result
+        # Часть загрузчиков сообщает об ошибке через результат, а не исключением
+        if isinstance(result, dict) and result.get("success") is False:
+            return f"{key}: {result.get('error', 'upload failed')}", result
+        return None, result
 
@@ -0,0 +1,36 @@
+import time
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+from core.cancellation import CancelToken
+
+
+class CancellableWait(WebDriverWait):
+    """
+    WebDriverWait, который проверяет токен отмены на каждой итерации
+    опроса: ожидание прерывается CancelledError не позже чем через
+    poll_frequency после отмены.
+
+    longest — самое долгое успешное until(), с: по нему загрузчик
+    пополняет историю этапа ожиданий интерфейса (BaseUploader._record_wait).
+    """
+
+    def __init__(self, driver, timeout: float, poll_frequency: float = 0.5, cancel: CancelToken | None = None):
+        super().__init__(driver, timeout, poll_frequency=poll_frequency)
+        self.cancel = cancel or CancelToken()
+        self.longest = 0.0
+
+    def _guard(self, method):
+        def check(driver):
+            self.cancel.raise_if_cancelled()
+            return method(driver)
+        return check
+
+    def until(self, method, message: str = ""):
+        started = time.monotonic()
+        result = super().until(self._guard(method), message)
+        self.longest = max(self.longest, time.monotonic() - started)
+        return result
+
+    def until_not(self, method, message: str = ""):
+        return super().until_not(self._guard(method), message)
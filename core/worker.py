@@ -0,0 +1,259 @@
+"""
+Узел-воркер для общего хранилища заданий (core/job_store.py).
+
+Каждая машина запускает `python worker.py run` со своим списком сетей
+(для которых на ней есть Chrome-профили и файлы сессий) и ёмкостью —
+сколько загрузок она тянет одновременно. Воркер:
+
+    - берёт задачи в аренду, пока есть свободные слоты;
+    - выполняет их через UploaderManager (job_id = "<задание>:<сеть>"),
+      контрольные точки из локального журнала дублирует в хранилище,
+      чтобы задачу мог продолжить другой узел;
+    - heartbeat'ом продлевает аренду и останавливает загрузки, которые
+      отменили или забрал другой узел. Если продлить аренду не удаётся
+      (хранилище недоступно) и она вот-вот истечёт, загрузка тоже
+      останавливается, а её итог в хранилище не пишется: задачу уже может
+      выполнять другой узел;
+    - при остановке возвращает незавершённые задачи в очередь.
+
+Настройки (.env):
+    FLOWVID_NODE_ID=box-1              имя узла (по умолчанию — имя хоста)
+    FLOWVID_NODE_NETWORKS=vk,telegram  сети узла (по умолчанию — все включённые)
+    FLOWVID_NODE_CAPACITY=2            одновременных загрузок на узле
+"""
+
+import os
+import socket
+import threading
+import time
+
+from config.networks import NETWORKS
+from core.cancellation import CancelToken, CancelledError
+from core.job_store import JobStore, StoredTask
+from core.journal import FINISHED, Journal
+from core.uploader_manager import UploaderManager
+from utils.logger import log
+
+
+class Worker:
+    """Цикл узла: аренда задач, выполнение, heartbeat (см. описание модуля)."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        node_id: str | None = None,
+        networks: list[str] | None = None,
+        capacity: int | None = None,
+        poll: float = 2.0,
+    ):
+        self.store = store
+        self.node_id = node_id or os.getenv("FLOWVID_NODE_ID") or socket.gethostname()
+        if networks is None:
+            env = os.getenv("FLOWVID_NODE_NETWORKS")
+            networks = [n.strip() for n in env.split(",") if n.strip()] if env else [n.key for n in NETWORKS if n.enabled]
+        self.networks = networks
+        self.capacity = max(1, capacity or int(os.getenv("FLOWVID_NODE_CAPACITY", "2")))
+        self.poll = poll
+
+        self._active: dict[tuple[str, str], CancelToken] = {}
+        self._lease_until: dict[tuple[str, str], float] = {}    # time.monotonic()
+        self._expired: set[tuple[str, str]] = set()             # аренда истекла без продления
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def journal_id(job_id: str, network: str) -> str:
+        return f"{job_id}:{network}"
+
+    # ================================================================
+    # Основной цикл
+    # ================================================================
+    def run(self):
+        """Работает, пока не вызван stop() (из другого потока или по Ctrl+C)."""
+        journal = Journal.instance()
+        journal.add_listener(self._on_journal)
+        self._reconcile()
+        self.store.register(self.node_id, self.networks, self.capacity)
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True)
+        heartbeat.start()
+        log(f"[WORKER] Узел {self.node_id}: сети {', '.join(self.networks)}, слотов {self.capacity}")
+
+        try:
+            while not self._stopping.is_set():
+                if self._busy() >= self.capacity:
+                    self._stopping.wait(0.5)
+                    continue
+                claimed = time.monotonic()
+                try:
+                    task = self.store.claim(self.node_id, self.networks)
+                except Exception as e:
+                    log(f"[WORKER] Хранилище заданий недоступно: {e}", level="warning")
+                    task = None
+                if task is None:
+                    self._stopping.wait(self.poll)
+                    continue
+                self._start(task, claimed + self.store.lease_seconds)
+        finally:
+            self._shutdown()
+            journal.remove_listener(self._on_journal)
+            journal.close()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _busy(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def _start(self, task: StoredTask, lease_until: float):
+        key = (task.job_id, task.network)
+        with self._lock:
+            self._active[key] = CancelToken()
+            self._lease_until[key] = lease_until
+            self._threads = [t for t in self._threads if t.is_alive()]
+            thread = threading.Thread(
+                target=self._execute, args=(task,), name=f"worker-{task.job_id}-{task.network}", daemon=True,
+            )
+            self._threads.append(thread)
+        thread.start()
+
+    def _shutdown(self):
+        """Останавливаем загрузки; _execute вернёт их задачи в очередь."""
+        with self._lock:
+            tokens = list(self._active.values())
+            threads = list(self._threads)
+        for token in tokens:
+            token.cancel()
+        for thread in threads:
+            thread.join(timeout=30)
+        try:
+            self.store.unregister(self.node_id)
+        except Exception as e:
+            log(f"[WORKER] Хранилище заданий недоступно: {e}", level="warning")
+        log(f"[WORKER] Узел {self.node_id} остановлен")
+
+    # ================================================================
+    # Выполнение задачи
+    # ================================================================
+    def _execute(self, task: StoredTask):
+        key = (task.job_id, task.network)
+        with self._lock:
+            token = self._active[key]
+        params = task.params
+        job_id = self.journal_id(task.job_id, task.network)
+
+        if task.stolen_from:
+            log(f"[WORKER] {task.job_id}/{task.network}: забрана у узла {task.stolen_from}")
+        if task.checkpoint:
+            # Продолжение с точки, сохранённой узлом, который начинал загрузку
+            Journal.instance().restore(job_id, "worker", {**params, "networks": [task.network]},
+                                       task.network, task.checkpoint)
+        log(f"[WORKER] Старт {task.job_id}/{task.network} (попытка {task.attempts})")
+
+        try:
+            result = UploaderManager.upload(
+                params["video_file"], [task.network], params["title"], params["description"],
+                params["tags"], params["thumbnail"],
+                cancel=token,
+                job_id=job_id,
+                origin="worker",
+            )
+        except CancelledError:
+            result = {"cancelled": True}
+        except Exception as e:
+            result = {"errors": [f"{task.network}: {e}"]}
+        finally:
+            with self._lock:
+                self._active.pop(key, None)
+                self._lease_until.pop(key, None)
+                expired = key in self._expired
+                self._expired.discard(key)
+
+        if expired:
+            # Аренду не продлили вовремя — задача уже может быть у другого узла
+            log(f"[WORKER] {task.job_id}/{task.network}: аренда истекла, итог не записан", level="warning")
+            return
+        if result.get("cancelled"):
+            if self._stopping.is_set():
+                # Узел останавливается — задачу доделает другой (или этот после перезапуска)
+                self.store.release(task.job_id, task.network, self.node_id)
+            return
+
+        errors = result.get("errors") or []
+        url = UploaderManager._result_url(result.get("results", {}).get(task.network))
+        error = errors[0].split(": ", 1)[-1] if errors else None
+        if not self.store.complete(task.job_id, task.network, self.node_id, not errors, url, error):
+            log(f"[WORKER] {task.job_id}/{task.network}: аренда потеряна, итог не записан", level="warning")
+        else:
+            log(f"[WORKER] {task.job_id}/{task.network}: {'ошибка — ' + error if errors else 'готово'}")
+
+    # ================================================================
+    # Heartbeat, контрольные точки, восстановление
+    # ================================================================
+    def _heartbeat_loop(self):
+        interval = self.store.lease_seconds / 3
+        while not self._stopping.wait(interval):
+            with self._lock:
+                active = dict(self._active)
+            sent = time.monotonic()
+            try:
+                lost = self.store.heartbeat(self.node_id, list(active))
+            except Exception as e:
+                log(f"[WORKER] Heartbeat не записан: {e}", level="warning")
+                self._expire(time.monotonic() + interval)
+                continue
+            with self._lock:
+                lost = [key for key in lost if key in self._active]
+                for key in active:
+                    if key in self._lease_until and key not in lost:
+                        self._lease_until[key] = sent + self.store.lease_seconds
+            for key in lost:
+                log(f"[WORKER] {key[0]}/{key[1]}: задача отменена или передана другому узлу", level="warning")
+                active[key].cancel()
+
+    def _expire(self, horizon: float):
+        """
+        Останавливает загрузки, аренда которых истечёт до horizon (до
+        следующего heartbeat): продлить её уже не успеем, а после истечения
+        задачу может забрать другой узел и опубликовать второй раз.
+        """
+        with self._lock:
+            expiring = [
+                key for key, until in self._lease_until.items()
+                if until <= horizon and key not in self._expired
+            ]
+            self._expired.update(expiring)
+            tokens = [self._active[key] for key in expiring if key in self._active]
+        for key in expiring:
+            log(f"[WORKER] {key[0]}/{key[1]}: аренда не продлена и истекает — загрузка остановлена", level="warning")
+        for token in tokens:
+            token.cancel()
+
+    def _on_journal(self, record: dict):
+        """Контрольные точки локального журнала → общее хранилище."""
+        if record.get("ev") != "checkpoint":
+            return
+        job_id, _, network = record.get("job", "").rpartition(":")
+        with self._lock:
+            mine = (job_id, network) in self._active
+        if mine:
+            try:
+                self.store.save_checkpoint(job_id, network, self.node_id, record["cp"])
+            except Exception as e:
+                log(f"[WORKER] Контрольная точка не сохранена в хранилище: {e}", level="warning")
+
+    def _reconcile(self):
+        """
+        Задачи из журнала прошлого запуска узла: опубликованные, но не
+        отмеченные в хранилище, отмечаем; остальные хранилище раздаст
+        заново с последней сохранённой контрольной точкой.
+        """
+        journal = Journal.instance()
+        for entry in journal.recover(("worker",)):
+            job_id, _, network = entry.job_id.rpartition(":")
+            net = entry.network(network)
+            if net.recovery() == FINISHED:
+                if self.store.complete(job_id, network, self.node_id, True, net.url):
+                    log(f"[WORKER] {job_id}/{network}: опубликовано до сбоя, отмечено в хранилище")
+            journal.end(entry.job_id, "handed_over")
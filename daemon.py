@@ -0,0 +1,107 @@
+"""
+Планировщик публикаций без GUI.
+
+    python daemon.py run
+    python daemon.py add video.mp4 --at "2026-10-20 18:30" -n youtube -n vk \
+        --title "Заголовок" --description "Описание" --tags "тег1, тег2"
+    python daemon.py list
+    python daemon.py cancel <id>
+
+`run` держит расписание и выполняет задачи в срок; остальные команды
+можно вызывать из другого терминала — заявки попадают в ./data/schedule_inbox.
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from core.metrics import start_exporters_from_env
+from core.scheduler import Scheduler, ScheduledPost
+from core.tags import split_tags
+from utils.logger import setup_logging
+from utils.paths import ensure_dirs
+
+
+def cmd_run(args) -> int:
+    start_exporters_from_env()
+    scheduler = Scheduler.instance()
+    if not scheduler.start():
+        print("Планировщик уже запущен другим процессом", file=sys.stderr)
+        return 1
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+def cmd_add(args) -> int:
+    publish_at = datetime.fromisoformat(args.at)
+    post = Scheduler.submit(ScheduledPost(
+        video_file=args.video,
+        networks=args.network,
+        publish_at=publish_at.timestamp(),
+        title=args.title,
+        description=args.description,
+        tags=split_tags(args.tags),
+        thumbnail=args.thumbnail,
+    ))
+    print(f"{post.id}  {post.name}  публикация {publish_at:%Y-%m-%d %H:%M}")
+    return 0
+
+
+def cmd_list(args) -> int:
+    scheduler = Scheduler.instance()
+    for post in scheduler.all_posts():
+        done = ", ".join(f"{n}:{r['status']}" for n, r in post.results.items())
+        print(f"{post.id}  {post.publish_datetime:%Y-%m-%d %H:%M}  {post.status:<9}  "
+              f"{post.name}  [{', '.join(post.networks)}]  {done}")
+    for task in scheduler.next_runs():
+        print(f"  ↳ {task.kind} {','.join(task.networks)} в {datetime.fromtimestamp(task.run_at):%Y-%m-%d %H:%M} ({task.post_id})")
+    pending = scheduler.pending_requests()
+    if pending:
+        print(f"Необработанных заявок: {pending} (запущен ли `daemon.py run`?)")
+    return 0
+
+
+def cmd_cancel(args) -> int:
+    Scheduler.request_cancel(args.id)
+    print(f"Запрошена отмена {args.id}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="FlowVid: отложенные публикации")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("run", help="запустить планировщик").set_defaults(func=cmd_run)
+
+    add = sub.add_parser("add", help="запланировать публикацию")
+    add.add_argument("video")
+    add.add_argument("--at", required=True, help="время публикации, напр. '2026-10-20 18:30'")
+    add.add_argument("-n", "--network", action="append", required=True, help="ключ сети (можно несколько раз)")
+    add.add_argument("--title", default="")
+    add.add_argument("--description", default="")
+    add.add_argument("--tags", default="", help="через запятую или с новой строки")
+    add.add_argument("--thumbnail")
+    add.set_defaults(func=cmd_add)
+
+    sub.add_parser("list", help="показать расписание").set_defaults(func=cmd_list)
+
+    cancel = sub.add_parser("cancel", help="отменить публикацию")
+    cancel.add_argument("id")
+    cancel.set_defaults(func=cmd_cancel)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    setup_logging("daemon")
+    ensure_dirs()
+    sys.exit(main())
@@ -2,16 +2,22 @@ from __future__ import annotations
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
     QLineEdit, QTextEdit, QFileDialog, QFrame, QMessageBox,
-    QLayout
+    QLayout, QProgressBar, QListWidget, QListWidgetItem, QAbstractItemView,
+    QScrollArea, QApplication, QCheckBox, QDateTimeEdit
 )
-from PyQt6.QtGui import QPixmap
+from PyQt6.QtGui import QPixmap, QKeySequence
 
-from PyQt6.QtCore import Qt, QPoint, QRect, QSize, QUrl
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PyQt6.QtMultimediaWidgets import QVideoWidget
+from PyQt6.QtCore import Qt, QPoint, QRect, QSize, QUrl, QTimer, QDateTime, pyqtSignal
 from utils.threading import WorkerThread
-from core.uploader_manager import UploaderManager
+from core.media_probe import MediaInfo, MediaProbe
+from core.upload_queue import UploadQueue, UploadJob
+from core.tags import TagModel, split_tags
+from core.scheduler import Scheduler, ScheduledPost
+from core.progress import ProgressBuffer, ProgressEvent
+from core.journal import Journal
 from config.networks import NETWORKS
+from datetime import datetime
+from pathlib import Path
 import os
 
 
@@ -19,14 +25,26 @@ import os
 #  FLOW LAYOUT (теги в несколько строк)
 # ============================================================
 class FlowLayout(QLayout):
+    """
+    Раскладка «по строкам» для тегов.
+
+    sizeHint элементов кэшируется: Qt вызывает invalidate() при
+    добавлении/удалении элементов и при updateGeometry() дочерних
+    виджетов, и только тогда кэш пересчитывается. Высота для ширины
+    тоже запоминается — повторные heightForWidth при ресайзе бесплатны.
+    """
+
     def __init__(self, parent=None, margin=0, spacing=6):
         super().__init__(parent)
         self.setContentsMargins(margin, margin, margin, margin)
         self._spacing = spacing
         self._items = []
+        self._hints: list[QSize] | None = None
+        self._hfw: tuple[int, int] | None = None   # (ширина, высота)
 
     def addItem(self, item):
         self._items.append(item)
+        self._drop_cache()
 
     def count(self):
         return len(self._items)
@@ -38,9 +56,23 @@ class FlowLayout(QLayout):
 
     def takeAt(self, index):
         if 0 <= index < len(self._items):
+            self._drop_cache()
             return self._items.pop(index)
         return None
 
+    def invalidate(self):
+        self._drop_cache()
+        super().invalidate()
+
+    def _drop_cache(self):
+        self._hints = None
+        self._hfw = None
+
+    def _item_hints(self) -> list[QSize]:
+        if self._hints is None:
+            self._hints = [item.widget().sizeHint() for item in self._items]
+        return self._hints
+
     def expandingDirections(self):
         return Qt.Orientation(0)
 
@@ -48,8 +80,9 @@ class FlowLayout(QLayout):
         return True
 
     def heightForWidth(self, width):
-        height = self._do_layout(QRect(0, 0, width, 0), test_only=True)
-        return height
+        if self._hfw is None or self._hfw[0] != width:
+            self._hfw = (width, self._do_layout(QRect(0, 0, width, 0), test_only=True))
+        return self._hfw[1]
 
     def setGeometry(self, rect):
         super().setGeometry(rect)
@@ -65,30 +98,422 @@ class FlowLayout(QLayout):
         x = rect.x()
         y = rect.y()
         line_height = 0
+        space_x = self._spacing
+        space_y = self._spacing
 
-        for item in self._items:
-            wid = item.widget()
-            space_x = self._spacing
-            space_y = self._spacing
-            next_x = x + wid.sizeHint().width() + space_x
+        for item, hint in zip(self._items, self._item_hints()):
+            next_x = x + hint.width() + space_x
 
             if next_x - space_x > rect.right() and line_height > 0:
                 x = rect.x()
                 y += line_height + space_y
-                next_x = x + wid.sizeHint().width() + space_x
+                next_x = x + hint.width() + space_x
                 line_height = 0
 
             if not test_only:
-                item.setGeometry(
-                    QRect(QPoint(x, y), wid.sizeHint())
-                )
+                item.setGeometry(QRect(QPoint(x, y), hint))
 
             x = next_x
-            line_height = max(line_height, wid.sizeHint().height())
+            line_height = max(line_height, hint.height())
 
         return y + line_height - rect.y()
 
 
+class TagInput(QLineEdit):
+    """
+    Поле массового ввода тегов: Enter или вставка (Ctrl+V) разбивают
+    текст по запятым и переводам строк и отдают список в tags_entered.
+    """
+
+    tags_entered = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setPlaceholderText("Теги через запятую или с новой строки, Enter — добавить")
+        self.returnPressed.connect(self._commit)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Paste):
+            # QLineEdit склеивает многострочный текст — разбираем буфер сами
+            tags = split_tags(self.text() + "," + QApplication.clipboard().text())
+            self.clear()
+            if tags:
+                self.tags_entered.emit(tags)
+            return
+        super().keyPressEvent(event)
+
+    def _commit(self):
+        tags = split_tags(self.text())
+        self.clear()
+        if tags:
+            self.tags_entered.emit(tags)
+
+
+# ============================================================
+#  ПРОГРЕСС ПО СЕТЯМ
+# ============================================================
+STAGE_TITLES = {
+    "throttle": "Ожидание лимита",
+    "auth": "Авторизация",
+    "chrome_launch": "Запуск Chrome",
+    "open_page": "Открытие страницы",
+    "open_uploader": "Открытие загрузчика",
+    "connect": "Подключение",
+    "file_transfer": "Передача файла",
+    "processing": "Обработка",
+    "metadata": "Метаданные",
+    "category": "Категория",
+    "link": "Получение ссылки",
+    "thumbnail": "Обложка",
+    "publish": "Публикация",
+    "retry_wait": "Пауза перед повтором",
+}
+
+STATUS_TITLES = {
+    "queued": "В очереди",
+    "done": "Готово",
+    "error": "Ошибка",
+    "cancelled": "Отменено",
+}
+
+
+def _format_rate(rate: float | None) -> str:
+    if not rate:
+        return ""
+    return f"{rate / (1024 * 1024):.1f} МБ/с"
+
+
+def _format_eta(eta: float | None) -> str:
+    if eta is None or eta <= 0:
+        return ""
+    minutes, seconds = divmod(int(eta), 60)
+    return f"~{minutes}:{seconds:02d}"
+
+
+class NetworkProgressRow(QWidget):
+    """Строка панели: сеть | этап | прогресс | скорость | ETA | ссылка."""
+
+    def __init__(self, title: str):
+        super().__init__()
+        row = QHBoxLayout(self)
+        row.setContentsMargins(0, 0, 0, 0)
+
+        self.name = QLabel(title)
+        self.name.setFixedWidth(220)
+        self.name.setToolTip(title)
+        self.stage = QLabel(STATUS_TITLES["queued"])
+        self.stage.setFixedWidth(160)
+        self.bar = QProgressBar()
+        self.bar.setRange(0, 100)
+        self.bar.setValue(0)
+        self.rate = QLabel("")
+        self.rate.setFixedWidth(90)
+        self.eta = QLabel("")
+        self.eta.setFixedWidth(60)
+        self.link = QLabel("")
+        self.link.setOpenExternalLinks(True)
+        self.link.setTextInteractionFlags(Qt.TextInteractionFlag.TextBrowserInteraction)
+
+        for w in (self.name, self.stage, self.bar, self.rate, self.eta, self.link):
+            row.addWidget(w)
+
+    def apply(self, ev: ProgressEvent):
+        if ev.status == "running":
+            self.stage.setText(STAGE_TITLES.get(ev.stage, ev.stage))
+        else:
+            self.stage.setText(STATUS_TITLES.get(ev.status, ev.status))
+
+        fraction = ev.fraction
+        if fraction is not None and (ev.status != "running" or ev.stage == "file_transfer" or ev.sent):
+            self.bar.setRange(0, 100)
+            self.bar.setValue(int(fraction * 100))
+        elif ev.status == "running":
+            self.bar.setRange(0, 0)   # неизвестный прогресс — «бегущая» полоса
+        else:
+            self.bar.setRange(0, 100)
+
+        self.rate.setText(_format_rate(ev.rate) if ev.status == "running" else "")
+        self.eta.setText(_format_eta(ev.eta) if ev.status == "running" else "")
+
+        if ev.url:
+            self.link.setText(f'<a href="{ev.url}">{ev.url}</a>')
+        elif ev.error:
+            self.link.setText(ev.error)
+            self.link.setToolTip(ev.error)
+
+
+class ProgressPanel(QWidget):
+    """
+    Живая панель загрузки: по строке на каждую пару (задание, сеть).
+
+    push() вызывается из потоков загрузки и лишь кладёт событие в буфер;
+    таймер применяет накопленные события к виджетам не чаще refresh_ms,
+    поэтому поток событий любой частоты не перегружает event loop.
+    Строки создаются по первому событию; подпись берётся из label_for.
+    """
+
+    def __init__(self, parent=None, refresh_ms: int = 100, label_for=None):
+        super().__init__(parent)
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._rows: dict[tuple, NetworkProgressRow] = {}
+        self.buffer = ProgressBuffer()
+        self.label_for = label_for or (lambda job, network: network)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(refresh_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def reset(self):
+        for row in self._rows.values():
+            row.setParent(None)
+        self._rows = {}
+        self.buffer.drain()
+
+    def remove_job(self, job: str):
+        for key in [k for k in self._rows if k[0] == job]:
+            self._rows.pop(key).setParent(None)
+
+    def push(self, ev: ProgressEvent):
+        self.buffer.push(ev)
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        self.flush()
+
+    def flush(self):
+        for ev in self.buffer.drain():
+            key = (ev.job, ev.network)
+            row = self._rows.get(key)
+            if row is None:
+                row = NetworkProgressRow(self.label_for(ev.job, ev.network))
+                self._rows[key] = row
+                self._layout.addWidget(row)
+            row.apply(ev)
+
+
+# ============================================================
+#  ПРЕВЬЮ ВИДЕО
+# ============================================================
+def _format_duration(seconds: float | None) -> str:
+    if not seconds:
+        return ""
+    minutes, sec = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{sec:02d}" if hours else f"{minutes}:{sec:02d}"
+
+
+class VideoPreview(QWidget):
+    """
+    Превью видео: кадр-постер из кэша MediaProbe (ffprobe/ffmpeg в фоне).
+
+    QtMultimedia поднимает медиа-бэкенд и долго открывает большие файлы,
+    поэтому плеер импортируется и создаётся только при первом нажатии
+    «Воспроизвести».
+    """
+
+    HEIGHT = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+
+        self.poster = QLabel("Нет превью")
+        self.poster.setMinimumHeight(self.HEIGHT)
+        self.poster.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._layout.addWidget(self.poster)
+
+        controls = QHBoxLayout()
+        self.play_btn = QPushButton("▶ Воспроизвести")
+        self.play_btn.setEnabled(False)
+        self.play_btn.clicked.connect(self.toggle_play)
+        controls.addWidget(self.play_btn)
+
+        self.info = QLabel("")
+        controls.addWidget(self.info, 1)
+        self._layout.addLayout(controls)
+
+        self._file = None
+        self._player = None
+        self._audio = None
+        self._video_widget = None
+        self._probes: list[WorkerThread] = []
+
+    def set_file(self, file: str | None):
+        if file == self._file:
+            return
+        self._file = file
+        self._stop_player()
+
+        self.poster.setPixmap(QPixmap())
+        self.poster.setText("Загрузка превью..." if file else "Нет превью")
+        self.info.setText("")
+        self.play_btn.setEnabled(bool(file))
+        if not file:
+            return
+
+        # Держим ссылки на потоки до их завершения, иначе Qt уничтожит их на ходу
+        self._probes = [w for w in self._probes if not w.isFinished()]
+        worker = WorkerThread(MediaProbe.instance().probe, file)
+        worker.finished.connect(lambda info, f=file: self._on_probe(f, info))
+        worker.error.connect(lambda err, f=file: self._on_probe_error(f, err))
+        self._probes.append(worker)
+        worker.start()
+
+    def _on_probe(self, file: str, info: MediaInfo):
+        if file != self._file:
+            return   # пользователь уже выбрал другое видео
+
+        if info.poster:
+            pix = QPixmap(info.poster).scaledToHeight(self.HEIGHT, Qt.TransformationMode.SmoothTransformation)
+            self.poster.setPixmap(pix)
+        else:
+            self.poster.setText("Превью недоступно (нужен ffmpeg)")
+
+        parts = [info.resolution, _format_duration(info.duration), info.codec, f"{info.size / (1024 * 1024):.1f} МБ"]
+        self.info.setText(" · ".join(p for p in parts if p))
+
+    def _on_probe_error(self, file: str, err: str):
+        if file == self._file:
+            self.poster.setText(f"Превью недоступно: {err}")
+
+    # ------------------- PLAYER -----------------------------
+    def _ensure_player(self):
+        if self._player is not None:
+            return
+        # Импорт здесь: QtMultimedia заметно замедляет старт окна
+        from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+        from PyQt6.QtMultimediaWidgets import QVideoWidget
+
+        self._player = QMediaPlayer(self)
+        self._audio = QAudioOutput(self)
+        self._player.setAudioOutput(self._audio)
+
+        self._video_widget = QVideoWidget()
+        self._video_widget.setMinimumHeight(self.HEIGHT)
+        self._player.setVideoOutput(self._video_widget)
+        self._layout.insertWidget(0, self._video_widget)
+
+    def toggle_play(self):
+        if not self._file:
+            return
+        self._ensure_player()
+
+        from PyQt6.QtMultimedia import QMediaPlayer
+        if self._player.playbackState() == QMediaPlayer.PlaybackState.PlayingState:
+            self._player.pause()
+            self.play_btn.setText("▶ Воспроизвести")
+            return
+
+        source = QUrl.fromLocalFile(self._file)
+        if self._player.source() != source:
+            self._player.setSource(source)
+        self.poster.hide()
+        self._video_widget.show()
+        self._player.play()
+        self.play_btn.setText("❚❚ Пауза")
+
+    def _stop_player(self):
+        self.play_btn.setText("▶ Воспроизвести")
+        if self._player is None:
+            return
+        self._player.stop()
+        self._player.setSource(QUrl())
+        self._video_widget.hide()
+        self.poster.show()
+
+
+# ============================================================
+#  ОЧЕРЕДЬ ВИДЕО (drag-and-drop)
+# ============================================================
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi")
+
+JOB_STATUS_TITLES = {
+    "draft": "Черновик",
+    "pending": "В очереди",
+    "running": "Загружается",
+    "scheduled": "Запланировано",
+    "done": "Готово",
+    "error": "Ошибка",
+    "cancelled": "Отменено",
+}
+
+
+class QueueView(QListWidget):
+    """Список заданий очереди; принимает перетаскивание видеофайлов."""
+
+    files_dropped = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAcceptDrops(True)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DropOnly)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+
+    @staticmethod
+    def _video_paths(event) -> list[str]:
+        mime = event.mimeData()
+        if not mime.hasUrls():
+            return []
+        return [
+            url.toLocalFile() for url in mime.urls()
+            if url.isLocalFile() and url.toLocalFile().lower().endswith(VIDEO_EXTENSIONS)
+        ]
+
+    def dragEnterEvent(self, event):
+        if self._video_paths(event):
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dragMoveEvent(self, event):
+        self.dragEnterEvent(event)
+
+    def dropEvent(self, event):
+        paths = self._video_paths(event)
+        if not paths:
+            event.ignore()
+            return
+        event.acceptProposedAction()
+        self.files_dropped.emit(paths)
+
+    def sync(self, jobs: list[UploadJob]):
+        """Приводит строки к состоянию очереди, не сбрасывая выделение."""
+        items = {}
+        for i in range(self.count()):
+            item = self.item(i)
+            items[item.data(Qt.ItemDataRole.UserRole)] = item
+
+        for job in jobs:
+            text = f"{job.name} — {JOB_STATUS_TITLES.get(job.status, job.status)}"
+            if job.status == "scheduled" and job.publish_at:
+                text += f" на {datetime.fromtimestamp(job.publish_at):%d.%m %H:%M}"
+            item = items.pop(job.id, None)
+            if item is None:
+                item = QListWidgetItem(text)
+                item.setData(Qt.ItemDataRole.UserRole, job.id)
+                self.addItem(item)
+            elif item.text() != text:
+                item.setText(text)
+
+        for item in items.values():
+            self.takeItem(self.row(item))
+
+    def current_job_id(self) -> str | None:
+        item = self.currentItem()
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
+
+    def select_job(self, job_id: str):
+        for i in range(self.count()):
+            if self.item(i).data(Qt.ItemDataRole.UserRole) == job_id:
+                self.setCurrentRow(i)
+                return
+
+
 # ============================================================
 #  MAIN GUI
 # ============================================================
@@ -98,26 +523,40 @@ class VideoUploaderGUI(QWidget):
         self.setWindowTitle("FlowVid Uploader")
         self.setWindowState(Qt.WindowState.WindowMaximized)
 
-        layout = QVBoxLayout(self)
+        root = QHBoxLayout(self)
 
-        # ------------------- SELECT VIDEO --------------------
-        self.video_label = QLabel("Видео не выбрано")
-        self.video_btn = QPushButton("Выбрать видео")
+        # ------------------- QUEUE ------------------------------
+        queue_layout = QVBoxLayout()
+        queue_layout.addWidget(QLabel("Очередь (перетащите видео сюда):"))
+
+        self.queue_view = QueueView()
+        self.queue_view.files_dropped.connect(self.add_videos)
+        self.queue_view.currentItemChanged.connect(self.on_job_selected)
+        queue_layout.addWidget(self.queue_view)
+
+        queue_buttons = QHBoxLayout()
+        self.video_btn = QPushButton("Добавить видео")
         self.video_btn.clicked.connect(self.select_video)
+        queue_buttons.addWidget(self.video_btn)
 
-        layout.addWidget(self.video_label)
-        layout.addWidget(self.video_btn)
+        self.remove_btn = QPushButton("Убрать")
+        self.remove_btn.setEnabled(False)
+        self.remove_btn.clicked.connect(self.remove_job)
+        queue_buttons.addWidget(self.remove_btn)
+        queue_layout.addLayout(queue_buttons)
 
-        # PREVIEW VIDEO
-        self.player = QMediaPlayer()
-        self.audio = QAudioOutput()
-        self.player.setAudioOutput(self.audio)
+        root.addLayout(queue_layout, 1)
 
-        self.video_widget = QVideoWidget()
-        self.video_widget.setMinimumHeight(200)
-        self.player.setVideoOutput(self.video_widget)
+        layout = QVBoxLayout()
+        root.addLayout(layout, 3)
+
+        # ------------------- VIDEO ------------------------------
+        self.video_label = QLabel("Видео не выбрано")
+        layout.addWidget(self.video_label)
 
-        layout.addWidget(self.video_widget)
+        # PREVIEW VIDEO
+        self.preview = VideoPreview()
+        layout.addWidget(self.preview)
 
         # ------------------- NETWORKS -------------------------
         layout.addWidget(QLabel("Платформы:"))
@@ -129,6 +568,7 @@ class VideoUploaderGUI(QWidget):
                 continue
             btn = QPushButton(net.title)
             btn.setCheckable(True)
+            btn.toggled.connect(self.save_editor)
             self.network_buttons[net.key] = btn
             net_layout.addWidget(btn)
 
@@ -137,25 +577,40 @@ class VideoUploaderGUI(QWidget):
         # ------------------- TITLE -----------------------------
         layout.addWidget(QLabel("Заголовок:"))
         self.title_input = QLineEdit()
+        self.title_input.textChanged.connect(self.save_editor)
         layout.addWidget(self.title_input)
 
         # ------------------- DESCRIPTION -----------------------
         layout.addWidget(QLabel("Описание:"))
         self.desc_input = QTextEdit()
         self.desc_input.setMaximumHeight(100)
+        self.desc_input.textChanged.connect(self.save_editor)
         layout.addWidget(self.desc_input)
 
         # ------------------- TAGS -------------------------------
         layout.addWidget(QLabel("Теги:"))
 
+        self.tag_model = TagModel()
+        self._tag_frames: dict[int, QFrame] = {}
+
+        self.tag_input = TagInput()
+        self.tag_input.tags_entered.connect(self.add_tags)
+        layout.addWidget(self.tag_input)
+
         self.tags_container = QWidget()
         self.tags_layout = FlowLayout(self.tags_container)
 
         self.add_tag_btn = QPushButton("+ тег")
-        self.add_tag_btn.clicked.connect(self.add_tag)
+        self.add_tag_btn.clicked.connect(lambda: self.add_tag())
         self.tags_layout.addWidget(self.add_tag_btn)
 
-        layout.addWidget(self.tags_container)
+        # Сотни тегов не растягивают окно — прокручиваются
+        self.tags_scroll = QScrollArea()
+        self.tags_scroll.setWidgetResizable(True)
+        self.tags_scroll.setFrameShape(QFrame.Shape.NoFrame)
+        self.tags_scroll.setMaximumHeight(160)
+        self.tags_scroll.setWidget(self.tags_container)
+        layout.addWidget(self.tags_scroll)
 
         # ------------------- THUMBNAIL --------------------------
         self.thumb_label = QLabel("Миниатюра не выбрана")
@@ -172,34 +627,90 @@ class VideoUploaderGUI(QWidget):
         layout.addWidget(self.thumb_preview)
 
         # ------------------- UPLOAD -----------------------------
+        upload_row = QHBoxLayout()
         self.upload_btn = QPushButton("Загрузить")
+        self.upload_btn.setEnabled(False)
         self.upload_btn.clicked.connect(self.upload_video)
-        layout.addWidget(self.upload_btn)
+        upload_row.addWidget(self.upload_btn)
+
+        self.upload_all_btn = QPushButton("Загрузить все")
+        self.upload_all_btn.clicked.connect(self.upload_all)
+        upload_row.addWidget(self.upload_all_btn)
+
+        self.cancel_btn = QPushButton("Отмена")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_upload)
+        upload_row.addWidget(self.cancel_btn)
+
+        # Отложенная публикация: задания уходят планировщику
+        self.schedule_check = QCheckBox("Опубликовать в")
+        upload_row.addWidget(self.schedule_check)
+        self.schedule_time = QDateTimeEdit(QDateTime.currentDateTime().addSecs(3600))
+        self.schedule_time.setCalendarPopup(True)
+        self.schedule_time.setDisplayFormat("dd.MM.yyyy HH:mm")
+        self.schedule_time.setEnabled(False)
+        self.schedule_check.toggled.connect(self.schedule_time.setEnabled)
+        upload_row.addWidget(self.schedule_time)
+        layout.addLayout(upload_row)
+
+        self.progress_panel = ProgressPanel(label_for=self._progress_label)
+        layout.addWidget(self.progress_panel)
 
         self.status = QLabel("")
         self.status.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.status)
 
-        self._worker = None
-        self.video_file_path = None
         self.thumbnail_path = None
+        self._job_id = None
+        self._loading = False
+        self._editor_widgets = [
+            self.title_input, self.desc_input, self.tag_input, self.tags_container, self.thumb_btn,
+            *self.network_buttons.values(),
+        ]
+
+        # ------------------- WORKERS ----------------------------
+        self.queue = UploadQueue(
+            workers=int(os.getenv("FLOWVID_QUEUE_WORKERS", "2")),
+            on_progress=self.progress_panel.push,
+        )
+        self.queue.start()
+        self.progress_panel.start()
+        # Задания, прерванные падением прошлого запуска, продолжаются сами
+        self.queue.recover()
+
+        # Если расписанием уже владеет daemon.py, заявки уйдут ему
+        self.scheduler = Scheduler.instance()
+        # Ход загрузок по расписанию — в ту же панель (если расписанием владеет GUI)
+        self.scheduler.on_progress = self.progress_panel.push
+        self.scheduler_owner = self.scheduler.start()
+
+        # Статусы заданий меняются в потоках воркеров — опрашиваем по таймеру
+        self._queue_timer = QTimer(self)
+        self._queue_timer.setInterval(250)
+        self._queue_timer.timeout.connect(self.refresh_queue)
+        self._queue_timer.start()
+
+    def closeEvent(self, event):
+        self.preview.set_file(None)
+        self._queue_timer.stop()
+        # Журнал закрывается до остановки очереди: идущие загрузки остаются
+        # в нём незавершёнными и продолжатся при следующем запуске
+        Journal.instance().close()
+        self.queue.stop()
+        if self.scheduler_owner:
+            self.scheduler.stop()
+        self.progress_panel.stop()
+        super().closeEvent(event)
 
     # ============================================================
     #  FILE PICKERS
     # ============================================================
     def select_video(self):
-        file, _ = QFileDialog.getOpenFileName(
+        files, _ = QFileDialog.getOpenFileNames(
             self, "Выберите видео", "", "Video (*.mp4 *.mov *.avi)"
         )
-        if not file:
-            return
-
-        self.video_file_path = file
-        self.video_label.setText(f"Видео: {os.path.basename(file)}")
-
-        self.player.setSource(QUrl.fromLocalFile(file))
-        self.player.play()
-        self.player.pause()   # показываем первый кадр
+        if files:
+            self.add_videos(files)
 
     def select_image(self):
         file, _ = QFileDialog.getOpenFileName(
@@ -208,98 +719,266 @@ class VideoUploaderGUI(QWidget):
         if not file:
             return
 
+        self._set_thumbnail(file)
+        self.save_editor()
+
+    def _set_thumbnail(self, file: str | None):
         self.thumbnail_path = file
-        self.thumb_label.setText(f"Картинка: {os.path.basename(file)}")
+        if not file:
+            self.thumb_label.setText("Миниатюра не выбрана")
+            self.thumb_preview.clear()
+            return
 
+        self.thumb_label.setText(f"Картинка: {os.path.basename(file)}")
         pix = QPixmap(file).scaledToHeight(180, Qt.TransformationMode.SmoothTransformation)
         self.thumb_preview.setPixmap(pix)
 
+    def _show_video(self, file: str | None):
+        self.video_label.setText(f"Видео: {os.path.basename(file)}" if file else "Видео не выбрано")
+        self.preview.set_file(file)
+
+    # ============================================================
+    #  QUEUE
+    # ============================================================
+    def add_videos(self, files: list[str]):
+        """Каждый файл — отдельный черновик с сетями, отмеченными сейчас."""
+        networks = self._checked_networks()
+        jobs = [
+            self.queue.add(UploadJob(video_file=file, networks=networks, title=Path(file).stem))
+            for file in files
+        ]
+        self.refresh_queue()
+        if jobs:
+            self.queue_view.select_job(jobs[0].id)
+
+    def current_job(self) -> UploadJob | None:
+        return self.queue.get(self._job_id) if self._job_id else None
+
+    def on_job_selected(self, *_):
+        self._job_id = self.queue_view.current_job_id()
+        self.load_job(self.current_job())
+
+    def load_job(self, job: UploadJob | None):
+        """Показывает метаданные задания в редакторе (без обратной записи)."""
+        self._loading = True
+        try:
+            if job is None:
+                self.title_input.clear()
+                self.desc_input.clear()
+                self.set_tags([])
+                self._set_thumbnail(None)
+                self._show_video(None)
+            else:
+                self.title_input.setText(job.title)
+                self.desc_input.setPlainText(job.description)
+                self.set_tags(job.tags)
+                for key, btn in self.network_buttons.items():
+                    btn.setChecked(key in job.networks)
+                self._set_thumbnail(job.thumbnail)
+                self._show_video(job.video_file)
+        finally:
+            self._loading = False
+        self._update_controls()
+
+    def save_editor(self, *_):
+        """Записывает редактор в выбранное задание, пока оно не загружается."""
+        if self._loading or not self._job_id:
+            return
+        self.queue.update(
+            self._job_id,
+            title=self.title_input.text(),
+            description=self.desc_input.toPlainText(),
+            tags=self.gather_tags(),
+            networks=self._checked_networks(),
+            thumbnail=self.thumbnail_path,
+        )
+
+    def remove_job(self):
+        job = self.current_job()
+        if not job:
+            return
+        if not self.queue.remove(job.id):
+            QMessageBox.warning(self, "Ошибка", "Сначала отмените загрузку")
+            return
+        self.progress_panel.remove_job(job.id)
+        self.refresh_queue()
+
+    def refresh_queue(self):
+        self._sync_scheduled()
+        jobs = self.queue.jobs()
+        self.queue_view.sync(jobs)
+        self._update_controls()
+
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        self.status.setText(", ".join(
+            f"{JOB_STATUS_TITLES[status]}: {counts[status]}"
+            for status in JOB_STATUS_TITLES if counts.get(status)
+        ))
+
+    def _sync_scheduled(self):
+        """Задания, отданные планировщику, получают его итог (done/error/cancelled)."""
+        for job in self.queue.jobs():
+            if job.status != "scheduled":
+                continue
+            post = self.scheduler.status(job.id)
+            if post and post.status in ("done", "error", "cancelled"):
+                errors = [
+                    f"{net}: {r.get('error', '')}" for net, r in post.results.items() if r.get("status") == "error"
+                ]
+                result = {"results": post.results, **({"errors": errors} if errors else {})}
+                self.queue.finish_scheduled(job.id, post.status, result)
+
+    def _update_controls(self):
+        job = self.current_job()
+        editable = job is None or job.editable
+        for w in self._editor_widgets:
+            w.setEnabled(editable)
+        self.upload_btn.setEnabled(job is not None and job.status in UploadQueue.SUBMITTABLE)
+        self.cancel_btn.setEnabled(job is not None and job.status in ("pending", "running", "scheduled"))
+        self.remove_btn.setEnabled(job is not None and job.status != "running")
+
+    def _checked_networks(self) -> list[str]:
+        return [key for key, btn in self.network_buttons.items() if btn.isChecked()]
+
+    def _progress_label(self, job_id: str | None, network: str) -> str:
+        job = self.queue.get(job_id) if job_id else None
+        title = next((net.title for net in NETWORKS if net.key == network), network)
+        return f"{job.name} · {title}" if job else title
+
     # ============================================================
     #  TAGS
     # ============================================================
-    def add_tag(self):
+    def add_tag(self, text: str = "") -> bool:
+        tag_id = self.tag_model.add(text)
+        if tag_id is None:
+            return False   # такой тег уже есть
+
         tag_frame = QFrame()
         tag_frame.setObjectName("tagFrame")
 
         tag_layout = QHBoxLayout(tag_frame)
         tag_layout.setContentsMargins(4, 4, 4, 4)
 
-        tag_input = QLineEdit()
+        tag_input = QLineEdit(text)
         tag_input.setFixedHeight(24)
         tag_input.setMaximumWidth(150)
         tag_input.setObjectName("tagLabel")
+        tag_input.textChanged.connect(lambda value: self._on_tag_edited(tag_id, value))
 
         rm = QPushButton("×")
         rm.setFixedWidth(20)
         rm.setFixedHeight(24)
         rm.setObjectName("tagRemove")
-        rm.clicked.connect(lambda: self.remove_tag(tag_frame))
+        rm.clicked.connect(lambda: self.remove_tag(tag_id))
 
         tag_layout.addWidget(tag_input)
         tag_layout.addWidget(rm)
 
+        self._tag_frames[tag_id] = tag_frame
         self.tags_layout.addWidget(tag_frame)
+        return True
 
-    def remove_tag(self, frame):
-        frame.setParent(None)
+    def add_tags(self, tags: list[str]):
+        """Массовое добавление (вставка из SEO-инструментов)."""
+        self.tags_container.setUpdatesEnabled(False)
+        try:
+            added = sum(self.add_tag(tag) for tag in tags)
+        finally:
+            self.tags_container.setUpdatesEnabled(True)
+        if added:
+            self.save_editor()
+
+    def _on_tag_edited(self, tag_id: int, text: str):
+        self.tag_model.set(tag_id, text)
+        self.save_editor()
+
+    def remove_tag(self, tag_id: int):
+        self.tag_model.remove(tag_id)
+        frame = self._tag_frames.pop(tag_id, None)
+        if frame:
+            frame.setParent(None)
+        self.save_editor()
+
+    def set_tags(self, tags: list[str]):
+        self.tags_container.setUpdatesEnabled(False)
+        try:
+            for frame in self._tag_frames.values():
+                frame.setParent(None)
+            self._tag_frames = {}
+            self.tag_model.clear()
+            for tag in tags:
+                self.add_tag(tag)
+        finally:
+            self.tags_container.setUpdatesEnabled(True)
 
     def gather_tags(self):
-        tags = []
-        for i in range(self.tags_layout.count()):
-            item = self.tags_layout.itemAt(i)
-            if not item:
-                continue
-            w = item.widget()
-            if isinstance(w, QFrame):
-                input_field = w.findChild(QLineEdit)
-                if input_field:
-                    text = input_field.text().strip()
-                    if text:
-                        tags.append(text)
-        return tags
+        return self.tag_model.tags()
 
     # ============================================================
     #  UPLOAD
     # ============================================================
     def upload_video(self):
-        if not self.video_file_path:
+        job = self.current_job()
+        if not job:
             QMessageBox.warning(self, "Ошибка", "Выберите видео")
             return
 
-        networks = [
-            key for key, btn in self.network_buttons.items()
-            if btn.isChecked()
-        ]
-
-        if not networks:
+        self.save_editor()
+        job = self.current_job()
+        if not job.networks:
             QMessageBox.warning(self, "Ошибка", "Выберите платформы")
             return
 
-        title = self.title_input.text()
-        desc = self.desc_input.toPlainText()
-        tags = self.gather_tags()
-        thumb = self.thumbnail_path
+        self._submit(job)
+        self.refresh_queue()
 
-        self.upload_btn.setEnabled(False)
-        self.status.setText("Загрузка...")
+        # Сразу переходим к следующему черновику — его можно править,
+        # пока воркеры грузят предыдущие
+        draft = next((j for j in self.queue.jobs() if j.status == "draft"), None)
+        if draft:
+            self.queue_view.select_job(draft.id)
 
-        self._worker = WorkerThread(
-            UploaderManager.upload,
-            self.video_file_path, networks, title, desc, tags, thumb
-        )
-        self._worker.finished.connect(self.on_finish)
-        self._worker.error.connect(self.on_error)
-        self._worker.start()
-
-    def on_finish(self, result):
-        self.upload_btn.setEnabled(True)
-        self.status.setText("")
-        if isinstance(result, dict) and result.get("errors"):
-            QMessageBox.critical(self, "Ошибка", f"Ошибки:\n{result['errors']}")
+    def upload_all(self):
+        self.save_editor()
+        skipped = 0
+        for job in self.queue.jobs():
+            if job.status != "draft":
+                continue
+            if not job.networks:
+                skipped += 1
+                continue
+            self._submit(job)
+        self.refresh_queue()
+        if skipped:
+            QMessageBox.warning(self, "Ошибка", f"Без платформ пропущено видео: {skipped}")
+
+    def _submit(self, job: UploadJob):
+        """В очередь воркеров сразу или планировщику — на выбранное время."""
+        if not self.schedule_check.isChecked():
+            self.queue.submit(job.id)
             return
-        QMessageBox.information(self, "Успех", "Видео загружено!")
-
-    def on_error(self, err):
-        self.upload_btn.setEnabled(True)
-        self.status.setText("")
-        QMessageBox.critical(self, "Ошибка", err)
+        publish_at = self.schedule_time.dateTime().toSecsSinceEpoch()
+        # id поста совпадает с id задания — по нему же отменяем
+        Scheduler.submit(ScheduledPost(
+            video_file=job.video_file,
+            networks=list(job.networks),
+            publish_at=float(publish_at),
+            title=job.title,
+            description=job.description,
+            tags=list(job.tags),
+            thumbnail=job.thumbnail,
+            id=job.id,
+        ))
+        self.queue.mark_scheduled(job.id, float(publish_at))
+
+    def cancel_upload(self):
+        job = self.current_job()
+        if not job:
+            return
+        if job.status == "scheduled":
+            Scheduler.request_cancel(job.id)
+        self.queue.cancel(job.id)
+        self.cancel_btn.setEnabled(False)
+        self.refresh_queue()
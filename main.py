@@ -2,12 +2,16 @@ from PyQt6.QtWidgets import QApplication
 from gui import VideoUploaderGUI
 from sys import argv
 from utils.paths import ensure_dirs
+from core.metrics import start_exporters_from_env
 from dotenv import load_dotenv
+from utils.logger import setup_logging
 
 
 if __name__ == "__main__":
     load_dotenv()
+    setup_logging()
     ensure_dirs()
+    start_exporters_from_env()
     app = QApplication(argv)
     try:
         with open("styles.qss", "r", encoding="utf-8") as f:
@@ -1,5 +1,11 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable
+
+from core.cancellation import CancelToken, CancelledError
+from core.checkpoint import Checkpoint
+from core.stage_stats import StageStats
 
 class BaseUploader(ABC):
     """
@@ -12,6 +18,95 @@ class BaseUploader(ABC):
         :param profile_path: путь к Selenium-профилю (если используется)
         """
         self.profile_path = profile_path
+        self.cancel = CancelToken()
+
+    # ================================================================
+    # Отмена
+    # ================================================================
+    @contextmanager
+    def _cancellable(self, on_cancel: Callable[[], None] | None = None):
+        """
+        Блок загрузки, прерываемый self.cancel.
+
+        on_cancel вызывается при отмене (например, закрыть вкладку —
+        тогда зависшие команды WebDriver падают сразу). Любая ошибка,
+        возникшая после отмены, превращается в CancelledError.
+        """
+        release = self.cancel.on_cancel(on_cancel) if on_cancel else (lambda: None)
+        try:
+            yield
+        except CancelledError:
+            raise
+        except Exception as e:
+            if self.cancel.cancelled:
+                raise CancelledError("Загрузка отменена") from e
+            raise
+        finally:
+            release()
+
+    @staticmethod
+    def _resume_tab(driver, handle: str | None, leased: str | None) -> bool:
+        """
+        Переключается на вкладку прошлой попытки (Selenium-загрузчики).
+        leased — вкладка, выданная SeleniumManager.tab: если это не handle,
+        прошлую вкладку заняла другая загрузка. False — продолжать не с чего.
+        """
+        if not handle or handle != leased:
+            return False
+        try:
+            if handle not in driver.window_handles:
+                return False
+            driver.switch_to.window(handle)
+            return True
+        except Exception:
+            return False
+
+    def _wait(self, driver, timeout: float, poll: float = 0.5):
+        """WebDriverWait, который прерывается отменой (только для Selenium-загрузчиков)."""
+        from core.waits import CancellableWait
+        return CancellableWait(driver, timeout, poll_frequency=poll, cancel=self.cancel)
+
+    def _record_wait(self, stage: str, wait):
+        """
+        Самое долгое ожидание элемента за успешную загрузку — в историю
+        этапа stage: из неё _stage_timeout выводит таймаут общего
+        WebDriverWait (этап "ui"), который сам по себе не замеряется.
+        """
+        if wait.longest > 0:
+            StageStats.instance().record(self.config.key, stage, wait.longest)
+
+    def _stage_timeout(
+        self,
+        stage: str,
+        default: float,
+        size_bytes: int | None = None,
+        per_mb: float = 0.0,
+        poll_default: float = 0.5,
+        minimum: float = 5.0,
+    ) -> tuple[float, float]:
+        """
+        Возвращает (таймаут, интервал опроса) для этапа загрузки.
+
+        Значения выводятся из истории длительностей (core/stage_stats.py),
+        а без истории — из `default` с добавкой `per_mb` на каждый МБ файла.
+        Наследник должен иметь атрибут `config` (NetworkConfig).
+
+        Настройки platform_settings:
+            adaptive_timeouts: выключает адаптацию (True по умолчанию)
+            max_stage_timeout: верхняя граница таймаута любого этапа
+        """
+        settings = self.config.platform_settings or {}
+        if not settings.get("adaptive_timeouts", True):
+            return default, poll_default
+
+        stats = StageStats.instance()
+        timeout = stats.timeout(
+            self.config.key, stage, default, size_bytes,
+            per_mb=per_mb, minimum=minimum,
+            maximum=settings.get("max_stage_timeout", 3600),
+        )
+        poll = stats.poll_interval(self.config.key, stage, poll_default, size_bytes)
+        return timeout, poll
 
     @abstractmethod
     def upload(self,
@@ -19,10 +114,18 @@ class BaseUploader(ABC):
                title: str,
                description: str,
                tags: list[str] | None = None,
-               thumbnail: str | None = None) -> dict:
+               thumbnail: str | None = None,
+               cancel: CancelToken | None = None,
+               checkpoint: Checkpoint | None = None) -> dict:
         """
         Метод загрузки, который должен быть реализован в наследниках.
 
+        :param cancel: токен отмены; загрузчик сохраняет его в self.cancel
+                       и проверяет во всех циклах ожидания
+        :param checkpoint: контрольная точка повторных попыток; загрузчик
+                           отмечает пройденные этапы и пропускает их
+                           при следующей попытке
+
         :return: словарь с результатом загрузки
         """
         raise NotImplementedError
@@ -3,10 +3,11 @@ from .base_uploader import BaseUploader
 from config.networks import NetworkConfig
 from utils.logger import log
 from core.selenium_manager import SeleniumManager
-import pyautogui
-import time
+from core.timing import stage
+from core.cancellation import CancelToken
+from core.checkpoint import Checkpoint
+from core import dom_actions
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 
@@ -30,6 +31,7 @@ class Uploader(BaseUploader):
         self.post_ready_delay = self.settings.get("post_ready_delay", 1.0)
         self.post_publish_delay = self.settings.get("post_publish_delay", 1.0)
         self.dialog_open_delay = self.settings.get("dialog_open_delay", 1.0)
+        self.processing_timeout_per_mb = self.settings.get("processing_timeout_per_mb", 0.5)
 
         self.default_category = self.settings.get("default_category", "Дизайн")
         self.scroll_into_view = self.settings.get("scroll_into_view", True)
@@ -54,32 +56,73 @@ class Uploader(BaseUploader):
         description: str,
         tags: list[str] | None = None,
         thumbnail: str | Path | None = None,
-        profile_name: str = "default",
+        profile_name: str | None = None,
+        cancel: CancelToken | None = None,
+        checkpoint: Checkpoint | None = None,
     ):
         video_file = self._validate_video(video_file)
         thumbnail = self._validate_thumbnail(thumbnail)
-
-        driver = SeleniumManager.instance().start(profile_name=profile_name, headless=False)
-        wait = WebDriverWait(driver, self.wait_timeout)
-        driver.get(self.upload_url)
-
-        # Загрузка видео
-        self._upload_file(driver, wait, video_file)
-        self._wait_processing(wait)
-
-        # Заполняем метаданные
-        self._fill_metadata(driver, wait, title, description, tags)
-    
-        # Выбираем категорию
-        self._select_category(driver, wait, category=self.default_category) 
-
-        # Загружаем обложку
-        if thumbnail:
-            self._upload_thumbnail(driver, wait, thumbnail)
-            self._click_ready_button(driver, wait)
-
-        # Получаем ссылку на видео
-        video_url = self._wait_video_ready_and_publish(driver, wait)
+        size = video_file.stat().st_size
+
+        self.cancel = cancel or CancelToken()
+        self.cancel.raise_if_cancelled()
+        profile_name = profile_name or self.config.profile_name
+        checkpoint = checkpoint or Checkpoint(self.config.key)
+
+        selenium = SeleniumManager.instance()
+        driver = selenium.start(profile_name=profile_name, headless=False)
+        # Своя вкладка: при FLOWVID_BROWSER_TABS > 1 в этом Chrome идут и другие загрузки
+        with selenium.tab(profile_name, checkpoint) as tab:
+            resumed = checkpoint.done("file_transfer") and self._resume_editor(driver, checkpoint, tab)
+            if not resumed:
+                checkpoint.reset()
+            handle = driver.current_window_handle
+
+            # При отмене закрываем вкладку: передача файла и ожидания обрываются сразу
+            with self._cancellable(lambda: selenium.close_tab(profile_name, handle)):
+                wait = self._stage_wait(driver, "ui", self.wait_timeout)
+                if not resumed:
+                    with stage("open_page"):
+                        driver.get(self.upload_url)
+
+                    # Загрузка видео
+                    with stage("file_transfer", bytes=size):
+                        self._upload_file(driver, wait, video_file)
+                    checkpoint.mark("file_transfer", _handle=handle)
+
+                if not checkpoint.done("processing"):
+                    with stage("processing"):
+                        self._wait_processing(driver, size)
+                    # Ссылка на редактор: по ней можно вернуться, даже если вкладку закрыли
+                    checkpoint.mark("processing", editor_url=driver.current_url)
+
+                # Заполняем метаданные
+                if not checkpoint.done("metadata"):
+                    with stage("metadata"):
+                        self._fill_metadata(driver, wait, title, description, tags)
+                    checkpoint.mark("metadata")
+
+                # Выбираем категорию
+                if not checkpoint.done("category"):
+                    with stage("category"):
+                        self._select_category(driver, wait, category=self.default_category) 
+                    checkpoint.mark("category")
+
+                # Загружаем обложку
+                if thumbnail and not checkpoint.done("thumbnail"):
+                    # Системный диалог выбора файла: вкладка должна оставаться активной
+                    with stage("thumbnail", bytes=thumbnail.stat().st_size), selenium.exclusive(profile_name):
+                        self._upload_thumbnail(driver, wait, thumbnail)
+                        self._click_ready_button(driver, wait)
+                    checkpoint.mark("thumbnail")
+
+                # Получаем ссылку на видео
+                with stage("publish"):
+                    video_url = self._wait_video_ready_and_publish(
+                        driver, self._stage_wait(driver, "publish", self.wait_timeout, size)
+                    )
+                checkpoint.mark("publish", video_url=video_url)
+                self._record_wait("ui", wait)
 
         result = {
             "success": True,
@@ -92,6 +135,38 @@ class Uploader(BaseUploader):
         
         return result
 
+    # ================================================================
+    # Продолжение после сбоя
+    # ================================================================
+    def _resume_editor(self, driver, checkpoint: Checkpoint, tab: str | None) -> bool:
+        """
+        Возвращается к уже загруженному файлу: во вкладку прошлой попытки,
+        а если её закрыли или заняли — в редактор по сохранённой ссылке
+        в выданной вкладке tab.
+        """
+        if self._resume_tab(driver, checkpoint.get("_handle"), tab):
+            log(f"[{self.config.title}] Продолжаем загрузку после этапа '{checkpoint.last}'")
+            return True
+        editor_url = checkpoint.get("editor_url")
+        if not editor_url:
+            return False
+        log(f"[{self.config.title}] Вкладка прошлой попытки недоступна, открываем редактор: {editor_url}")
+        with stage("open_page"):
+            driver.get(editor_url)
+        # Продолжение теперь в выданной вкладке — её и откладывать до повтора
+        checkpoint.set(_handle=driver.current_window_handle)
+        # Форма открыта заново — несохранённые поля придётся заполнить ещё раз
+        checkpoint.rewind("processing")
+        return True
+
+    # ================================================================
+    # Адаптивные таймауты
+    # ================================================================
+    def _stage_wait(self, driver, stage: str, default: float, size_bytes: int | None = None, per_mb: float = 0.0):
+        """WebDriverWait с адаптивным таймаутом этапа."""
+        timeout, poll = self._stage_timeout(stage, default, size_bytes, per_mb)
+        return self._wait(driver, timeout, poll)
+
     # ================================================================
     # Выбор категории из выпадающего списка
     # ================================================================
@@ -99,28 +174,16 @@ class Uploader(BaseUploader):
         log(f"[{self.config.title}] Выбираем категорию: {category}")
 
         # 1. Открываем селект (combobox)
-        combobox = wait.until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "div[role='combobox']"))
-        )
-        if self.scroll_into_view:
-            driver.execute_script("arguments[0].scrollIntoView(true);", combobox)
-        combobox.click()
-
-        # 2. Ждём появления списка опций
-        options = wait.until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div[role='option']"))
+        dom_actions.until_click(
+            wait, (By.CSS_SELECTOR, "div[role='combobox']"), scroll=self.scroll_into_view, block="start"
         )
 
-        # 3. Ищем нужный текст
-        found = False
-        for opt in options:
-            if category.lower() in opt.text.lower():
-                opt.click()
-                log(f"[{self.config.title}] Категория выбрана: {opt.text}")
-                found = True
-                break
+        # 2. Ждём появления списка опций и 3. кликаем нужную — одной командой на опрос
+        result = dom_actions.until_pick_option(wait, "div[role='option']", category, scroll=self.scroll_into_view)
 
-        if not found:
+        if result["ok"]:
+            log(f"[{self.config.title}] Категория выбрана: {result['text']}")
+        else:
             log(f"[{self.config.title}] Категория '{category}' не найдена", level="warning")
 
     # ================================================================
@@ -147,13 +210,13 @@ class Uploader(BaseUploader):
         log(f"[{self.config.title}] Ссылка появилась: {video_url}")
 
         # Доп. пауза — Rutube долго дохерачит внутренние процессы
-        time.sleep(self.post_ready_delay)
+        self.cancel.sleep(self.post_ready_delay)
 
         # Жмём "Опубликовать"
         self._click_publish(driver, wait)
 
         # Даём загрузке обработать команду
-        time.sleep(self.post_publish_delay)
+        self.cancel.sleep(self.post_publish_delay)
 
         return video_url
 
@@ -163,19 +226,11 @@ class Uploader(BaseUploader):
         """
         log(f"[{self.config.title}] Нажимаем кнопку 'Опубликовать'")
 
-        # Ждём появления кнопки
-        publish_btn = wait.until(
-            EC.element_to_be_clickable((
-                By.XPATH,
-                "//button[.//span[text()='Опубликовать']]"
-            ))
+        # Ждём появления кнопки и кликаем (через JS, как было)
+        dom_actions.until_click(
+            wait, (By.XPATH, "//button[.//span[text()='Опубликовать']]"), scroll=self.scroll_into_view
         )
 
-        if self.scroll_into_view:
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", publish_btn)
-        # Кликаем (через JS, как было)
-        driver.execute_script("arguments[0].click();", publish_btn)
-
     def _validate_thumbnail(self, thumbnail):
         if not thumbnail:
             return None
@@ -189,19 +244,12 @@ class Uploader(BaseUploader):
         """
         Жмёт кнопку 'Готово' после выбора изображения.
         """
-        # Ждём, пока кнопка станет кликабельной
-        btn = wait.until(
-            EC.element_to_be_clickable(
-                (By.XPATH, "//button[.//span[contains(text(),'Готово')]]")
-            )
+        # Ждём, пока кнопка станет кликабельной, и жмём
+        dom_actions.until_click(
+            wait, (By.XPATH, "//button[.//span[contains(text(),'Готово')]]"),
+            scroll=self.scroll_into_view, block="start",
         )
 
-        if self.scroll_into_view:
-            driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-
-        # Жмём
-        btn.click()
-
         log(f"[{self.config.title}] Нажали кнопку 'Готово'")
 
     # ================================================================
@@ -218,17 +266,17 @@ class Uploader(BaseUploader):
     def _upload_thumbnail(self, driver, wait, thumbnail: Path):
         log(f"[{self.config.title}] Загружаем обложку: {thumbnail}")
 
-        upload_btn = wait.until(
-            EC.element_to_be_clickable(
-                (By.XPATH, "//div[contains(@class,'cover-uploader-module__container')]")
-            )
+        # Клик Selenium: диалог выбора файла открывается только на настоящий жест
+        dom_actions.until_click(
+            wait, (By.XPATH, "//div[contains(@class,'cover-uploader-module__container')]"),
+            scroll=self.scroll_into_view, block="start", native=True,
         )
-        if self.scroll_into_view:
-            driver.execute_script("arguments[0].scrollIntoView(true);", upload_btn)
-        upload_btn.click()
 
         # Ждём открытия диалога выбора файла
-        time.sleep(self.dialog_open_delay)  # Можно увеличить, если диалог открывается медленно
+        self.cancel.sleep(self.dialog_open_delay)  # Можно увеличить, если диалог открывается медленно
+
+        # pyautogui при импорте подключается к дисплею — грузим только здесь
+        import pyautogui
 
         # Вводим путь к файлу и нажимаем Enter
         pyautogui.write(str(thumbnail.resolve()))
@@ -240,8 +288,13 @@ class Uploader(BaseUploader):
     # ================================================================
     # Ожидание обработки видео
     # ================================================================
-    def _wait_processing(self, wait):
-        log(f"[{self.config.title}] Ожидание обработки видео…")
+    def _wait_processing(self, driver, size_bytes: int):
+        timeout, poll = self._stage_timeout(
+            "processing", self.wait_timeout, size_bytes,
+            per_mb=self.processing_timeout_per_mb,
+        )
+        wait = self._wait(driver, timeout, poll)
+        log(f"[{self.config.title}] Ожидание обработки видео (таймаут {timeout:.0f} с)…")
         wait.until(EC.presence_of_element_located((By.NAME, "title")))
         wait.until(EC.presence_of_element_located((By.NAME, "description")))
         log(f"[{self.config.title}] Поля редактирования готовы")
@@ -250,19 +303,15 @@ class Uploader(BaseUploader):
     # Заполнение метаданных
     # ================================================================
     def _fill_metadata(self, driver, wait, title: str, description: str, tags: list[str] | None):
-        title_input = wait.until(EC.presence_of_element_located((By.NAME, "title")))
-        desc_input = wait.until(EC.presence_of_element_located((By.NAME, "description")))
-
-        # Очистка и заполнение заголовка
-        driver.execute_script("arguments[0].value='';", title_input)
-        title_input.clear()
-        title_input.send_keys(title)
+        # Поиск и ввод — одной командой; send_keys только если форма не приняла значение
+        modes = tuple(self.settings.get("text_input", dom_actions.TEXT_MODES))
+        dom_actions.fill_text(driver, wait, (By.NAME, "title"), title, modes, remember="rutube.title")
         log(f"[{self.config.title}] Заголовок установлен")
 
-        # Очистка и заполнение описания
-        driver.execute_script("arguments[0].value='';", desc_input)
-        desc_input.clear()
-        desc_input.send_keys(self._build_description(description, tags))
+        desc_input = dom_actions.fill_text(
+            driver, wait, (By.NAME, "description"), self._build_description(description, tags),
+            modes, remember="rutube.description",
+        )["element"]
         log(f"[{self.config.title}] Описание установлено")
 
         # Уходим с поля, чтобы Rutube сохранил изменения
@@ -1,10 +1,14 @@
 from pathlib import Path
 import asyncio
 from os import getenv
-from telethon import TelegramClient, errors
 
 from config.networks import NetworkConfig
 from utils.logger import log  
+from core.timing import stage
+from core.cancellation import CancelToken, CancelledError
+from core.checkpoint import Checkpoint
+from core.retry import error_types
+from core import bandwidth, progress
 
 
 class Uploader:
@@ -16,6 +20,9 @@ class Uploader:
         - TG_API_HASH
         - TG_CHANNEL
 
+    У дополнительных аккаунтов свой префикс (AccountConfig.env_prefix,
+    например TG_NEWS_API_ID) и свой файл сессии Telethon.
+
     Конфигурация для UI и логов — из NetworkConfig.
     """
 
@@ -23,18 +30,27 @@ class Uploader:
         self.config = config
         self.title = config.title
 
+        account = config.account
+        prefix = (account.env_prefix if account else None) or "TG_"
+
         # Секреты из env
-        self.api_id = getenv("TG_API_ID")
-        self.api_hash = getenv("TG_API_HASH")
-        self.channel = getenv("TG_CHANNEL")
+        self.api_id = getenv(f"{prefix}API_ID")
+        self.api_hash = getenv(f"{prefix}API_HASH")
+        self.channel = getenv(f"{prefix}CHANNEL")
 
         if not all([self.api_id, self.api_hash, self.channel]):
-            raise RuntimeError(f"[{self.title}] Telegram secrets missing in environment")
+            raise RuntimeError(f"[{self.title}] Telegram secrets missing in environment ({prefix}*)")
 
         self.api_id = int(self.api_id)
 
-        # Путь к файлу сессии Telethon
-        self.session_path = Path("telegram_session")
+        # Путь к файлу сессии Telethon (у каждого аккаунта свой)
+        if account is None or account.key == "default":
+            self.session_path = Path("telegram_session")
+        else:
+            self.session_path = Path(f"telegram_session_{account.key}")
+
+        # Telethon импортируется лениво — только когда сеть реально используется
+        from telethon import TelegramClient
 
         # Кешируем клиента, чтобы не создавать заново каждый раз
         self.client = TelegramClient(self.session_path, self.api_id, self.api_hash)
@@ -47,33 +63,93 @@ class Uploader:
             self._connected = True
             log(f"[{self.title}] Клиент Telegram подключен", level="info")
 
-    async def _send_video(self, video_file: Path, title: str):
-        """Асинхронная отправка видео через Telethon с прогрессом."""
-        await self._connect()
+    async def _send_video(self, video_file: Path, title: str, cancel: CancelToken, checkpoint: Checkpoint):
+        """Асинхронная отправка видео с поддержкой отмены."""
+        # Отмена из другого потока прерывает текущую задачу (и передачу части файла)
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        release = cancel.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+        try:
+            await self._send_video_task(video_file, title, cancel, checkpoint)
+        finally:
+            release()
 
-        def progress_callback(sent_bytes, total_bytes):
+    async def _send_video_task(self, video_file: Path, title: str, cancel: CancelToken, checkpoint: Checkpoint):
+        """
+        Отправка видео через Telethon с прогрессом.
+
+        Файл сначала загружается на сервер Telegram (upload_file), потом
+        публикуется сообщением. Загруженный файл хранится в контрольной
+        точке: если упала публикация, повтор не передаёт файл заново.
+        """
+        from telethon import errors
+
+        with stage("connect"):
+            await self._connect()
+
+        last_sent = 0
+
+        # Корутина: Telethon её ждёт, и пауза ограничителя не останавливает цикл событий
+        async def progress_callback(sent_bytes, total_bytes):
+            nonlocal last_sent
+            cancel.raise_if_cancelled()
+            progress.update(sent_bytes, total_bytes)
+            # Следующая часть уйдёт не раньше, чем позволяет доля канала (core/bandwidth.py)
+            chunk, last_sent = sent_bytes - last_sent, sent_bytes
+            await bandwidth.throttle_async(chunk)
             percent = sent_bytes / total_bytes * 100
             log(f"[{self.title}] Загрузка: {percent:.2f}%", level="info")
 
         try:
-            await self.client.send_file(
-                self.channel,
-                video_file,
-                caption=title,
-                progress_callback=progress_callback
-            )
+            uploaded = checkpoint.get("_uploaded_file")
+            if uploaded is None:
+                with stage("file_transfer", bytes=video_file.stat().st_size):
+                    uploaded = await self.client.upload_file(video_file, progress_callback=progress_callback)
+                checkpoint.mark("file_transfer", _uploaded_file=uploaded)
+            else:
+                log(f"[{self.title}] Файл уже на сервере Telegram, публикуем", level="info")
+
+            with stage("publish"):
+                await self.client.send_file(
+                    self.channel,
+                    uploaded,
+                    caption=title,
+                    attributes=self._video_attributes(video_file),
+                )
+            checkpoint.mark("publish")
             log(f"[{self.title}] Видео загружено: {video_file}", level="info")
         except errors.TelegramError as e:
             log(f"[{self.title}] Ошибка при отправке видео: {e}", level="error")
             raise
 
+    @staticmethod
+    def _video_attributes(video_file: Path) -> list:
+        """
+        Атрибуты видео для уже загруженного файла: Telethon не может
+        прочитать их сам, поэтому длительность и размер берём из MediaProbe.
+        """
+        from telethon import types
+        from core.media_probe import MediaProbe
+
+        info = MediaProbe.instance().probe(str(video_file), poster=False)
+        if not info.duration:
+            return []
+        return [types.DocumentAttributeVideo(
+            duration=int(info.duration),
+            w=info.width or 0,
+            h=info.height or 0,
+            supports_streaming=True,
+        )]
+
     def upload(
         self,
         video_file: str | Path,
         title: str,
         description: str = "",
         tags: list[str] | None = None,
-        thumbnail: str | Path | None = None
+        thumbnail: str | Path | None = None,
+        cancel: CancelToken | None = None,
+        checkpoint: Checkpoint | None = None,
     ) -> dict:
         """
         Синхронная обертка для вызова из UploaderManager.
@@ -83,15 +159,31 @@ class Uploader:
         :param description: игнорируется
         :param tags: игнорируются
         :param thumbnail: игнорируется
+        :param cancel: токен отмены — обрывает передачу файла
+        :param checkpoint: контрольная точка повторных попыток
         """
+        cancel = cancel or CancelToken()
+        checkpoint = checkpoint or Checkpoint(self.config.key)
         video_file = Path(video_file)
         if not video_file.exists():
             log(f"[{self.title}] Видео не найдено: {video_file}", level="error")
             return {"success": False, "error": f"Видео не найдено: {video_file}"}
 
         try:
-            asyncio.run(self._send_video(video_file, title))
+            asyncio.run(self._send_video(video_file, title, cancel, checkpoint))
+        except (CancelledError, asyncio.CancelledError):
+            # Цикл событий закрыт вместе с прерванной задачей — переподключимся в следующий раз
+            self._connected = False
+            raise CancelledError("Загрузка отменена")
         except Exception as e:
-            return {"success": False, "error": str(e), "platform": self.title}
+            from telethon import errors
+            result = {
+                "success": False, "error": str(e), "error_type": type(e).__name__,
+                "error_types": error_types(e), "platform": self.title,
+            }
+            if isinstance(e, errors.FloodWaitError):
+                # Telegram сообщает, сколько ждать, — это уйдёт в ограничитель частоты
+                result["retry_after"] = e.seconds
+            return result
 
         return {"success": True, "platform": self.title, "video_path": str(video_file)}
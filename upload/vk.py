@@ -1,13 +1,16 @@
 from pathlib import Path
-from time import sleep, time
+from time import time
 
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from .base_uploader import BaseUploader
 from utils.logger import log
 from core.selenium_manager import SeleniumManager
+from core.timing import stage
+from core.cancellation import CancelToken
+from core.checkpoint import Checkpoint
+from core import dom_actions
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 
@@ -43,52 +46,105 @@ class Uploader(BaseUploader):
         description: str = "",
         tags: list[str] | None = None,
         thumbnail: str | Path | None = None,
-        profile_name: str = "default",
+        profile_name: str | None = None,
+        cancel: CancelToken | None = None,
+        checkpoint: Checkpoint | None = None,
     ):
-        """Полный цикл загрузки видео."""
+        """
+        Полный цикл загрузки видео.
+
+        Повторная попытка с той же контрольной точкой продолжает работу
+        в оставленной вкладке: файл заново не передаётся, пройденные этапы
+        (метаданные, ссылка, обложка) пропускаются.
+        """
         video_file = self._validate_video(video_file)
         thumbnail = self._validate_thumbnail(thumbnail)
-
-        driver = SeleniumManager.instance().start(profile_name=profile_name, headless=False)
-        wait = WebDriverWait(driver, self.ps.get("default_wait", 20))
-
-        # 1. Переходим на страницу группы
-        group_url = f"https://vk.com/{self.ps['group_name']}"
-        log(f"[{self.config.title}] Открываем группу: {group_url}")
-        driver.get(group_url)
-
-        # 2. Нужна ли авторизация
-        self._handle_login_if_needed(driver)
-
-        # 3. Кнопка "Добавить", вызывает выпадающий список
-        self._click_add_button(driver, wait)
-
-        # 4. Кнопка "загрузить" в выпадающем списке
-        self._click_upload_video_menu_item(driver, wait)
-
-        # 5. Загрузка файла
-        self._upload_video_file(driver, wait, video_file)
-
-        # 6. Если есть кнопка "Понятно" (всегда для shrots?) нажимает ее
-        self._click_ok_if_present(driver, wait)
-
-        # 7. Определяем является ли видео shorts
-        self.is_shorts = self._is_shorts(driver, title, wait)
-
-        # 8. Заполняет описание + теги
-        self._fill_description(driver, description, tags)
-
-        self._fetch_uploaded_video_link(wait)
-
-        if self.is_shorts:
-            log("Видео является Shorts")
-        else:
-            log("Видео обычное")
-            self._attach_thumbnail(driver, wait, thumbnail)
-            self._set_publication_and_switch(wait)
-
-        self._wait_and_publish(driver, wait, poll_interval=2, timeout=300)
-
+        size = video_file.stat().st_size
+
+        self.cancel = cancel or CancelToken()
+        self.cancel.raise_if_cancelled()
+        profile_name = profile_name or self.config.profile_name
+        checkpoint = checkpoint or Checkpoint(self.config.key)
+
+        selenium = SeleniumManager.instance()
+        driver = selenium.start(profile_name=profile_name, headless=False)
+        # Своя вкладка: при FLOWVID_BROWSER_TABS > 1 в этом Chrome идут и другие загрузки
+        with selenium.tab(profile_name, checkpoint) as tab:
+            resumed = checkpoint.done("file_transfer") and self._resume_tab(driver, checkpoint.get("_handle"), tab)
+            if not resumed:
+                checkpoint.reset()
+            handle = driver.current_window_handle
+
+            # При отмене закрываем вкладку: передача файла и ожидания обрываются сразу
+            with self._cancellable(lambda: selenium.close_tab(profile_name, handle)):
+                ui_timeout, ui_poll = self._stage_timeout("ui", self.ps.get("default_wait", 20))
+                wait = self._wait(driver, ui_timeout, ui_poll)
+
+                if resumed:
+                    log(f"[{self.config.title}] Продолжаем загрузку после этапа '{checkpoint.last}'")
+                else:
+                    # 1. Переходим на страницу группы
+                    group_url = self.ps.get("group_url") or f"https://vk.com/{self.ps['group_name']}"
+                    log(f"[{self.config.title}] Открываем группу: {group_url}")
+                    with stage("open_page"):
+                        driver.get(group_url)
+
+                    # 2. Нужна ли авторизация
+                    self._handle_login_if_needed(driver)
+
+                    # 3. Кнопка "Добавить", вызывает выпадающий список
+                    # 4. Кнопка "загрузить" в выпадающем списке
+                    with stage("open_uploader"):
+                        self._click_add_button(driver, wait)
+                        self._click_upload_video_menu_item(driver, wait)
+
+                    # 5. Загрузка файла
+                    with stage("file_transfer", bytes=size):
+                        self._upload_video_file(driver, wait, video_file)
+                    checkpoint.mark("file_transfer", _handle=handle)
+
+                if checkpoint.done("metadata"):
+                    self.is_shorts = checkpoint.get("is_shorts", False)
+                else:
+                    with stage("metadata"):
+                        # 6. Если есть кнопка "Понятно" (всегда для shrots?) нажимает ее
+                        self._click_ok_if_present(driver, wait)
+
+                        # 7. Определяем является ли видео shorts
+                        self.is_shorts = self._is_shorts(driver, title, wait)
+
+                        # 8. Заполняет описание + теги
+                        self._fill_description(driver, description, tags)
+                    checkpoint.mark("metadata", is_shorts=self.is_shorts)
+
+                if checkpoint.done("link"):
+                    self.video_link = checkpoint.get("video_url")
+                else:
+                    with stage("link"):
+                        self._fetch_uploaded_video_link(wait)
+                    checkpoint.mark("link", video_url=self.video_link)
+
+                if self.is_shorts:
+                    log("Видео является Shorts")
+                elif not checkpoint.done("thumbnail"):
+                    log("Видео обычное")
+                    with stage("thumbnail", bytes=thumbnail.stat().st_size if thumbnail else 0):
+                        self._attach_thumbnail(driver, wait, thumbnail)
+                        self._set_publication_and_switch(wait)
+                    checkpoint.mark("thumbnail")
+
+                publish_timeout, publish_poll = self._stage_timeout(
+                    "publish",
+                    self.ps.get("publish_timeout", 300),
+                    size,
+                    per_mb=self.ps.get("publish_timeout_per_mb", 0.5),
+                    poll_default=self.ps.get("publish_poll_interval", 2),
+                )
+                with stage("publish"):
+                    if not self._wait_and_publish(driver, wait, poll_interval=publish_poll, timeout=publish_timeout):
+                        raise TimeoutError(f"VK: видео не опубликовалось за {publish_timeout:.0f} с")
+                checkpoint.mark("publish")
+                self._record_wait("ui", wait)
 
         log(f"[{self.config.title}] Видео успешно загружено: {self.video_link}", level="success")
 
@@ -114,7 +170,10 @@ class Uploader(BaseUploader):
                 if btn.is_displayed():
                     log(f"[{self.config.title}] Клик по кнопке входа: {selector}")
                     btn.click()
-                    self._wait_for_auth(driver)
+                    # Вход не зависит от размера файла: _wait_for_auth читает историю без него
+                    with stage("auth", sized=False) as span:
+                        if not self._wait_for_auth(driver):
+                            span.outcome = "timeout"
                     return
             except Exception:
                 continue
@@ -143,8 +202,7 @@ class Uploader(BaseUploader):
             elem = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector))) if wait else driver.find_element(By.CSS_SELECTOR, selector)
             # Элемент найден — обычное видео
             if title:
-                elem.clear()
-                elem.send_keys(title)
+                dom_actions.enter_text(driver, elem, title, self._text_modes(), remember="vk.title")
             return False
         except (NoSuchElementException, TimeoutException):
             return True
@@ -160,12 +218,18 @@ class Uploader(BaseUploader):
         Работает со всеми vk.com/id.vk.com/login?u редиректами.
         """
         start_url = driver.current_url
-        max_time = self.ps.get("max_auth_time", 180)
-        poll = self.ps.get("poll_interval", 0.5)
+        max_time, poll = self._stage_timeout(
+            "auth",
+            self.ps.get("max_auth_time", 180),
+            poll_default=self.ps.get("poll_interval", 0.5),
+            minimum=60,
+        )
+        # Ожидание ручного входа: история только сокращает таймаут, но не удлиняет
+        max_time = min(max_time, self.ps.get("max_auth_time", 180))
+        start_time = time()
 
         log(f"[{self.config.title}] Ожидание начала авторизации…")
 
-        start_time = time()
         left_start = False
 
         while True:
@@ -186,7 +250,7 @@ class Uploader(BaseUploader):
                 log(f"[{self.config.title}] Авторизация не завершилась вовремя", level="error")
                 return False
 
-            sleep(poll)
+            self.cancel.sleep(poll)
 
     # ================================================================
     # ЗАГРУЗКА ФАЙЛА
@@ -202,20 +266,19 @@ class Uploader(BaseUploader):
         css_selector = self.ps.get("btn_add_css")
         xpath_selector = self.ps.get("btn_add_xpath")
 
-        btn = None
+        # Поиск, прокрутка и клик — одна команда на каждый опрос
+        clicked = False
         if css_selector:
             try:
-                btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, css_selector)))
+                clicked = dom_actions.until_click(wait, (By.CSS_SELECTOR, css_selector))["ok"]
             except Exception:
                 log(f"[{self.config.title}] Кнопка 'Добавить' по CSS не найдена, пробуем XPath", level="warning")
 
         # Если CSS не сработал, используем XPath
-        if not btn and xpath_selector:
-            btn = wait.until(EC.element_to_be_clickable((By.XPATH, xpath_selector)))
+        if not clicked and xpath_selector:
+            clicked = dom_actions.until_click(wait, (By.XPATH, xpath_selector))["ok"]
 
-        if btn:
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-            btn.click()
+        if clicked:
             log(f"[{self.config.title}] Нажали кнопку 'Добавить'")
         else:
             log(f"[{self.config.title}] Не удалось найти кнопку 'Добавить'", level="error")
@@ -235,9 +298,7 @@ class Uploader(BaseUploader):
         )
 
         try:
-            menu_item = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", menu_item)
-            menu_item.click()
+            dom_actions.until_click(wait, (By.XPATH, xpath))
             log(f"[{self.config.title}] Нажали 'Загрузить видео' в меню")
         except Exception as e:
             log(f"[{self.config.title}] Не удалось найти или кликнуть 'Загрузить видео': {e}", level="error")
@@ -247,8 +308,8 @@ class Uploader(BaseUploader):
 
     def _upload_video_file(self, driver, wait, video_file):
         xpath = self.ps["file_input_xpath"]
+        # Скрытому полю файла прокрутка не нужна: send_keys работает и так
         file_input = wait.until(EC.presence_of_element_located((By.XPATH, xpath)))
-        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", file_input)
         file_input.send_keys(str(video_file.resolve()))
         log(f"[{self.config.title}] Видео отправлено: {video_file}")
 
@@ -261,6 +322,9 @@ class Uploader(BaseUploader):
         до тех пор, пока:
         1. URL изменится (публикация завершена) или
         2. Появится элемент с текстом "Видео обработано и загружено"
+
+        Returns:
+            True — публикация подтверждена, False — тайм-аут
         """
         start_url = driver.current_url
         start_time = time()
@@ -276,19 +340,19 @@ class Uploader(BaseUploader):
             current_url = driver.current_url
             if current_url != start_url:
                 log(f"[{self.config.title}] Видео опубликовано, URL изменился → {current_url}")
-                break
+                return True
 
             # Проверяем наличие текста на странице
             if success_text.lower() in driver.page_source.lower():
                 log(f"[{self.config.title}] Видео обработано и загружено — публикация завершена")
-                break
+                return True
 
             # Тайм-аут
             if time() - start_time > timeout:
                 log(f"[{self.config.title}] Видео не опубликовалось вовремя", level="error")
-                break
+                return False
 
-            sleep(poll_interval)
+            self.cancel.sleep(poll_interval)
 
 
     def _click_ok_if_present(self, driver, wait=None):
@@ -297,9 +361,10 @@ class Uploader(BaseUploader):
         """
         xpath = "//span[normalize-space(text())='Понятно']/ancestor::button"
         try:
-            btn = wait.until(EC.element_to_be_clickable((By.XPATH, xpath))) if wait else driver.find_element(By.XPATH, xpath)
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-            btn.click()
+            if wait:
+                dom_actions.until_click(wait, (By.XPATH, xpath))
+            elif not dom_actions.click(driver, (By.XPATH, xpath))["ok"]:
+                raise NoSuchElementException(xpath)
             log(f"[{self.config.title}] Кликнули по кнопке 'Понятно'")
         except (TimeoutException, NoSuchElementException):
             log(f"[{self.config.title}] Кнопка 'Понятно' отсутствует — продолжаем", level="info")
@@ -327,13 +392,16 @@ class Uploader(BaseUploader):
             if tags:
                 text_value += "\n" + " ".join(f"#{tag}" for tag in tags)
             
-            textarea.clear()
-            textarea.send_keys(text_value)
-            log(f"[{self.config.title}] Описание заполнено")
+            mode = dom_actions.enter_text(driver, textarea, text_value, self._text_modes(), remember="vk.description")
+            log(f"[{self.config.title}] Описание заполнено ({mode})")
         except (NoSuchElementException, TimeoutException) as e:
             log(f"[{self.config.title}] Не удалось найти поле описания (data-testid='{testid}'): {e}", level="warning")
 
 
+    def _text_modes(self) -> tuple[str, ...]:
+        """Способы ввода текста по порядку (core/dom_actions.py)."""
+        return tuple(self.ps.get("text_input", dom_actions.TEXT_MODES))
+
     def _click_publish(self, wait):
         """
         Кликает кнопку 'Опубликовать'.
@@ -345,8 +413,7 @@ class Uploader(BaseUploader):
                 if self.is_shorts else
                 "//button[@data-testid='video_upload_end_editing']//span[text()='Опубликовать']"
             )
-            btn = wait.until(EC.element_to_be_clickable((By.XPATH, xpath)))
-            btn.click()
+            dom_actions.until_click(wait, (By.XPATH, xpath))
             log(f"[{self.config.title}] Кликнули кнопку 'Опубликовать'")
         except (TimeoutException, NoSuchElementException) as e:
             log(f"[{self.config.title}] Кнопка 'Опубликовать' не найдена: {e}", level="warning")
@@ -399,7 +466,7 @@ class Uploader(BaseUploader):
                 log(f"[{self.config.title}] Обложка не загрузилась за {timeout} секунд", level="warning")
                 return False
 
-            sleep(poll_interval)
+            self.cancel.sleep(poll_interval)
 
 
 
@@ -423,7 +490,6 @@ class Uploader(BaseUploader):
         try:
             # Находим input для загрузки и отправляем файл
             file_input = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='file']")))
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", file_input)
             file_input.send_keys(str(thumbnail_path))
             log(f"[{self.config.title}] Файл миниатюры отправлен: {thumbnail_path}")
 
@@ -441,26 +507,20 @@ class Uploader(BaseUploader):
         """
         try:
             # --- 1. Таб "Публикация"
-            publication_label = wait.until(
-                EC.element_to_be_clickable((
-                    By.XPATH,
-                    "//label[input[@data-testid='video_upload_publication_tab'] or span[text()='Публикация']]"
-                ))
-            )
-            publication_label.click()
+            dom_actions.until_click(wait, (
+                By.XPATH,
+                "//label[input[@data-testid='video_upload_publication_tab'] or span[text()='Публикация']]"
+            ))
             log(f"[{self.config.title}] Кликнули по табу 'Публикация'")
         except Exception as e:
             log(f"[{self.config.title}] Не удалось найти/кликнуть по табу 'Публикация': {e}", level="warning")
 
         try:
             # --- 2. Переключатель (switch)
-            switch_label = wait.until(
-                EC.element_to_be_clickable((
-                    By.XPATH,
-                    "//label[input[@type='checkbox'] and contains(@class,'vkuiSwitch__host')]"
-                ))
-            )
-            switch_label.click()
+            dom_actions.until_click(wait, (
+                By.XPATH,
+                "//label[input[@type='checkbox'] and contains(@class,'vkuiSwitch__host')]"
+            ))
             log(f"[{self.config.title}] Кликнули по переключателю (switch)")
         except Exception as e:
             log(f"[{self.config.title}] Не удалось найти/кликнуть по переключателю: {e}", level="warning")
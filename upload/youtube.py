@@ -1,13 +1,14 @@
 import pickle
+from datetime import datetime, timezone
 from pathlib import Path
 
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-
 from config.networks import NetworkConfig
 from utils.logger import log 
+from core.timing import stage
+from core.cancellation import CancelToken
+from core.checkpoint import Checkpoint
+from core.retry import error_types
+from core import bandwidth, progress
 
 
 class Uploader:
@@ -46,10 +47,16 @@ class Uploader:
         self.oauth_host = self.settings.get("oauth_host", "localhost")
         self.oauth_port = self.settings.get("oauth_port", 8080)
 
-        self.service = self._get_authenticated_service()
+        with stage("auth"):
+            self.service = self._get_authenticated_service()
 
     def _get_authenticated_service(self):
         """Возвращает авторизованный объект YouTube API."""
+        # Google SDK тяжёлый — импортируем только при реальном использовании сети
+        from google.auth.transport.requests import Request
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         creds = None
 
         # Загружаем токен, если есть
@@ -88,9 +95,26 @@ class Uploader:
         title: str,
         description: str = "",
         tags: list[str] | None = None,
-        thumbnail: str | Path | None = None
+        thumbnail: str | Path | None = None,
+        cancel: CancelToken | None = None,
+        publish_at: datetime | None = None,
+        checkpoint: Checkpoint | None = None,
     ) -> dict:
-        """Загружает видео на YouTube с миниатюрой и тегами."""
+        """
+        Загружает видео на YouTube с миниатюрой и тегами.
+
+        Отмена проверяется между чанками resumable-загрузки.
+        publish_at — отложенная публикация: видео загружается приватным,
+        и YouTube сам делает его публичным в указанное время.
+        checkpoint — повторная попытка продолжает прерванную resumable-загрузку
+        с последнего принятого сервером чанка, а после загрузки видео
+        повторяет только миниатюру.
+        """
+        cancel = cancel or CancelToken()
+        checkpoint = checkpoint or Checkpoint(self.config.key)
+        from googleapiclient.errors import HttpError
+        from googleapiclient.http import MediaFileUpload
+
         video_file = Path(video_file)
         if not video_file.exists():
             log(f"[YouTube] Видео не найдено: {video_file}", level="error")
@@ -112,34 +136,107 @@ class Uploader:
                 "selfDeclaredMadeForKids": self.made_for_kids,
             },
         }
+        if publish_at:
+            # publishAt допускается только для приватных видео
+            body["status"]["privacyStatus"] = "private"
+            body["status"]["publishAt"] = publish_at.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            log(f"[YouTube] Отложенная публикация: {body['status']['publishAt']}", level="info")
 
         try:
-            # Загрузка видео
-            media = MediaFileUpload(video_file, chunksize=self.chunk_size, resumable=True)
-            request = self.service.videos().insert(part="snippet,status", body=body, media_body=media)
-
-            response = None
-            while response is None:
-                status, response = request.next_chunk()
-                if status:
-                    log(f"[YouTube] Загрузка: {int(status.progress() * 100)}%", level="info")
-
-            log(f"[YouTube] Видео загружено: https://youtu.be/{response['id']}", level="info")
+            if checkpoint.done("file_transfer"):
+                video_id = checkpoint.get("video_id")
+                log(f"[YouTube] Видео уже загружено ({video_id}), продолжаем", level="info")
+            else:
+                # Загрузка видео. Запрос прошлой попытки помнит resumable-сессию:
+                # next_chunk() спросит у сервера, сколько принято, и продолжит
+                request = checkpoint.get("_request")
+                restored = False
+                if request is not None:
+                    log(f"[YouTube] Продолжаем загрузку с {request.resumable_progress} байт", level="info")
+                else:
+                    request = self._insert_request(video_file, body)
+                    upload_uri = checkpoint.get("upload_uri")
+                    if upload_uri:
+                        # Сессия из журнала (процесс перезапускался): тот же запрос
+                        # «сколько принято?», что и после сбоя чанка
+                        request.resumable_uri = upload_uri
+                        request._in_error_state = True
+                        restored = True
+                        log("[YouTube] Продолжаем resumable-сессию прошлого запуска", level="info")
+                    checkpoint.set(_request=request)
+
+                response = None
+                size = video_file.stat().st_size
+                with stage("file_transfer", bytes=size):
+                    while response is None:
+                        cancel.raise_if_cancelled()
+                        # Чанк уходит не быстрее доли общего канала (core/bandwidth.py)
+                        bandwidth.throttle(min(self.chunk_size, size - request.resumable_progress), cancel)
+                        try:
+                            status, response = request.next_chunk()
+                        except HttpError as e:
+                            if not restored or e.resp.status not in (404, 410):
+                                raise
+                            # Сессия прошлого запуска истекла — загружаем файл заново
+                            log("[YouTube] Resumable-сессия истекла, загрузка начинается заново", level="warning")
+                            request = self._insert_request(video_file, body)
+                            checkpoint.set(_request=request, upload_uri=None)
+                            restored = False
+                            continue
+                        restored = False
+                        # Ссылка на сессию — в журнал (Checkpoint.set пишет только изменения)
+                        if request.resumable_uri:
+                            checkpoint.set(upload_uri=request.resumable_uri)
+                        if status:
+                            progress.update(status.resumable_progress, status.total_size)
+                            log(f"[YouTube] Загрузка: {int(status.progress() * 100)}%", level="info")
+
+                video_id = response["id"]
+                checkpoint.mark("file_transfer", video_id=video_id, _request=None, upload_uri=None)
+                log(f"[YouTube] Видео загружено: https://youtu.be/{video_id}", level="info")
 
             # Загрузка миниатюры
-            if thumbnail:
+            if thumbnail and not checkpoint.done("thumbnail"):
                 thumbnail = Path(thumbnail)
                 if thumbnail.exists():
                     ext = thumbnail.suffix.lower()
                     mime = "image/jpeg" if ext in (".jpg", ".jpeg") else "image/png"
                     media_thumb = MediaFileUpload(thumbnail, mimetype=mime)
-                    self.service.thumbnails().set(videoId=response["id"], media_body=media_thumb).execute()
+                    with stage("thumbnail", bytes=thumbnail.stat().st_size):
+                        self.service.thumbnails().set(videoId=video_id, media_body=media_thumb).execute()
                     log(f"[YouTube] Миниатюра загружена: {thumbnail}", level="info")
                 else:
                     log(f"[YouTube] Миниатюра не найдена: {thumbnail}", level="warning")
+                checkpoint.mark("thumbnail")
 
-            return {"success": True, "video_id": response["id"], "url": f"https://youtu.be/{response['id']}"}
+            return {"success": True, "video_id": video_id, "url": f"https://youtu.be/{video_id}"}
 
         except Exception as e:
             log(f"[YouTube] Ошибка загрузки: {e}", level="error")
-            return {"success": False, "error": str(e)}
+            return {
+                "success": False, "error": str(e), "error_type": type(e).__name__,
+                "error_types": error_types(e), **self._limit_feedback(e),
+            }
+
+    def _insert_request(self, video_file: Path, body: dict):
+        """Новый resumable-запрос videos.insert."""
+        from googleapiclient.http import MediaFileUpload
+        media = MediaFileUpload(video_file, chunksize=self.chunk_size, resumable=True)
+        return self.service.videos().insert(part="snippet,status", body=body, media_body=media)
+
+    @staticmethod
+    def _limit_feedback(error: Exception) -> dict:
+        """
+        Разбор HttpError: квота и частота API — для ограничителя
+        (core/rate_limit.py), временность ошибки — для повторов (core/retry.py).
+        """
+        from googleapiclient.errors import HttpError
+
+        if not isinstance(error, HttpError):
+            return {}
+        text = str(error)
+        if "quotaExceeded" in text or "uploadLimitExceeded" in text:
+            return {"quota_exceeded": True}
+        if error.resp.status == 429 or "rateLimitExceeded" in text:
+            return {"retry_after": float(error.resp.get("retry-after", 60))}
+        return {"transient": error.resp.status >= 500}
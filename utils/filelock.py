@@ -0,0 +1,24 @@
+import os
+
+
+def try_lock(path: str):
+    """
+    Неблокирующая эксклюзивная блокировка файла.
+
+    Возвращает открытый файл — блокировка держится, пока он не закрыт
+    (в том числе снимается ОС, если процесс упал); None — файл уже
+    заблокирован другим процессом.
+    """
+    f = open(path, "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
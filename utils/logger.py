@@ -1,36 +1,302 @@
+"""
+Логирование FlowVid.
+
+Записи передаются через очередь (QueueHandler → QueueListener):
+потоки загрузки только кладут запись в очередь, а форматирование
+и запись в файл/консоль выполняет фоновый поток слушателя.
+
+Файл logs/<процесс>.log (flowvid — GUI, daemon, worker) ротируется по
+времени (и, опционально, по размеру); старые части сжимаются в .gz,
+хранится не больше FLOWVID_LOG_BACKUPS штук. Ротация и сжатие
+выполняются в том же фоновом потоке; файл ротирует только процесс,
+который в него пишет.
+
+Переменные окружения:
+    FLOWVID_LOG_LEVEL=INFO          — минимальный уровень
+    FLOWVID_LOG_JSON=1              — писать файл лога в JSON (строка на запись)
+    FLOWVID_LOG_ROTATE_WHEN=midnight — период ротации (как у TimedRotatingFileHandler)
+    FLOWVID_LOG_BACKUPS=14          — сколько старых частей хранить
+    FLOWVID_LOG_MAX_MB=0            — ротация по размеру (0 — выключена)
+    FLOWVID_LOG_COMPRESS=1          — сжимать старые части gzip
+"""
+
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import sys
+import threading
+import time
 from datetime import datetime
-from traceback import format_exc
-
-
-LOG_DIR = os.path.join(os.getcwd(), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
-LOG_FILE = os.path.join(LOG_DIR, f"{datetime.now().strftime('%Y-%m-%d')}.log")
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding="utf-8"),
-        logging.StreamHandler()
-    ]
-)
-
-def log(message: str, level: str = "info"):
-    logger = logging.getLogger("flowvid")
-    lvl = level.lower()
-    if lvl == "error":
-        # Если message пустой — просто логируем traceback
-        if not message:
-            logger.error(format_exc())
-        else:
-            logger.error(f"{message}\n{format_exc()}")
-    elif lvl == "warning":
-        logger.warning(message)
-    elif lvl == "debug":
-        logger.debug(message)
-    elif lvl == "critical":
-        logger.critical(message)
-    else:
-        logger.info(message)
+
+from utils.filelock import try_lock
+
+
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "success": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна JSON-строка. Поля из log(..., **fields) попадают в "fields"."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            data["fields"] = fields
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _InProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без форматирования на вызывающем потоке.
+
+    Стандартный prepare() форматирует запись (включая traceback) ради
+    передачи между процессами. Очередь у нас внутрипроцессная, поэтому
+    запись уходит как есть, а вся работа выполняется в потоке слушателя.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RotatingLogHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    Ротация по времени и/или размеру со сжатием старых частей.
+
+    Часть получает имя по времени начала записи в неё:
+        flowvid.log.2024-05-01_00-00-00.gz
+    поэтому несколько ротаций по размеру за день не затирают друг друга.
+    """
+
+    def __init__(self, filename: str, when: str = "midnight", backup_count: int = 14,
+                 max_bytes: int = 0, compress: bool = True):
+        super().__init__(filename, when=when, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.suffix = "%Y-%m-%d_%H-%M-%S"
+        self._opened_at = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        # Файл, оставшийся с прошлого запуска, ротируем по его собственному времени
+        self.rolloverAt = self.computeRollover(int(self._opened_at))
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if time.time() >= self.rolloverAt:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.max_bytes:
+                return True
+        return False
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if os.path.exists(self.baseFilename):
+            stamp = time.strftime(self.suffix, time.localtime(self._opened_at))
+            dfn = self.rotation_filename(f"{self.baseFilename}.{stamp}")
+            n = 1
+            while os.path.exists(dfn):
+                dfn = self.rotation_filename(f"{self.baseFilename}.{stamp}-{n}")
+                n += 1
+            self.rotate(self.baseFilename, dfn)
+
+        for old in self.getFilesToDelete():
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+        now = time.time()
+        self._opened_at = now
+        self.rolloverAt = self.computeRollover(int(now))
+
+    def rotation_filename(self, default_name: str) -> str:
+        return f"{default_name}.gz" if self.compress else default_name
+
+    def rotate(self, source: str, dest: str):
+        if not self.compress:
+            os.replace(source, dest)
+            return
+        with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def getFilesToDelete(self) -> list[str]:
+        if self.backupCount <= 0:
+            return []
+        directory, base = os.path.split(self.baseFilename)
+        prefix = base + "."
+        # По времени изменения: имена с одинаковой секундой различаются лишь счётчиком
+        parts = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith(prefix)),
+            key=os.path.getmtime,
+        )
+        return parts[:-self.backupCount] if len(parts) > self.backupCount else []
+
+
+def _build_handlers(log_file: str) -> list[logging.Handler]:
+    text = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingLogHandler(
+        log_file,
+        when=os.getenv("FLOWVID_LOG_ROTATE_WHEN", "midnight"),
+        backup_count=int(os.getenv("FLOWVID_LOG_BACKUPS", "14")),
+        max_bytes=int(float(os.getenv("FLOWVID_LOG_MAX_MB", "0")) * 1024 * 1024),
+        compress=os.getenv("FLOWVID_LOG_COMPRESS", "1") == "1",
+    )
+    file_handler.setFormatter(JsonFormatter() if os.getenv("FLOWVID_LOG_JSON") == "1" else text)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(text)
+    return [file_handler, stream_handler]
+
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: logging.handlers.QueueListener | None = None
+_setup_lock = threading.Lock()
+_owner_lock = None      # блокировка файла лога: ротирует его только этот процесс
+
+# Корневой логгер тоже пишет через очередь — как раньше basicConfig,
+# сообщения Selenium/Telethon попадают в тот же файл
+_root = logging.getLogger()
+_root.addHandler(_InProcessQueueHandler(_queue))
+
+_logger = logging.getLogger("flowvid")
+
+
+def setup_logging(name: str = "flowvid"):
+    """
+    Запускает поток записи лога с настройками из окружения.
+
+    Модуль импортируется раньше, чем точки входа вызывают load_dotenv,
+    поэтому настройки читаются здесь: main.py, daemon.py и worker.py
+    вызывают её после load_dotenv (и смены рабочей папки). Если не
+    вызвали — log() запустит запись сам при первом сообщении.
+
+    name — файл logs/<name>.log. Ротация переименовывает и удаляет
+    файл, поэтому писать в него может только один процесс: у GUI,
+    daemon.py и worker.py свои имена, а если файл уже занят другим
+    процессом, к имени добавляется pid. Такие файлы завершившихся
+    процессов чистит _prune_fallbacks.
+    """
+    global _listener, _owner_lock
+    with _setup_lock:
+        if _listener is not None:
+            return
+        log_dir = os.path.join(os.getcwd(), "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        base = name
+        _owner_lock = try_lock(os.path.join(log_dir, f"{name}.lock"))
+        if _owner_lock is None:
+            name = f"{name}-{os.getpid()}"
+            _owner_lock = try_lock(os.path.join(log_dir, f"{name}.lock"))
+        _prune_fallbacks(log_dir, base, int(os.getenv("FLOWVID_LOG_BACKUPS", "14")))
+        _root.setLevel(os.getenv("FLOWVID_LOG_LEVEL", "INFO").upper())
+        listener = logging.handlers.QueueListener(
+            _queue, *_build_handlers(os.path.join(log_dir, f"{name}.log")), respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(shutdown_logging)
+        _listener = listener
+
+
+def shutdown_logging():
+    """
+    Дописывает очередь и закрывает файл лога (и блокировку на нём).
+    Нужна перед удалением рабочей папки (bench/e2e.py); следующий log()
+    снова вызовет setup_logging.
+    """
+    global _listener, _owner_lock
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        if _owner_lock is not None:
+            _owner_lock.close()
+            _owner_lock = None
+
+
+def _prune_fallbacks(log_dir: str, base: str, keep: int):
+    """
+    Файлы logs/<base>-<pid>.log* завершившихся процессов: никто их больше
+    не ротирует, поэтому хранятся только keep самых свежих.
+    Процесс жив, пока держит блокировку <base>-<pid>.lock.
+    """
+    prefix = f"{base}-"
+    dead: dict[str, list[str]] = {}
+    for entry in os.listdir(log_dir):
+        pid, dot, rest = entry[len(prefix):].partition(".")
+        if not entry.startswith(prefix) or not pid.isdigit() or not dot:
+            continue
+        if int(pid) != os.getpid() and rest.startswith("log"):
+            dead.setdefault(pid, []).append(os.path.join(log_dir, entry))
+    files = []
+    for pid, paths in dead.items():
+        lock_path = os.path.join(log_dir, f"{prefix}{pid}.lock")
+        if os.path.exists(lock_path):
+            lock = try_lock(lock_path)
+            if lock is None:
+                continue        # процесс ещё пишет
+            lock.close()
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+        files.extend(paths)
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def log(message: str, level: str = "info", **fields):
+    """
+    Пишет сообщение в лог FlowVid.
+
+    Уровень проверяется до какой-либо работы; traceback прикладывается
+    к error только если исключение действительно обрабатывается.
+    Именованные аргументы сохраняются как структурные поля записи.
+    """
+    if _listener is None:
+        setup_logging()
+    lvl = _LEVELS.get(level.lower(), logging.INFO)
+    if not _logger.isEnabledFor(lvl):
+        return
+
+    exc_info = lvl == logging.ERROR and sys.exc_info()[0] is not None
+    if lvl == logging.ERROR and not message and not exc_info:
+        return  # пустое сообщение без исключения — логировать нечего
+
+    _logger.log(
+        lvl,
+        message,
+        exc_info=exc_info,
+        extra={"fields": fields} if fields else None,
+    )
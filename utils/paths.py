@@ -64,6 +64,50 @@ def site_profile(site_name: str) -> str:
     return p
 
 
+def stats_dir() -> str:
+    """
+    Возвращает путь к директории локальной статистики (./stats)
+    и гарантирует её создание.
+
+    Зачем:
+        Здесь хранится история длительностей этапов загрузки, из которой
+        выводятся адаптивные таймауты и интервалы опроса. Данные локальны
+        для машины и не должны попадать в репозиторий.
+    """
+    p = os.path.join(os.getcwd(), "stats")
+    os.makedirs(p, exist_ok=True)
+    return p
+
+
+def cache_dir() -> str:
+    """
+    Возвращает путь к директории кэша (./cache) и гарантирует её создание.
+
+    Зачем:
+        Здесь лежат производные данные, которые можно в любой момент
+        пересчитать: свойства видеофайлов (ffprobe) и кадры-постеры
+        для превью в GUI.
+    """
+    p = os.path.join(os.getcwd(), "cache")
+    os.makedirs(p, exist_ok=True)
+    return p
+
+
+def data_dir() -> str:
+    """
+    Возвращает путь к директории рабочих данных (./data)
+    и гарантирует её создание.
+
+    Зачем:
+        Здесь хранится состояние, которое должно пережить перезапуск:
+        расписание отложенных публикаций и входящие заявки планировщику.
+        В отличие от ./cache, эти файлы нельзя просто удалить.
+    """
+    p = os.path.join(os.getcwd(), "data")
+    os.makedirs(p, exist_ok=True)
+    return p
+
+
 def ensure_dirs():
     """
     Создаёт базовые директории приложения, если они отсутствуют:
@@ -0,0 +1,119 @@
+"""
+Воркер общего хранилища заданий — для загрузки с нескольких машин.
+
+    python worker.py run --node box-1 -n vk -n rutube --capacity 2
+    python worker.py submit video.mp4 -n youtube -n vk --title "Заголовок" --tags "тег1, тег2"
+    python worker.py status
+    python worker.py cancel <id>
+
+Хранилище — SQLite-файл на общем диске: --store или FLOWVID_JOB_STORE.
+Несколько узлов на одной машине запускайте с разными --workdir:
+у каждого будут свои профили Chrome, сессии, журнал и статистика.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from core.metrics import start_exporters_from_env
+from core.tags import split_tags
+from utils.logger import setup_logging
+from utils.paths import ensure_dirs
+
+
+def cmd_run(args, store) -> int:
+    from core.worker import Worker
+
+    start_exporters_from_env()
+    worker = Worker(store, node_id=args.node, networks=args.network, capacity=args.capacity)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+def cmd_submit(args, store) -> int:
+    job_id = store.submit(
+        os.path.abspath(args.video),
+        args.network,
+        title=args.title,
+        description=args.description,
+        tags=split_tags(args.tags),
+        thumbnail=os.path.abspath(args.thumbnail) if args.thumbnail else None,
+    )
+    print(job_id)
+    return 0
+
+
+def cmd_status(args, store) -> int:
+    now = time.time()
+    for node in store.nodes():
+        state = "жив" if node.alive else ("остановлен" if not node.heartbeat else "нет связи")
+        seen = f"heartbeat {now - node.heartbeat:.0f} с назад" if node.heartbeat else ""
+        print(f"узел {node.node_id:<16} {state:<10} {node.active}/{node.capacity}  "
+              f"[{', '.join(node.networks)}]  {seen}")
+    for job in store.jobs():
+        print(f"{job.id}  {datetime.fromtimestamp(job.created):%Y-%m-%d %H:%M}  {job.status:<9}  "
+              f"{os.path.basename(job.video_file)}")
+        for t in job.tasks:
+            detail = t["url"] or t["error"] or ""
+            print(f"  ↳ {t['network']:<10} {t['status']:<9} {t['node'] or '-':<16} попыток {t['attempts']}  {detail}")
+    return 0
+
+
+def cmd_cancel(args, store) -> int:
+    print(f"Отменено задач: {store.cancel(args.id)}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="FlowVid: воркер общего хранилища заданий")
+    parser.add_argument("--store", help="путь к SQLite-хранилищу (по умолчанию FLOWVID_JOB_STORE)")
+    parser.add_argument("--workdir", help="рабочая папка узла: профили, сессии, журнал")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="запустить узел")
+    run.add_argument("--node", help="имя узла (по умолчанию FLOWVID_NODE_ID или имя хоста)")
+    run.add_argument("-n", "--network", action="append", help="сеть узла (можно несколько раз)")
+    run.add_argument("--capacity", type=int, help="одновременных загрузок")
+    run.set_defaults(func=cmd_run)
+
+    submit = sub.add_parser("submit", help="поставить видео в очередь")
+    submit.add_argument("video")
+    submit.add_argument("-n", "--network", action="append", required=True, help="ключ сети (можно несколько раз)")
+    submit.add_argument("--title", default="")
+    submit.add_argument("--description", default="")
+    submit.add_argument("--tags", default="", help="через запятую или с новой строки")
+    submit.add_argument("--thumbnail")
+    submit.set_defaults(func=cmd_submit)
+
+    sub.add_parser("status", help="узлы и задания").set_defaults(func=cmd_status)
+
+    cancel = sub.add_parser("cancel", help="отменить задание")
+    cancel.add_argument("id")
+    cancel.set_defaults(func=cmd_cancel)
+
+    args = parser.parse_args(argv)
+    # Путь к хранилищу — до смены рабочей папки
+    store_path = os.path.abspath(args.store or os.getenv("FLOWVID_JOB_STORE") or os.path.join("data", "jobs.sqlite"))
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        os.chdir(args.workdir)
+    # Лог — в рабочей папке узла
+    setup_logging("worker")
+    ensure_dirs()
+
+    from core.job_store import JobStore
+    return args.func(args, JobStore(store_path))
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(main())